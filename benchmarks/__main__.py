@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from typing import List, Dict, Optional
+
+from benchmarks.cases import Case, session_cases, statistics_cases, conversion_cases, scramble_cases
+
+# Run from the folder of Py-Cube-Timer with: python -m benchmarks
+# The results are JSON. Given the results of an earlier run with --baseline, the cases that got slower by more than
+# the threshold are reported and the exit code is 1.
+_VERSION = 1
+
+
+def main(arguments: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Py-Cube-Timer benchmarks")
+    parser.add_argument("-s", "--sizes", default="100,1000,10000,100000",
+                        help="comma separated session sizes, in solves")
+    parser.add_argument("-k", "--only", help="only the cases whose name contains this")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="least number of runs of each case")
+    parser.add_argument("-t", "--min-time", type=float, default=0.5,
+                        help="least seconds spent on each case; it's run more times, until then")
+    parser.add_argument("-o", "--output", help="file for the results; the default is the standard output")
+    parser.add_argument("-b", "--baseline", help="results of an earlier run, to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="how much slower a case can get before it's a regression; 0.25 is 25%%")
+    args = parser.parse_args(arguments)
+
+    logging.disable(logging.CRITICAL)  # The session functions log every call
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    baseline = _load_baseline(args.baseline) if args.baseline is not None else None
+
+    # The session functions work with data/sessions in the current folder
+    initial_folder = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.makedirs(os.path.join(folder, "data", "sessions"))
+        os.chdir(folder)
+        try:
+            results = _run_all(sizes, args)
+        finally:
+            os.chdir(initial_folder)
+
+    report = {
+        "version": _VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if baseline is not None and _compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+def _run_all(sizes: List[int], args: argparse.Namespace) -> List[dict]:
+    results = []
+
+    def run(cases: List[Case]):
+        for case in cases:
+            if args.only is not None and args.only not in case.name:
+                continue
+
+            timings = _measure(case, args.repeats, args.min_time)
+            results.append({
+                "name": case.name,
+                "size": case.size,
+                "repeats": len(timings),
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.mean(timings)
+            })
+            print(f"{case.key:<44} {_format_seconds(min(timings)):>10}  ({len(timings)} runs)", file=sys.stderr)
+
+    for size in sizes:
+        run(session_cases(size))
+        run(statistics_cases(size))
+
+    run(conversion_cases())
+    run(scramble_cases())
+
+    return results
+
+
+def _measure(case: Case, repeats: int, min_time: float) -> List[float]:
+    timings: List[float] = []
+    start = time.perf_counter()
+
+    while len(timings) < repeats or time.perf_counter() - start < min_time:
+        if case.before is not None:
+            case.before()
+
+        begin = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - begin)
+
+        if case.after is not None:
+            case.after()
+
+    return timings
+
+
+def _compare(results: List[dict], baseline: Dict[str, dict], threshold: float) -> bool:
+    """
+    Print how each case changed since the baseline and return True, if any got slower than the threshold allows.
+    The fastest runs are compared, because they are the least disturbed by everything else running.
+
+    """
+    regressed = False
+    print(file=sys.stderr)
+
+    for result in results:
+        key = f"{result['name']}[{result['size']}]"
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:<44} new", file=sys.stderr)
+            continue
+
+        ratio = result["min"] / previous["min"]
+        if ratio > 1.0 + threshold:
+            regressed = True
+            verdict = "REGRESSION"
+        elif ratio < 1.0 - threshold:
+            verdict = "faster"
+        else:
+            verdict = ""
+
+        print(f"{key:<44} {ratio:>6.2f}x  {verdict}", file=sys.stderr)
+
+    return regressed
+
+
+def _load_baseline(path: str) -> Dict[str, dict]:
+    with open(path, "r") as file:
+        report = json.load(file)
+
+    if report.get("version") != _VERSION:
+        print(f"{path} is from another version of the benchmarks", file=sys.stderr)
+        sys.exit(2)
+
+    return {f"{result['name']}[{result['size']}]": result for result in report["results"]}
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import dataclasses
+from typing import List, Callable, Optional
+
+from src.data import SESSIONS_PATH
+from src.scramble import PUZZLE_TYPES, generate_scramble
+from src.session import Solve, load_session_data, dump_data, remove_solve_out_of_session
+from src.stats import RollingStatistics
+from src.analysis import SessionAnalysis
+from src.timer import interpret_time_in_seconds, format_time_seconds
+from benchmarks.fixtures import make_solves, make_times, write_session
+
+# The conversions and the scrambles are measured on batches, because one call is too short to time
+BATCH_SIZE = 1000
+
+
+@dataclasses.dataclass
+class Case:
+    name: str
+    size: int  # Solves in the session, or calls in the batch
+    run: Callable[[], object]  # Timed
+    before: Optional[Callable[[], object]] = None  # Not timed; run before every call of run
+    after: Optional[Callable[[], object]] = None  # Not timed; run after every call of run
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+
+def session_cases(size: int) -> List[Case]:
+    """
+    The session file operations, on a session of size solves. The current folder must have data/sessions in it.
+
+    """
+    file_name = write_session(SESSIONS_PATH, f"benchmark {size}", make_solves(size))
+    solve = Solve("15.37", "R U R' U'", "2021-06-01 12:00:00.000001", 15.37, 12345)
+
+    return [
+        Case("load_session_data", size, lambda: load_session_data(file_name)),
+        # Adding and removing one solve in turn, so that the session stays the same size
+        Case("dump_data", size, lambda: dump_data(file_name, solve),
+             after=lambda: remove_solve_out_of_session(file_name, -1)),
+        Case("remove_solve_out_of_session", size, lambda: remove_solve_out_of_session(file_name, -1),
+             before=lambda: dump_data(file_name, solve))
+    ]
+
+
+def statistics_cases(size: int) -> List[Case]:
+    """
+    The statistics of the main window: all of them at once when a session is loaded, then one solve at a time.
+
+    """
+    times = make_times(size)
+    statistics = RollingStatistics(times)
+    analysis = SessionAnalysis(times)
+    middle = size // 2
+
+    return [
+        Case("RollingStatistics", size, lambda: RollingStatistics(times)),
+        Case("RollingStatistics.append", size, lambda: statistics.append(14.2),
+             after=lambda: statistics.delete(-1)),
+        Case("RollingStatistics.replace", size, lambda: statistics.replace(middle, float("inf")),
+             after=lambda: statistics.replace(middle, times[middle])),
+        Case("RollingStatistics.delete", size, lambda: statistics.delete(middle),
+             after=lambda: _insert_back(statistics, middle, times[middle])),
+        Case("SessionAnalysis", size, lambda: SessionAnalysis(times).rolling),
+        # What the main window shows after every solve
+        Case("SessionAnalysis.append", size, lambda: (analysis.append(14.2), analysis.spread),
+             after=lambda: analysis.delete(-1))
+    ]
+
+
+def conversion_cases() -> List[Case]:
+    formatted = [solve["time"] for solve in make_solves(BATCH_SIZE, scramble_type="Skewb")]
+    seconds = [interpret_time_in_seconds(time) for time in formatted]
+
+    return [
+        Case("interpret_time_in_seconds", BATCH_SIZE, lambda: [interpret_time_in_seconds(time) for time in formatted]),
+        Case("format_time_seconds", BATCH_SIZE, lambda: [format_time_seconds(time) for time in seconds])
+    ]
+
+
+def scramble_cases() -> List[Case]:
+    return [Case(f"generate_scramble.{scramble_type}", BATCH_SIZE,
+                 lambda scramble_type=scramble_type: [generate_scramble(scramble_type) for _ in range(BATCH_SIZE)])
+            for scramble_type in PUZZLE_TYPES]
+
+
+def _insert_back(statistics: RollingStatistics, index: int, time: float):
+    # There is no insert, so the times from index on are taken off the end and added again; not timed anyway
+    rest = statistics.times[index:]
+    for _ in rest:
+        statistics.delete(-1)
+    for value in [time] + rest:
+        statistics.append(value)
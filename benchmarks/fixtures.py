@@ -0,0 +1,55 @@
+import json
+import random
+import datetime
+from os.path import join
+from typing import List
+
+from src.scramble import generate_scramble
+from src.stats import PLUS_TWO, DNF
+from src.timer import format_time_seconds
+
+# Synthetic sessions that look like real ones: times around fifteen seconds, a few penalties, one solve a minute
+_FIRST_DATE = datetime.datetime(2021, 1, 1, 10, 0, 0, 123456)
+
+
+def make_solves(count: int, seed: int = 0, scramble_type: str = "3x3x3") -> List[dict]:
+    rng = random.Random(seed)
+    solves = []
+
+    for i in range(count):
+        solve = {
+            "time": format_time_seconds(round(max(rng.gauss(15.0, 3.0), 5.0), 2)),
+            "scramble": generate_scramble(scramble_type, rng),
+            "date": str(_FIRST_DATE + datetime.timedelta(minutes=i, microseconds=rng.randrange(1000000))),
+            "seed": rng.getrandbits(64)
+        }
+
+        penalty = rng.random()
+        if penalty < 0.02:
+            solve["penalty"] = DNF
+        elif penalty < 0.05:
+            solve["penalty"] = PLUS_TWO
+
+        solves.append(solve)
+
+    return solves
+
+
+def make_times(count: int, seed: int = 0) -> List[float]:
+    """
+    Times with their penalties, like SolveColumns.results.
+
+    """
+    rng = random.Random(seed)
+    return [float("inf") if rng.random() < 0.02 else round(max(rng.gauss(15.0, 3.0), 5.0), 2) for _ in range(count)]
+
+
+def write_session(sessions_path: str, name: str, solves: List[dict], scramble_type: str = "3x3x3") -> str:
+    """
+    Write a session file laid out like write_json() does and return its file name.
+
+    """
+    with open(join(sessions_path, name + ".json"), "w") as file:
+        json.dump({"name": name, "scramble_type": scramble_type, "solves": solves}, file, indent=2)
+
+    return name + ".json"
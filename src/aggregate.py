@@ -0,0 +1,192 @@
+import os
+import json
+import math
+import logging
+import threading
+import dataclasses
+from os.path import join
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from src.atomic import read_json, write_json
+from src.data import SESSIONS_PATH
+from src.timer import interpret_time_in_seconds
+from src.stats import all_ao5, all_ao12, apply_penalty, NO_PENALTY
+
+# Statistics of all the sessions, per scramble type. The session files are read by a pool of processes and their
+# results are merged. The result of each file is cached, until the file changes.
+AGGREGATE_CACHE_PATH = join("data", "aggregate_cache.json")
+HISTOGRAM_BUCKET = 1.0  # In seconds
+_VERSION = 2
+
+# Starting processes costs more than reading a few files
+_POOL_THRESHOLD = 8
+
+_lock = threading.Lock()
+
+
+@dataclasses.dataclass
+class Aggregate:
+    scramble_type: str
+    session_count: int = 0
+    solve_count: int = 0
+    dnf_count: int = 0
+    total_time: float = 0.0  # Without the DNFs
+    best_single: Optional[float] = None
+    best_single_session: str = ""
+    best_ao5: Optional[float] = None
+    best_ao5_session: str = ""
+    best_ao12: Optional[float] = None
+    best_ao12_session: str = ""
+    months: Dict[str, List[float]] = dataclasses.field(default_factory=dict)  # "YYYY-MM" to count and total, no DNFs
+    histogram: Dict[int, int] = dataclasses.field(default_factory=dict)  # Bucket index to solve count
+
+    @property
+    def mean(self) -> Optional[float]:
+        finite_count = self.solve_count - self.dnf_count
+        return self.total_time / finite_count if finite_count else None
+
+    def monthly_means(self) -> List[Tuple[str, float]]:
+        """
+        Month and mean pairs, oldest first.
+
+        """
+        return [(month, total / count) for month, (count, total) in sorted(self.months.items())]
+
+    def merge(self, other: "Aggregate"):
+        self.session_count += other.session_count
+        self.solve_count += other.solve_count
+        self.dnf_count += other.dnf_count
+        self.total_time += other.total_time
+
+        for name in ("best_single", "best_ao5", "best_ao12"):
+            value = getattr(other, name)
+            if value is not None and (getattr(self, name) is None or value < getattr(self, name)):
+                setattr(self, name, value)
+                setattr(self, name + "_session", getattr(other, name + "_session"))
+
+        for month, (count, total) in other.months.items():
+            current = self.months.setdefault(month, [0, 0.0])
+            current[0] += count
+            current[1] += total
+
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+
+def aggregate_sessions(processes: Optional[int] = None) -> Dict[str, Aggregate]:
+    """
+    Return the statistics of every scramble type that has sessions. processes is the most processes to use; by
+    default, as many as there are processors. Corrupted session files are left out.
+
+    """
+    with _lock:
+        cache = _load_cache()
+        files: Dict[str, dict] = {}
+        to_read: List[str] = []
+
+        with os.scandir(SESSIONS_PATH) as iterator:
+            for item in iterator:
+                if not item.name.endswith(".json") or not item.is_file():
+                    continue
+
+                stat = item.stat()
+                cached = cache.get(item.name)
+                if cached is not None and cached["modified"] == stat.st_mtime and cached["size"] == stat.st_size:
+                    files[item.name] = cached
+                else:
+                    files[item.name] = {"modified": stat.st_mtime, "size": stat.st_size, "aggregate": None}
+                    to_read.append(item.name)
+
+        if to_read:
+            logging.debug(f"Reading {len(to_read)} of {len(files)} sessions for the statistics")
+            paths = [join(SESSIONS_PATH, file_name) for file_name in to_read]
+
+            if len(to_read) < _POOL_THRESHOLD or processes == 1:
+                results = list(map(_aggregate_file, paths))
+            else:
+                workers = processes or os.cpu_count() or 1
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    # A few chunks per process, so that the work stays balanced
+                    results = list(executor.map(_aggregate_file, paths, chunksize=max(len(paths) // (workers * 4), 1)))
+
+            for file_name, result in zip(to_read, results):
+                files[file_name]["aggregate"] = result
+
+        if to_read or len(files) != len(cache):
+            _save_cache(files)
+
+    aggregates: Dict[str, Aggregate] = {}
+    for entry in files.values():
+        if entry["aggregate"] is None:  # Corrupted
+            continue
+
+        aggregate = _aggregate_from_dict(entry["aggregate"])
+        aggregates.setdefault(aggregate.scramble_type, Aggregate(aggregate.scramble_type)).merge(aggregate)
+
+    return aggregates
+
+
+def _aggregate_file(path: str) -> Optional[dict]:
+    # Runs in the worker processes; returns a dictionary, because it's also what goes in the cache
+    try:
+        with open(path, "r") as file:
+            contents = json.load(file)
+
+        name = contents["name"]
+        times = [apply_penalty(interpret_time_in_seconds(solve["time"]), solve.get("penalty", NO_PENALTY))
+                 for solve in contents["solves"]]
+        months = [solve["date"][:7] for solve in contents["solves"]]  # The dates are like 2021-03-14 10:20:30.123456
+        aggregate = Aggregate(contents["scramble_type"], session_count=1)
+    except (OSError, json.decoder.JSONDecodeError, KeyError, ValueError, TypeError):
+        logging.error(f"{path} is corrupted; it's left out of the statistics")
+        return None
+
+    ao5 = all_ao5(times)
+    ao12 = all_ao12(times)
+
+    aggregate.solve_count = len(times)
+    aggregate.dnf_count = sum(1 for time in times if math.isinf(time))
+    aggregate.total_time = sum(time for time in times if math.isfinite(time))
+    aggregate.best_single = min(times, default=None)
+    aggregate.best_ao5 = min(ao5, default=None)
+    aggregate.best_ao12 = min(ao12, default=None)
+    aggregate.best_single_session = aggregate.best_ao5_session = aggregate.best_ao12_session = name
+
+    for time, month in zip(times, months):
+        if math.isfinite(time):
+            current = aggregate.months.setdefault(month, [0, 0.0])
+            current[0] += 1
+            current[1] += time
+
+            bucket = int(time // HISTOGRAM_BUCKET)
+            aggregate.histogram[bucket] = aggregate.histogram.get(bucket, 0) + 1
+
+    return dataclasses.asdict(aggregate)
+
+
+def _aggregate_from_dict(dictionary: dict) -> Aggregate:
+    aggregate = Aggregate(**dictionary)
+    aggregate.months = {month: list(value) for month, value in aggregate.months.items()}
+    aggregate.histogram = {int(bucket): count for bucket, count in aggregate.histogram.items()}  # JSON keys are strings
+    return aggregate
+
+
+def _load_cache() -> Dict[str, dict]:
+    try:
+        contents = read_json(AGGREGATE_CACHE_PATH)
+        if contents["version"] != _VERSION:
+            return {}
+        return contents["files"]
+    except FileNotFoundError:
+        return {}
+    except (json.decoder.JSONDecodeError, KeyError, TypeError):
+        logging.error("The statistics cache is corrupted; it will be made again")
+        return {}
+
+
+def _save_cache(files: Dict[str, dict]):
+    try:
+        write_json(AGGREGATE_CACHE_PATH, {"version": _VERSION, "files": files})
+    except OSError as err:  # It's only a cache
+        logging.error(f"Could not write the statistics cache: {err}")
@@ -0,0 +1,295 @@
+import math
+import dataclasses
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+# The spread of the times and how they improve, for the statistics window. Everything is calculated on the whole
+# session at once with NumPy, then kept up to date a solve at a time. A DNF is infinite, so it counts as the worst
+# time in the medians and the percentiles, but it's left out of the standard deviations, the histogram and the trend.
+ROLLING_WINDOW = 100  # Solves
+BUCKET_WIDTH = 1.0  # Seconds, of the histogram
+
+_CHUNK_SIZE = 4096  # Rolling windows sorted at once, so that a big session doesn't take much memory
+_INITIAL_CAPACITY = 1024
+
+
+@dataclasses.dataclass
+class Spread:
+    median: Optional[float]
+    std: Optional[float]
+    p10: Optional[float]
+    p90: Optional[float]
+
+
+@dataclasses.dataclass
+class Trend:
+    """
+    The improvement curve time = coefficient * index ** exponent, fitted by least squares on the logarithms.
+    A negative exponent means getting faster.
+
+    """
+
+    coefficient: float
+    exponent: float
+
+    def at(self, index: float) -> float:
+        return self.coefficient * index ** self.exponent
+
+
+@dataclasses.dataclass
+class Rolling:
+    end: np.ndarray  # Index from 1 of the last solve of each window
+    median: np.ndarray
+    p10: np.ndarray
+    p90: np.ndarray
+    std: np.ndarray  # NaN, where there are less than two times that are not DNFs
+
+
+class SessionAnalysis:
+    """
+    Behaves like RollingStatistics: the times of the session go in, and then they are changed with append(), replace()
+    and delete(). Appending a time is cheap; replacing or deleting one calculates everything again.
+
+    """
+
+    def __init__(self, times: Iterable[float], window: int = ROLLING_WINDOW):
+        self.window = window
+
+        times = np.fromiter(times, dtype=np.float64)
+        self._buffer = np.empty(max(len(times) * 2, _INITIAL_CAPACITY))
+        self._buffer[:len(times)] = times
+        self._count = len(times)
+
+        self._calculate()
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        Don't change it.
+
+        """
+        return self._buffer[:self._count]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, time: float):
+        if self._count == len(self._buffer):
+            self._buffer = np.concatenate((self._buffer, np.empty(len(self._buffer))))
+
+        self._buffer[self._count] = time
+        self._count += 1
+
+        self._spread = None
+        if math.isfinite(time):
+            self._add_finite(self._count, time)
+
+    def replace(self, index: int, time: float):
+        self._buffer[:self._count][index] = time
+        self._calculate()
+
+    def delete(self, index: int):
+        times = self.times
+        index = range(self._count)[index]  # Negative ones too
+
+        self._buffer[index:self._count - 1] = times[index + 1:].copy()
+        self._count -= 1
+        self._calculate()
+
+    @property
+    def spread(self) -> Spread:
+        """
+        Of the whole session.
+
+        """
+        if self._spread is None:
+            median, p10, p90 = _percentiles(self.times)
+            self._spread = Spread(median, self._std(), p10, p90)
+
+        return self._spread
+
+    @property
+    def current_spread(self) -> Spread:
+        """
+        Of the last window of solves.
+
+        """
+        if self._count < self.window:
+            return Spread(None, None, None, None)
+
+        times = self.times[-self.window:]
+        median, p10, p90 = _percentiles(times)
+        return Spread(median, _finite_std(times), p10, p90)
+
+    @property
+    def rolling(self) -> Rolling:
+        """
+        The spread of every window of solves, oldest first. Only the windows of the solves appended since the last
+        time are calculated.
+
+        """
+        if self._rolling is None:
+            self._rolling = _calculate_rolling(self.times, self.window)
+        elif len(self._rolling.end) < self._count - self.window + 1:
+            start = len(self._rolling.end)  # The first window that is not there
+            new = _calculate_rolling(self.times[start:], self.window, start)
+            self._rolling = Rolling(*(np.concatenate((getattr(self._rolling, field.name), getattr(new, field.name)))
+                                      for field in dataclasses.fields(Rolling)))
+
+        return self._rolling
+
+    def histogram(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the edges of the buckets, in seconds, and the number of times in each one. There is one edge more than
+        there are buckets.
+
+        """
+        used = np.flatnonzero(self._buckets)
+        if not len(used):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+
+        first, last = used[0], used[-1] + 1
+        return np.arange(first, last + 1) * BUCKET_WIDTH, self._buckets[first:last].copy()
+
+    @property
+    def trend(self) -> Optional[Trend]:
+        n, sum_x, sum_y, sum_xx, sum_xy = self._fit_sums
+        denominator = n * sum_xx - sum_x * sum_x
+        if n < 2 or denominator <= 0.0:
+            return None
+
+        exponent = (n * sum_xy - sum_x * sum_y) / denominator
+        return Trend(math.exp((sum_y - exponent * sum_x) / n), exponent)
+
+    def projection(self, solves_ahead: int) -> Optional[float]:
+        """
+        The time that the trend expects after this many more solves.
+
+        """
+        trend = self.trend
+        if trend is None:
+            return None
+
+        return trend.at(self._count + solves_ahead)
+
+    def _calculate(self):
+        times = self.times
+        finite = np.isfinite(times)
+        values = times[finite]
+
+        # The mean and sum of squared differences in two passes; _add_finite() then keeps them with Welford's update
+        self._finite_count = len(values)
+        self._mean = float(values.mean()) if len(values) else 0.0
+        self._squares = float(np.square(values - self._mean).sum()) if len(values) else 0.0
+
+        positive = finite & (times > 0.0)  # Their logarithms are fitted
+        x = np.log(np.flatnonzero(positive) + 1.0)  # Of the solve indices, from 1
+        y = np.log(times[positive])
+        self._fit_sums = [len(x), float(x.sum()), float(y.sum()), float(np.dot(x, x)), float(np.dot(x, y))]
+
+        self._buckets = np.bincount((values // BUCKET_WIDTH).astype(np.int64)) if len(values) \
+            else np.zeros(0, dtype=np.int64)
+
+        self._spread: Optional[Spread] = None
+        self._rolling: Optional[Rolling] = None
+
+    def _add_finite(self, index: int, time: float):
+        self._finite_count += 1
+        delta = time - self._mean
+        self._mean += delta / self._finite_count
+        self._squares += delta * (time - self._mean)
+
+        if time > 0.0:
+            x, y = math.log(index), math.log(time)
+            sums = self._fit_sums
+            sums[0] += 1
+            sums[1] += x
+            sums[2] += y
+            sums[3] += x * x
+            sums[4] += x * y
+
+        bucket = int(time // BUCKET_WIDTH)
+        if bucket >= len(self._buckets):
+            self._buckets = np.concatenate((self._buckets, np.zeros(bucket + 1 - len(self._buckets), dtype=np.int64)))
+        self._buckets[bucket] += 1
+
+    def _std(self) -> Optional[float]:
+        if self._finite_count < 2:
+            return None
+
+        return math.sqrt(self._squares / (self._finite_count - 1))
+
+
+def _percentiles(times: np.ndarray) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    # The median, p10 and p90 of one array
+    if not len(times):
+        return None, None, None
+
+    median, p10, p90 = (float(value[0]) for value in _window_percentiles(times.reshape(1, -1)))
+    return median, p10, p90
+
+
+def _window_percentiles(windows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The median, p10 and p90 of every row. The percentiles are by nearest rank, so they are always one of the times,
+    even when it's a DNF.
+
+    """
+    size = windows.shape[1]
+    low, high = (size - 1) // 2, size // 2
+    p10, p90 = _rank(size, 10), _rank(size, 90)
+
+    ordered = np.partition(windows, sorted({low, high, p10, p90}), axis=1)
+    median = ordered[:, low] if low == high else (ordered[:, low] + ordered[:, high]) / 2.0
+
+    return median, ordered[:, p10], ordered[:, p90]
+
+
+def _rank(size: int, percent: int) -> int:
+    return max(-(-size * percent // 100) - 1, 0)
+
+
+def _finite_std(times: np.ndarray) -> Optional[float]:
+    values = times[np.isfinite(times)]
+    if len(values) < 2:
+        return None
+
+    return float(values.std(ddof=1))
+
+
+def _calculate_rolling(times: np.ndarray, window: int, offset: int = 0) -> Rolling:
+    count = max(len(times) - window + 1, 0)
+    median, p10, p90 = np.empty(count), np.empty(count), np.empty(count)
+
+    # A view of all the windows, without copying; only a chunk of them is sorted at a time
+    windows = np.lib.stride_tricks.as_strided(times, shape=(count, window), strides=(times.strides[0],) * 2,
+                                              writeable=False)
+    for start in range(0, count, _CHUNK_SIZE):
+        chunk = slice(start, start + _CHUNK_SIZE)
+        median[chunk], p10[chunk], p90[chunk] = _window_percentiles(windows[chunk])
+
+    return Rolling(np.arange(window, len(times) + 1) + offset, median, p10, p90, _rolling_std(times, window))
+
+
+def _rolling_std(times: np.ndarray, window: int) -> np.ndarray:
+    # From cumulative sums of the times that are not DNFs, taken around their mean, so that little precision is lost
+    finite = np.isfinite(times)
+    shift = times[finite].mean() if finite.any() else 0.0
+    values = np.where(finite, times - shift, 0.0)
+
+    def window_sums(array: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate(([0.0], np.cumsum(array)))
+        return cumulative[window:] - cumulative[:-window]
+
+    n = window_sums(finite.astype(np.float64))
+    sums = window_sums(values)
+    squares = window_sums(values * values)
+
+    std = np.full(len(n), np.nan)
+    enough = n >= 2
+    variance = (squares[enough] - sums[enough] ** 2 / n[enough]) / (n[enough] - 1)
+    std[enough] = np.sqrt(np.maximum(variance, 0.0))
+
+    return std
+
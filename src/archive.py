@@ -0,0 +1,272 @@
+import os
+import json
+import lzma
+import struct
+import hashlib
+import logging
+import datetime
+import textwrap
+import threading
+import dataclasses
+from os.path import join, isfile
+from typing import List, Dict, Tuple, Set, BinaryIO, Iterator
+
+from src.atomic import open_atomic
+
+# An archive is a sequence of records, each with a header and an xz-compressed payload. Chunks hold solves and are
+# stored once, under the hash of their contents. Snapshots refer to the chunks that make up a session.
+# Records are only appended, so a crash can only leave an incomplete last record, which is ignored and overwritten.
+ARCHIVE_EXTENSION = ".pctbackup"
+SOLVES_PER_CHUNK = 256
+
+_MAGIC = b"PCTB"
+_HEADER = struct.Struct("<4sB32sI")  # Magic, kind, SHA-256 digest, payload length
+_CHUNK = 1
+_SNAPSHOT = 2
+
+# Pruning rewrites the archive, so it's done only when this many snapshots can be removed
+_PRUNE_BATCH = 10
+
+# Backups happen on a background thread, while restoring happens on the UI thread
+_lock = threading.Lock()
+
+
+@dataclasses.dataclass
+class RetentionPolicy:
+    keep_last: int  # The most recent snapshots
+    keep_daily: int  # The last snapshot of each of the most recent days
+    keep_monthly: int  # The last snapshot of each of the most recent months
+
+
+@dataclasses.dataclass
+class Snapshot:
+    snapshot_id: str
+    created: datetime.datetime
+    header: dict  # Everything in the session file, except the solves
+    solve_count: int
+    chunks: List[str]  # Hex digests
+
+    @property
+    def name(self) -> str:
+        return self.header.get("name", "")
+
+
+@dataclasses.dataclass
+class _Index:
+    chunks: Dict[bytes, Tuple[int, int]]  # Digest to payload offset and length
+    snapshots: List[Tuple[Snapshot, int, int]]  # Snapshot, record offset and record length; oldest first
+    end: int  # Where the valid records end
+
+
+def archive_path(folder_path: str, file_name: str) -> str:
+    """
+    file_name is the name of the session file.
+
+    """
+    return join(folder_path, file_name.rsplit(".", 1)[0] + ARCHIVE_EXTENSION)
+
+
+def add_snapshot(path: str, contents: dict, policy: RetentionPolicy) -> int:
+    """
+    Add a snapshot of the contents of a session file to the archive at path, which is created, if it doesn't exist.
+    Return the number of bytes written.
+
+    """
+    with _lock:
+        if isfile(path):
+            index = _read_index(path)
+        else:
+            index = _Index({}, [], 0)
+
+        solves = contents["solves"]
+        header = {key: value for key, value in contents.items() if key != "solves"}
+
+        written = 0
+        chunk_digests: List[str] = []
+
+        with open(path, "r+b" if isfile(path) else "wb") as file:
+            file.seek(index.end)
+
+            for i in range(0, len(solves), SOLVES_PER_CHUNK):
+                data = json.dumps(solves[i:i + SOLVES_PER_CHUNK], separators=(",", ":")).encode()
+                digest = hashlib.sha256(data).digest()
+                chunk_digests.append(digest.hex())
+
+                if digest not in index.chunks:
+                    written += _write_record(file, _CHUNK, digest, data)
+                    index.chunks[digest] = (0, 0)  # Only its presence matters from now on
+
+            created = datetime.datetime.now()
+            manifest = {
+                "id": created.strftime("%Y-%m-%dT%H-%M-%S-%f"),
+                "created": str(created),
+                "header": header,
+                "solves": len(solves),
+                "chunks": chunk_digests
+            }
+            data = json.dumps(manifest, separators=(",", ":")).encode()
+            written += _write_record(file, _SNAPSHOT, hashlib.sha256(data).digest(), data)
+
+            file.truncate()
+            file.flush()
+            os.fsync(file.fileno())
+
+        index = _read_index(path)
+        if len(index.snapshots) - len(_kept_snapshots([snapshot for snapshot, _, _ in index.snapshots], policy)) \
+                >= _PRUNE_BATCH:
+            _prune(path, index, policy)
+
+        return written
+
+
+def list_snapshots(path: str) -> List[Snapshot]:
+    """
+    Oldest first.
+
+    """
+    with _lock:
+        return [snapshot for snapshot, _, _ in _read_index(path).snapshots]
+
+
+def restore_snapshot(path: str, snapshot_id: str, destination: str, name: str):
+    """
+    Write the session of a snapshot to destination with a new name, a chunk at a time.
+    Raises KeyError, if there is no such snapshot.
+
+    """
+    with _lock:
+        index = _read_index(path)
+
+        for snapshot, _, _ in index.snapshots:
+            if snapshot.snapshot_id == snapshot_id:
+                break
+        else:
+            raise KeyError(snapshot_id)
+
+        header = dict(snapshot.header)
+        header["name"] = name
+
+        # Synced, and the session it replaces, if any, is kept as the previous version, like with every session write
+        with open(path, "rb") as archive, open_atomic(destination) as file:
+            file.write("{\n")
+            for key, value in header.items():
+                file.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+            file.write('  "solves": [')
+
+            first = True
+            for solve in _iterate_solves(archive, index, snapshot):
+                # The same layout as json.dump(contents, file, indent=2)
+                file.write(("\n" if first else ",\n") + textwrap.indent(json.dumps(solve, indent=2), "    "))
+                first = False
+
+            file.write("]\n}" if first else "\n  ]\n}")
+
+
+def _iterate_solves(archive: BinaryIO, index: _Index, snapshot: Snapshot) -> Iterator[dict]:
+    for digest in snapshot.chunks:
+        try:
+            offset, length = index.chunks[bytes.fromhex(digest)]
+        except KeyError:
+            logging.error(f"Chunk {digest} is missing from the archive")
+            raise
+
+        archive.seek(offset)
+        yield from json.loads(lzma.decompress(archive.read(length)))
+
+
+def _write_record(file: BinaryIO, kind: int, digest: bytes, data: bytes) -> int:
+    payload = lzma.compress(data)
+    file.write(_HEADER.pack(_MAGIC, kind, digest, len(payload)))
+    file.write(payload)
+    return _HEADER.size + len(payload)
+
+
+def _read_index(path: str) -> _Index:
+    index = _Index({}, [], 0)
+
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+
+        while True:
+            offset = file.tell()
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                break
+
+            magic, kind, digest, length = _HEADER.unpack(header)
+            if magic != _MAGIC or offset + _HEADER.size + length > size:
+                logging.error(f"Archive {path} has an incomplete record at {offset}; ignoring the rest")
+                break
+
+            if kind == _CHUNK:
+                index.chunks[digest] = (offset + _HEADER.size, length)
+                file.seek(length, os.SEEK_CUR)
+            elif kind == _SNAPSHOT:
+                try:
+                    manifest = json.loads(lzma.decompress(file.read(length)))
+                except (lzma.LZMAError, json.decoder.JSONDecodeError):
+                    logging.error(f"Archive {path} has a corrupted snapshot at {offset}; ignoring the rest")
+                    break
+
+                snapshot = Snapshot(manifest["id"], datetime.datetime.fromisoformat(manifest["created"]),
+                                    manifest["header"], manifest["solves"], manifest["chunks"])
+                index.snapshots.append((snapshot, offset, _HEADER.size + length))
+            else:
+                file.seek(length, os.SEEK_CUR)
+
+            index.end = file.tell()
+
+    return index
+
+
+def _kept_snapshots(snapshots: List[Snapshot], policy: RetentionPolicy) -> Set[str]:
+    kept: Set[str] = set()
+
+    if policy.keep_last > 0:
+        kept.update(snapshot.snapshot_id for snapshot in snapshots[-policy.keep_last:])
+
+    days: Set[datetime.date] = set()
+    months: Set[Tuple[int, int]] = set()
+
+    for snapshot in reversed(snapshots):
+        day = snapshot.created.date()
+        if day not in days and len(days) < policy.keep_daily:
+            days.add(day)
+            kept.add(snapshot.snapshot_id)
+
+        month = (day.year, day.month)
+        if month not in months and len(months) < policy.keep_monthly:
+            months.add(month)
+            kept.add(snapshot.snapshot_id)
+
+    return kept
+
+
+def _prune(path: str, index: _Index, policy: RetentionPolicy):
+    """
+    Rewrite the archive with only the kept snapshots and the chunks they use. The compressed payloads are copied as
+    they are.
+
+    """
+    kept_ids = _kept_snapshots([snapshot for snapshot, _, _ in index.snapshots], policy)
+    kept = [(snapshot, offset, length) for snapshot, offset, length in index.snapshots if snapshot.snapshot_id in kept_ids]
+    used_chunks = {bytes.fromhex(digest) for snapshot, _, _ in kept for digest in snapshot.chunks}
+
+    temporary = path + ".tmp"
+
+    with open(path, "rb") as source, open(temporary, "wb") as destination:
+        for digest in sorted(used_chunks):
+            offset, length = index.chunks[digest]
+            source.seek(offset)
+            destination.write(_HEADER.pack(_MAGIC, _CHUNK, digest, length))
+            destination.write(source.read(length))
+
+        for _, offset, length in kept:
+            source.seek(offset)
+            destination.write(source.read(length))
+
+        destination.flush()
+        os.fsync(destination.fileno())
+
+    os.replace(temporary, path)
+    logging.info(f"Pruned {len(index.snapshots) - len(kept)} snapshots from {path}")
@@ -0,0 +1,223 @@
+import os
+import json
+import glob
+import shutil
+import logging
+import threading
+import contextlib
+from os.path import join, isfile, dirname
+from typing import IO, Dict, List, Iterator, Callable
+
+# A file is never rewritten in place. The new contents go to path + TEMPORARY_SUFFIX, which is synced to disk and
+# then renamed over the old file. The previous version is kept at path + BACKUP_SUFFIX, for recovery.
+TEMPORARY_SUFFIX = ".tmp"
+BACKUP_SUFFIX = ".bak"
+
+_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Files waiting to be written at the end of group_commit() and what to call after, per thread
+_groups = threading.local()
+
+
+def read_json(path: str) -> dict:
+    """
+    Read a JSON file, seeing also the writes that are still pending in a group commit.
+    Raises FileNotFoundError and json.decoder.JSONDecodeError.
+
+    """
+    pending = _pending()
+    if pending is not None and path in pending:
+        return json.loads(json.dumps(pending[path]))  # A copy, so that the pending contents don't change
+
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def write_json(path: str, contents: dict):
+    """
+    Replace the file with contents atomically. Inside group_commit(), the write is delayed until the group ends.
+
+    """
+    pending = _pending()
+    if pending is not None:
+        pending[path] = contents
+        return
+
+    _write_files({path: contents})
+
+
+@contextlib.contextmanager
+def group_commit() -> Iterator[None]:
+    """
+    Collect the writes done inside and do them at the end, so that a burst of writes to the same file is written
+    only once and all the files are synced together. Groups can be nested; the outermost one writes.
+
+    """
+    if _pending() is not None:
+        yield
+        return
+
+    _groups.pending = {}
+    _groups.callbacks = []
+    try:
+        yield
+        pending = _groups.pending
+        callbacks = _groups.callbacks
+    finally:
+        _groups.pending = None
+        _groups.callbacks = None
+
+    _write_files(pending)
+
+    for callback in callbacks:
+        callback()
+
+
+def after_commit(callback: Callable[[], object]):
+    """
+    Call callback once the files written until now are in place: right away, or at the end of the group commit. A
+    callback given again in the same group is called once, in its last place. If the files of the group can't be
+    written, its callbacks are not called.
+
+    """
+    callbacks = getattr(_groups, "callbacks", None)
+    if callbacks is None:
+        callback()
+        return
+
+    if callback in callbacks:
+        callbacks.remove(callback)
+    callbacks.append(callback)
+
+
+@contextlib.contextmanager
+def open_atomic(path: str, binary: bool = False) -> Iterator[IO]:
+    """
+    Open a file for writing it whole, a piece at a time, for when the contents are too big for write_json(). The file
+    replaces the one at path only if the block ends without an exception.
+
+    """
+    temporary = path + TEMPORARY_SUFFIX
+
+    with open(temporary, "wb" if binary else "w", buffering=_WRITE_BUFFER_SIZE) as file:
+        try:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        except BaseException:
+            file.close()
+            os.remove(temporary)
+            raise
+
+    if isfile(path):
+        _keep_previous_version(path)
+    os.replace(temporary, path)
+    _sync_folder(dirname(path))
+
+
+def remove_with_backup(path: str):
+    """
+    Remove a file and the previous version kept for it. Raises FileNotFoundError, if the file doesn't exist.
+
+    """
+    os.remove(path)
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path + BACKUP_SUFFIX)
+
+
+def recover_files(folders: List[str]) -> List[str]:
+    """
+    Run at startup. Remove leftovers of interrupted writes and restore missing or corrupted JSON files from their
+    previous version. Return the paths of the restored files.
+
+    """
+    recovered = []
+
+    for folder in folders:
+        for temporary in glob.glob(join(folder, "*.json" + TEMPORARY_SUFFIX)):
+            logging.info(f"Removing leftover {temporary}")
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+
+        for backup in glob.glob(join(folder, "*.json" + BACKUP_SUFFIX)):
+            path = backup[:-len(BACKUP_SUFFIX)]
+
+            if isfile(path) and _is_valid_json(path):
+                continue
+
+            if not _is_valid_json(backup):
+                logging.error(f"Could not recover {path}, because its previous version is also corrupted")
+                continue
+
+            try:
+                shutil.copyfile(backup, path + TEMPORARY_SUFFIX)
+                _sync_file(path + TEMPORARY_SUFFIX)
+                os.replace(path + TEMPORARY_SUFFIX, path)
+            except OSError:
+                logging.error(f"Could not recover {path}")
+                continue
+
+            logging.info(f"Recovered {path} from its previous version")
+            recovered.append(path)
+
+    return recovered
+
+
+def _pending():
+    return getattr(_groups, "pending", None)
+
+
+def _write_files(files: Dict[str, dict]):
+    for path, contents in files.items():
+        with open(path + TEMPORARY_SUFFIX, "w") as file:
+            json.dump(contents, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+
+    for path in files:
+        if isfile(path):
+            _keep_previous_version(path)
+        os.replace(path + TEMPORARY_SUFFIX, path)
+
+    for folder in {dirname(path) for path in files}:
+        _sync_folder(folder)
+
+
+def _keep_previous_version(path: str):
+    backup = path + BACKUP_SUFFIX
+
+    try:
+        # A hard link is free; the old contents stay with it after the replace
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(backup)
+        os.link(path, backup)
+    except OSError:  # The file system might not support hard links
+        shutil.copyfile(path, backup)
+
+
+def _is_valid_json(path: str) -> bool:
+    try:
+        with open(path, "r") as file:
+            json.load(file)
+    except (OSError, json.decoder.JSONDecodeError):
+        return False
+    else:
+        return True
+
+
+def _sync_file(path: str):
+    with open(path, "rb") as file:
+        os.fsync(file.fileno())
+
+
+def _sync_folder(folder: str):
+    # Makes the renames durable; folders can't be opened like this on Windows
+    if os.name != "posix":
+        return
+
+    descriptor = os.open(folder or ".", os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
@@ -0,0 +1,129 @@
+import json
+import time
+import queue
+import logging
+import threading
+import dataclasses
+from os.path import join, isdir, samefile
+from typing import Dict, Tuple, Optional, Iterator
+
+from src.session import SameFileError, SESSIONS_PATH, with_scramble
+from src.archive import RetentionPolicy, add_snapshot, archive_path
+from src.instrument import span
+
+
+@dataclasses.dataclass
+class BackupResult:
+    file_name: str
+    folder_path: str
+    error: Optional[Exception]  # None on success
+    bytes_written: int = 0
+
+
+class BackupWorker:
+    """
+    Backs up sessions on a background thread into their archives, so that slow backup folders don't block the UI.
+    Requests for the same file and folder that come in while the worker is busy collapse into one backup.
+    The results are collected with results(), from the UI thread.
+
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, str], RetentionPolicy] = {}  # Insertion ordered
+        self._condition = threading.Condition()
+        self._results: queue.Queue = queue.Queue()
+        self._stopping = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, file_name: str, folder_path: str, policy: RetentionPolicy):
+        with self._condition:
+            self._pending[(file_name, folder_path)] = policy
+            self._condition.notify()
+
+    def results(self) -> Iterator[BackupResult]:
+        while True:
+            try:
+                yield self._results.get_nowait()
+            except queue.Empty:
+                return
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Finish the pending backups and stop the thread.
+
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+
+                if not self._pending:  # Stopping
+                    return
+
+                key = next(iter(self._pending))
+                policy = self._pending.pop(key)
+
+            file_name, folder_path = key
+
+            try:
+                with span("backup"):
+                    bytes_written = self._backup(file_name, folder_path, policy)
+            except Exception as err:  # Everything is reported to the UI
+                self._results.put(BackupResult(file_name, folder_path, err))
+            else:
+                self._results.put(BackupResult(file_name, folder_path, None, bytes_written))
+
+    def _backup(self, file_name: str, folder_path: str, policy: RetentionPolicy) -> int:
+        source = join(SESSIONS_PATH, file_name)
+
+        if not isdir(folder_path):
+            logging.error(f"Backup folder {folder_path} doesn't exist")
+            raise FileNotFoundError(folder_path)
+
+        if samefile(folder_path, SESSIONS_PATH):
+            logging.error("Cannot backup in the sessions folder")
+            raise SameFileError(f"{source} and {folder_path} are in the same folder")
+
+        contents = _read_complete_file(source)
+        contents["solves"] = [with_scramble(solve) for solve in contents["solves"]]  # The archive stands on its own
+        path = archive_path(folder_path, file_name)
+
+        try:
+            bytes_written = add_snapshot(path, contents, policy)
+        except OSError:
+            logging.error(f'Could not backup file "{source}" to "{path}"')
+            raise
+
+        logging.debug(f"Wrote {bytes_written} bytes to {path}")
+        return bytes_written
+
+
+def _read_complete_file(source: str) -> dict:
+    """
+    The session file might be rewritten while it's read, so read it until it's valid JSON.
+
+    """
+    for _ in range(5):
+        try:
+            with open(source, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            logging.error(f"Could not find file {source}")
+            raise
+
+        try:
+            return json.loads(data)
+        except json.decoder.JSONDecodeError:
+            time.sleep(0.2)
+
+    logging.error(f"{source} is corrupted")
+    raise json.decoder.JSONDecodeError("Could not read a complete session file", "", 0)
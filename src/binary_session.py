@@ -0,0 +1,252 @@
+import json
+import mmap
+import struct
+import shutil
+import tempfile
+from collections.abc import Sequence
+from typing import Iterable, Optional
+
+import numpy as np
+
+from src.atomic import open_atomic
+from src.session import Solve, date_to_number, number_to_date, ODD_DATE
+from src.stats import NO_PENALTY, PENALTIES, PLUS_TWO, DNF
+from src.timer import interpret_time_in_seconds, format_time_seconds
+
+# A compact format for archives of very many solves, which is read by mapping the file into memory instead of parsing
+# it. It's all little-endian:
+#   header      magic, version, record size, metadata size, solve count, records offset, heap offset, heap size
+#   metadata    JSON of the name and the scramble type
+#   records     one fixed record per solve, aligned to 8 bytes
+#   heap        the strings of the records, each one after its length as a 32-bit integer
+# A record has the date as microseconds since the epoch (or the heap offset of the date, when it's not one written by
+# this program), the seed, the heap offset of the scramble, the time in centiseconds and the flags.
+BINARY_EXTENSION = ".pctb"
+
+MAGIC = b"PCTBSESS"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQQQQ")
+RECORD = np.dtype([("date", "<i8"), ("seed", "<u8"), ("scramble", "<u8"), ("time", "<i4"), ("flags", "u1"),
+                   ("padding", "V3")])
+
+# Flags
+PENALTY_MASK = 0b11  # Index into PENALTIES
+HAS_SEED = 1 << 2
+ODD_DATE_FLAG = 1 << 3  # The date is in the heap
+INFINITE_TIME = 1 << 4  # Older files could have DNFs like this
+
+_LENGTH = struct.Struct("<I")
+_BATCH_SIZE = 4096  # Records written at once
+
+
+class InvalidBinaryFileError(ValueError):
+    pass
+
+
+class BinarySession(Sequence):
+    """
+    A binary session file, mapped into memory. Opening it reads only the header, however big it is; the columns are
+    NumPy arrays over the mapping, so the statistics can be calculated on them right away, and a Solve is made only
+    when it's accessed. Drop the arrays taken from it before closing it.
+    Raises InvalidBinaryFileError and OSError.
+
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            try:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty
+                raise InvalidBinaryFileError(f"{path} is empty")
+
+        try:
+            self._read_header(path)
+        except InvalidBinaryFileError:
+            self._map.close()
+            raise
+
+    def _read_header(self, path: str):
+        if len(self._map) < HEADER.size:
+            raise InvalidBinaryFileError(f"{path} is too short")
+
+        magic, version, record_size, metadata_size, count, records_offset, heap_offset, heap_size = \
+            HEADER.unpack_from(self._map)
+
+        if magic != MAGIC:
+            raise InvalidBinaryFileError(f"{path} is not a binary session file")
+        if version != VERSION or record_size != RECORD.itemsize:
+            raise InvalidBinaryFileError(f"{path} is of an unknown version {version}")
+        if (HEADER.size + metadata_size > records_offset or records_offset + count * record_size > heap_offset
+                or heap_offset + heap_size > len(self._map)):
+            raise InvalidBinaryFileError(f"{path} is truncated or corrupted")
+
+        try:
+            metadata = json.loads(self._map[HEADER.size:HEADER.size + metadata_size])
+            self.name: str = metadata["name"]
+            self.scramble_type: str = metadata["scramble_type"]
+        except (ValueError, KeyError, TypeError) as err:
+            raise InvalidBinaryFileError(f"{path} has invalid metadata: {err}")
+
+        self.records: Optional[np.ndarray] = np.frombuffer(self._map, dtype=RECORD, count=count,
+                                                           offset=records_offset)
+        self._heap_offset = heap_offset
+        self._heap_size = heap_size
+
+    def close(self):
+        self.records = None
+        self._map.close()
+
+    def __enter__(self) -> "BinarySession":
+        return self
+
+    def __exit__(self, *_exception):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        record = self.records[index]  # Raises IndexError
+        flags = int(record["flags"])
+        if flags & PENALTY_MASK >= len(PENALTIES):
+            raise InvalidBinaryFileError(f"Solve {index} has an unknown penalty")
+
+        time = "inf" if flags & INFINITE_TIME else format_time_seconds(int(record["time"]) / 100)
+        date = self._string(int(record["date"])) if flags & ODD_DATE_FLAG else number_to_date(int(record["date"]))
+        seed = int(record["seed"]) if flags & HAS_SEED else None
+
+        return Solve(time, self._string(int(record["scramble"])), date, interpret_time_in_seconds(time), seed,
+                     PENALTIES[flags & PENALTY_MASK])
+
+    @property
+    def raw_times(self) -> np.ndarray:
+        """
+        All the times in seconds.
+
+        """
+        times = self.records["time"] / 100.0
+        times[(self.records["flags"] & INFINITE_TIME) != 0] = np.inf
+        return times
+
+    @property
+    def results(self) -> np.ndarray:
+        """
+        All the times in seconds with their penalties, a DNF being infinite, like SolveColumns.results.
+
+        """
+        penalties = self.penalties
+        times = self.raw_times
+        times[penalties == PENALTIES.index(PLUS_TWO)] += 2.0
+        times[penalties == PENALTIES.index(DNF)] = np.inf
+        return times
+
+    @property
+    def penalties(self) -> np.ndarray:
+        """
+        Indices into PENALTIES.
+
+        """
+        return self.records["flags"] & PENALTY_MASK
+
+    @property
+    def dates(self) -> np.ndarray:
+        """
+        As datetime64 in microseconds; not a time, where the date is not one written by this program.
+
+        """
+        dates = self.records["date"].astype("datetime64[us]")
+        dates[(self.records["flags"] & ODD_DATE_FLAG) != 0] = np.datetime64("NaT")
+        return dates
+
+    def _string(self, offset: int) -> str:
+        start = self._heap_offset + offset
+        if offset + _LENGTH.size > self._heap_size:
+            raise InvalidBinaryFileError("A string is out of the heap")
+
+        length, = _LENGTH.unpack_from(self._map, start)
+        if offset + _LENGTH.size + length > self._heap_size:
+            raise InvalidBinaryFileError("A string is out of the heap")
+
+        return self._map[start + _LENGTH.size:start + _LENGTH.size + length].decode("utf-8")
+
+
+def write_binary_session(path: str, name: str, scramble_type: str, solves: Iterable[dict]) -> int:
+    """
+    Write solves, as they are in the JSON session files, into a binary session file, a batch at a time. Return how
+    many were written.
+    Raises OSError, KeyError and ValueError for invalid solves.
+
+    """
+    metadata = json.dumps({"name": name, "scramble_type": scramble_type}).encode("utf-8")
+    records_offset = _align(HEADER.size + len(metadata))
+
+    count = 0
+    heap_size = 0
+
+    # The strings are gathered apart, as the heap comes after all the records
+    with open_atomic(path, binary=True) as file, tempfile.TemporaryFile() as heap:
+        file.write(b"\0" * records_offset)  # Written at the end
+
+        batch = np.zeros(_BATCH_SIZE, dtype=RECORD)
+        strings = bytearray()
+        size = 0
+
+        for solve in solves:
+            raw_time = interpret_time_in_seconds(solve["time"])
+            flags = PENALTIES.index(solve.get("penalty", NO_PENALTY))
+
+            if raw_time == float("inf"):
+                flags |= INFINITE_TIME
+                time = 0
+            else:
+                time = round(raw_time * 100)
+
+            date = date_to_number(solve["date"])
+            if date == ODD_DATE:
+                flags |= ODD_DATE_FLAG
+                date = heap_size + len(strings)
+                strings += _encode_string(solve["date"])
+
+            seed = solve.get("seed")
+            if seed is not None:
+                flags |= HAS_SEED
+
+            batch[size] = (date, seed or 0, heap_size + len(strings), time, flags, b"")
+            strings += _encode_string(solve["scramble"])
+            size += 1
+
+            if size == _BATCH_SIZE:
+                file.write(batch.tobytes())
+                heap.write(strings)
+                count += size
+                heap_size += len(strings)
+                strings.clear()
+                size = 0
+
+        file.write(batch[:size].tobytes())
+        heap.write(strings)
+        count += size
+        heap_size += len(strings)
+
+        heap.seek(0)
+        shutil.copyfileobj(heap, file)
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, len(metadata), count, records_offset,
+                               records_offset + count * RECORD.itemsize, heap_size))
+        file.write(metadata)
+
+    return count
+
+
+def _encode_string(string: str) -> bytes:
+    encoded = string.encode("utf-8")
+    return _LENGTH.pack(len(encoded)) + encoded
+
+
+def _align(offset: int) -> int:
+    return -(-offset // 8) * 8
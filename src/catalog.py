@@ -0,0 +1,247 @@
+import os
+import json
+import math
+import logging
+import threading
+import dataclasses
+from os.path import join
+from typing import List, Dict, Optional, Tuple
+
+from src.atomic import read_json, write_json, after_commit
+from src.data import SESSIONS_PATH
+from src.timer import interpret_time_in_seconds
+from src.stats import calculate_ao5, calculate_ao12, all_ao5, all_ao12, session_mean, apply_penalty, NO_PENALTY
+
+# A summary of every session, so that they can be listed without opening their files. It's updated with every
+# change made to a session and checked against the modification time and size of the files, when it's read.
+CATALOG_PATH = join("data", "catalog.json")
+_VERSION = 2
+
+_lock = threading.Lock()
+_entries: Optional[Dict[str, "CatalogEntry"]] = None  # Read once; keyed by session name
+_broken: Dict[str, Tuple[float, int]] = {}  # Files that can't be read, so that they are not read again
+_UNKNOWN_STAT = (0.0, 0)  # Of an entry whose file is not written yet; it matches no file
+
+
+@dataclasses.dataclass
+class CatalogEntry:
+    name: str
+    scramble_type: str
+    solve_count: int
+    best_single: Optional[float]  # In seconds; None if there are not enough solves
+    best_ao5: Optional[float]
+    best_ao12: Optional[float]
+    mean: Optional[float]  # Without the DNFs
+    dnf_count: int
+    modified: float  # Modification time of the file
+    size: int  # Size of the file
+    last_times: List[float]  # The last twelve times with penalties, for updating the averages when a solve is added
+
+
+def get_catalog() -> List[CatalogEntry]:
+    """
+    Return an entry for every readable session, bringing the catalog up to date first. Only the session files that
+    changed outside of this program are read.
+
+    """
+    with _lock:
+        entries = _load()
+        changed = False
+
+        seen = set()
+        with os.scandir(SESSIONS_PATH) as iterator:
+            for item in iterator:
+                if not item.name.endswith(".json") or not item.is_file():
+                    continue
+
+                name = item.name[:-len(".json")]
+                seen.add(name)
+                stat = item.stat()
+
+                entry = entries.get(name)
+                if entry is not None and entry.modified == stat.st_mtime and entry.size == stat.st_size:
+                    continue
+                if _broken.get(name) == (stat.st_mtime, stat.st_size):
+                    continue
+
+                logging.debug(f'Session "{name}" changed; reading it for the catalog')
+                try:
+                    entries[name] = _summarize(name, read_json(item.path), stat.st_mtime, stat.st_size)
+                except (json.decoder.JSONDecodeError, KeyError, ValueError, TypeError):
+                    logging.error(f"{item.path} is corrupted; it's left out of the catalog")
+                    _broken[name] = (stat.st_mtime, stat.st_size)
+                    entries.pop(name, None)
+                changed = True
+
+        for name in list(entries):
+            if name not in seen:
+                del entries[name]
+                changed = True
+
+        if changed:
+            _save(entries)
+
+        return [dataclasses.replace(entry) for entry in entries.values()]
+
+
+def get_entry(name: str) -> Optional[CatalogEntry]:
+    """
+    Return the entry of one session, if it's up to date with its file.
+
+    """
+    with _lock:
+        entry = _load().get(name)
+        stat = _file_stat(name)
+        if entry is None or stat == _UNKNOWN_STAT or (entry.modified, entry.size) != stat:
+            return None
+
+        return dataclasses.replace(entry)
+
+
+def update_session(name: str, contents: dict):
+    """
+    Summarize the session again from its contents, which were just written.
+
+    """
+    with _lock:
+        entries = _load()
+        entries[name] = _summarize(name, contents, *_UNKNOWN_STAT)
+
+    _stat_after_commit(name)
+
+
+def add_solve(name: str, contents: dict):
+    """
+    Update the entry of a session with its last solve, which was just added. Only the last twelve times are looked at.
+
+    """
+    with _lock:
+        entries = _load()
+        entry = entries.get(name)
+
+        if entry is None or entry.solve_count + 1 != len(contents["solves"]):  # Not in step; do it all again
+            entries[name] = _summarize(name, contents, *_UNKNOWN_STAT)
+        else:
+            time = _result(contents["solves"][-1])
+
+            if math.isinf(time):
+                entry.dnf_count += 1
+            else:
+                finite_count = entry.solve_count - entry.dnf_count
+                entry.mean = (entry.mean * finite_count + time) / (finite_count + 1) if finite_count else time
+            entry.solve_count += 1
+            entry.best_single = time if entry.best_single is None else min(entry.best_single, time)
+            entry.last_times = (entry.last_times + [time])[-12:]
+
+            if len(entry.last_times) >= 5:
+                ao5 = calculate_ao5(entry.last_times[-5:])
+                entry.best_ao5 = ao5 if entry.best_ao5 is None else min(entry.best_ao5, ao5)
+            if len(entry.last_times) >= 12:
+                ao12 = calculate_ao12(entry.last_times)
+                entry.best_ao12 = ao12 if entry.best_ao12 is None else min(entry.best_ao12, ao12)
+
+            entry.modified, entry.size = _UNKNOWN_STAT
+
+    _stat_after_commit(name)
+
+
+def rename_session(source_name: str, destination_name: str, contents: dict):
+    with _lock:
+        entries = _load()
+        entries.pop(source_name, None)
+        entries[destination_name] = _summarize(destination_name, contents, *_UNKNOWN_STAT)
+
+    _stat_after_commit(destination_name)
+
+
+def remove_session(name: str):
+    with _lock:
+        entries = _load()
+        if entries.pop(name, None) is not None:
+            _save(entries)
+
+
+def _summarize(name: str, contents: dict, modified: float, size: int) -> CatalogEntry:
+    times = [_result(solve) for solve in contents["solves"]]
+
+    return CatalogEntry(
+        name=name,
+        scramble_type=contents["scramble_type"],
+        solve_count=len(times),
+        best_single=min(times) if times else None,
+        best_ao5=min(all_ao5(times), default=None),
+        best_ao12=min(all_ao12(times), default=None),
+        mean=session_mean(times),
+        dnf_count=sum(1 for time in times if math.isinf(time)),
+        modified=modified,
+        size=size,
+        last_times=times[-12:]
+    )
+
+
+def _result(solve: dict) -> float:
+    return apply_penalty(interpret_time_in_seconds(solve["time"]), solve.get("penalty", NO_PENALTY))
+
+
+def _stat_after_commit(name: str):
+    # Inside a group commit, the file is replaced only at its end; if that fails, the entry matches no file and the
+    # session is read again by get_catalog()
+    after_commit(lambda: _set_stat(name))
+    after_commit(_save_entries)
+
+
+def _set_stat(name: str):
+    with _lock:
+        entry = _load().get(name)
+        if entry is not None:
+            entry.modified, entry.size = _file_stat(name)
+
+
+def _save_entries():
+    with _lock:
+        _save(_load())
+
+
+def _file_stat(name: str) -> Tuple[float, int]:
+    try:
+        stat = os.stat(join(SESSIONS_PATH, name + ".json"))
+    except FileNotFoundError:  # Removed meanwhile
+        return _UNKNOWN_STAT
+
+    return stat.st_mtime, stat.st_size
+
+
+def _load() -> Dict[str, CatalogEntry]:
+    global _entries
+
+    if _entries is not None:
+        return _entries
+
+    _entries = {}
+
+    try:
+        contents = read_json(CATALOG_PATH)
+        if contents["version"] != _VERSION:
+            raise KeyError("version")
+
+        for entry in contents["sessions"]:
+            _entries[entry["name"]] = CatalogEntry(**entry)
+    except FileNotFoundError:
+        logging.info("There is no catalog yet")
+    except (json.decoder.JSONDecodeError, KeyError, TypeError):
+        logging.error("The catalog is corrupted; it will be made again")
+        _entries = {}
+
+    return _entries
+
+
+def _save(entries: Dict[str, CatalogEntry]):
+    contents = {
+        "version": _VERSION,
+        "sessions": [dataclasses.asdict(entry) for entry in entries.values()]
+    }
+
+    try:
+        write_json(CATALOG_PATH, contents)
+    except OSError as err:  # The catalog can always be made again from the sessions
+        logging.error(f"Could not write the catalog: {err}")
@@ -0,0 +1,205 @@
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+from typing import List, Optional, TextIO
+
+from src.scramble import PUZZLE_TYPES, DEFAULT_SCRAMBLE_TYPE
+from src.scramble_batch import generate_scrambles
+from src.seed import new_seed
+from src.aggregate import Aggregate, aggregate_sessions
+from src.timer import format_time_seconds
+from src.stats import format_statistic
+from src.transfer import import_cstimer, import_csv, import_binary, export_cstimer, export_csv, export_binary, \
+    InvalidFileError, MixedScrambleTypesError
+from src.binary_session import BINARY_EXTENSION
+from src.competition import DEFAULT_PORT, serve
+
+
+def main(arguments: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="Py-Cube-Timer-CLI", description="Py-Cube-Timer tools that don't need a window")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scramble_parser = subparsers.add_parser("scramble", help="generate a set of scrambles")
+    scramble_parser.add_argument("-t", "--type", default=DEFAULT_SCRAMBLE_TYPE, choices=list(PUZZLE_TYPES),
+                                 help="scramble type")
+    scramble_parser.add_argument("-n", "--count", type=int, default=5, help="number of scrambles")
+    scramble_parser.add_argument("-s", "--seed", type=int, help="seed, for getting the same scrambles again")
+    scramble_parser.add_argument("-p", "--processes", type=int, default=1, help="number of processes to use")
+    scramble_parser.add_argument("-f", "--format", default="text", choices=["text", "json"], help="output format")
+    scramble_parser.add_argument("-o", "--output", help="output file; the default is the standard output")
+    scramble_parser.set_defaults(function=_scramble)
+
+    stats_parser = subparsers.add_parser("stats", help="show the statistics of all the sessions, per scramble type")
+    stats_parser.add_argument("-t", "--type", help="only this scramble type")
+    stats_parser.add_argument("-p", "--processes", type=int, help="number of processes to use; the default is all")
+    stats_parser.add_argument("-f", "--format", default="text", choices=["text", "json"], help="output format")
+    stats_parser.set_defaults(function=_stats)
+
+    import_parser = subparsers.add_parser("import", help="import sessions from a csTimer export, a CSV file "
+                                                         "or a binary session file")
+    import_parser.add_argument("file", help="csTimer export, CSV file with time, scramble and date columns, "
+                                            f"or binary session file ({BINARY_EXTENSION})")
+    import_parser.add_argument("-f", "--format", choices=["cstimer", "csv", "binary"],
+                               help="file format; the default is guessed from the extension")
+    import_parser.add_argument("-n", "--name", help="session name, for CSV files; the default is the file name")
+    import_parser.add_argument("-t", "--type", default=DEFAULT_SCRAMBLE_TYPE, choices=list(PUZZLE_TYPES),
+                               help="scramble type, for CSV files")
+    import_parser.set_defaults(function=_import)
+
+    export_parser = subparsers.add_parser("export", help="export sessions to a csTimer export, a CSV file "
+                                                         "or a binary session file")
+    export_parser.add_argument("file", help="destination file")
+    export_parser.add_argument("sessions", nargs="+", help="session names; CSV files take only one and binary session "
+                                                           "files join them")
+    export_parser.add_argument("-f", "--format", choices=["cstimer", "csv", "binary"],
+                               help="file format; the default is guessed from the extension")
+    export_parser.set_defaults(function=_export)
+
+    serve_parser = subparsers.add_parser("serve", help="collect the solves of the stations of a competition and rank "
+                                                       "the competitors")
+    serve_parser.add_argument("-d", "--database", default="competition.db",
+                              help="SQLite file of the solves; it's kept between runs")
+    serve_parser.add_argument("-H", "--host", default="0.0.0.0", help="address to listen on; the default is all")
+    serve_parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    serve_parser.set_defaults(function=_serve)
+
+    args = parser.parse_args(arguments)
+    args.function(args)
+
+
+def _scramble(args: argparse.Namespace):
+    seed = args.seed if args.seed is not None else new_seed()
+    scrambles = generate_scrambles(args.type, args.count, seed, args.processes)
+
+    if args.output is None:
+        _write_scrambles(sys.stdout, args, seed, scrambles)
+    else:
+        with open(args.output, "w") as file:
+            _write_scrambles(file, args, seed, scrambles)
+
+    print(f"Seed: {seed}", file=sys.stderr)
+
+
+def _write_scrambles(file: TextIO, args: argparse.Namespace, seed: int, scrambles):
+    if args.format == "text":
+        for i, scramble in enumerate(scrambles):
+            file.write(f"{i + 1}. {scramble}\n")
+    else:
+        # Written piece by piece, so that the scrambles don't have to be all in memory
+        file.write("{\n")
+        file.write(f'  "scramble_type": {json.dumps(args.type)},\n')
+        file.write(f'  "seed": {seed},\n')
+        file.write('  "scrambles": [')
+        for i, scramble in enumerate(scrambles):
+            file.write(("\n    " if i == 0 else ",\n    ") + json.dumps(scramble))
+        file.write("\n  ]\n}\n")
+
+
+def _stats(args: argparse.Namespace):
+    try:
+        aggregates = aggregate_sessions(args.processes)
+    except FileNotFoundError:
+        print("There is no sessions folder; run this from the folder of Py-Cube-Timer", file=sys.stderr)
+        sys.exit(1)
+
+    if args.type is not None:
+        aggregates = {args.type: aggregates[args.type]} if args.type in aggregates else {}
+
+    if args.format == "json":
+        json.dump({scramble_type: _aggregate_to_json(aggregate) for scramble_type, aggregate in aggregates.items()},
+                  sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    if not aggregates:
+        print("No sessions")
+        return
+
+    for scramble_type, aggregate in aggregates.items():
+        print(scramble_type)
+        print(f"  Sessions: {aggregate.session_count}")
+        print(f"  Solves: {aggregate.solve_count}")
+        print(f"  Mean: {format_statistic(aggregate.mean)}")
+        print(f"  Best single: {format_statistic(aggregate.best_single)} ({aggregate.best_single_session})")
+        print(f"  Best ao5: {format_statistic(aggregate.best_ao5)} ({aggregate.best_ao5_session})")
+        print(f"  Best ao12: {format_statistic(aggregate.best_ao12)} ({aggregate.best_ao12_session})")
+        for month, mean in aggregate.monthly_means():
+            print(f"  {month}: {format_time_seconds(mean)}")
+
+
+def _import(args: argparse.Namespace):
+    try:
+        file_format = _file_format(args)
+        if file_format == "csv":
+            names = import_csv(args.file, args.name, args.type)
+        elif file_format == "binary":
+            names = import_binary(args.file)
+        else:
+            names = import_cstimer(args.file)
+    except (InvalidFileError, json.decoder.JSONDecodeError) as err:
+        print(f"Invalid file: {err}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+    for name in names:
+        print(f"Imported {name}")
+
+
+def _export(args: argparse.Namespace):
+    try:
+        file_format = _file_format(args)
+        if file_format == "csv":
+            if len(args.sessions) > 1:
+                print("A CSV file takes only one session", file=sys.stderr)
+                sys.exit(1)
+            export_csv(args.sessions[0], args.file)
+        elif file_format == "binary":
+            export_binary(args.sessions, args.file)
+        else:
+            export_cstimer(args.sessions, args.file)
+    except MixedScrambleTypesError as err:
+        print(f"{err}; a binary file takes sessions of one scramble type", file=sys.stderr)
+        sys.exit(1)
+    except json.decoder.JSONDecodeError as err:
+        print(f"Corrupted session: {err}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+
+def _serve(args: argparse.Namespace):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(message)s")
+
+    try:
+        serve(args.database, args.host, args.port)
+    except (OSError, sqlite3.Error) as err:  # The port is taken, or the database can't be opened
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+
+def _file_format(args: argparse.Namespace) -> str:
+    if args.format is not None:
+        return args.format
+    if args.file.lower().endswith(".csv"):
+        return "csv"
+    if args.file.lower().endswith(BINARY_EXTENSION):
+        return "binary"
+    return "cstimer"
+
+
+def _aggregate_to_json(aggregate: Aggregate) -> dict:
+    return {
+        "sessions": aggregate.session_count,
+        "solves": aggregate.solve_count,
+        "mean": aggregate.mean,
+        "best_single": {"time": aggregate.best_single, "session": aggregate.best_single_session},
+        "best_ao5": {"time": aggregate.best_ao5, "session": aggregate.best_ao5_session},
+        "best_ao12": {"time": aggregate.best_ao12, "session": aggregate.best_ao12_session},
+        "monthly_means": dict(aggregate.monthly_means()),
+        "histogram": {str(bucket): aggregate.histogram[bucket] for bucket in sorted(aggregate.histogram)}
+    }
@@ -0,0 +1,315 @@
+import json
+import math
+import sqlite3
+import asyncio
+import logging
+import dataclasses
+import urllib.parse
+from typing import Dict, List, Tuple, Optional
+
+from src.stats import NO_PENALTY, PENALTIES, RollingStatistics, apply_penalty
+from src.timer import interpret_time_in_seconds
+
+# A server for club competitions: the stations push their solves to it and it ranks the competitors of each puzzle by
+# their best average of 5, then by their best single, with the WCA rules. It speaks plain HTTP/1.1 with persistent
+# connections, so that a station sends its batches over the same connection:
+#   POST /solves    {"station": ..., "solves": [{"date", "competitor", "puzzle", "time", "scramble", "penalty"}],
+#                    "removed": [date, ...]}
+#   GET /rankings   ?puzzle=3x3x3, for only that puzzle
+# A solve is known by its station and its date, so sending it again replaces it, with its new penalty.
+DEFAULT_PORT = 8765
+
+_MAX_BODY_SIZE = 4 * 1024 * 1024
+_MAX_HEADER_COUNT = 100
+_IDLE_TIMEOUT = 120.0  # Seconds a connection is kept open without requests
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solves (
+    station TEXT NOT NULL,
+    date TEXT NOT NULL,
+    competitor TEXT NOT NULL,
+    puzzle TEXT NOT NULL,
+    time TEXT NOT NULL,
+    scramble TEXT NOT NULL,
+    penalty TEXT NOT NULL,
+    PRIMARY KEY (station, date)
+)
+"""
+
+
+@dataclasses.dataclass
+class Standing:
+    competitor: str
+    solve_count: int
+    best_single: Optional[float]
+    best_ao5: Optional[float]
+    current_ao5: Optional[float]
+    mean: Optional[float]
+
+    def sort_key(self) -> tuple:
+        # Competitors without an average come after the ones with one, and the same for singles
+        return (self.best_ao5 is None, self.best_ao5 or 0.0, self.best_single is None, self.best_single or 0.0,
+                self.competitor)
+
+
+class InvalidRequestError(ValueError):
+    pass
+
+
+class CompetitionStore:
+    """
+    The solves in SQLite and the standings of the competitors in memory. A standing is made again only after one of
+    its solves changed, and only when the rankings are asked for.
+
+    """
+
+    def __init__(self, database_path: str):
+        # It may be made on another thread than the event loop's, but it's used only from the loop
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+
+        # Puzzle and competitor of each solve by station and date, and the results of each puzzle and competitor
+        self._owners: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._results: Dict[Tuple[str, str], Dict[Tuple[str, str], float]] = {}
+        self._standings: Dict[Tuple[str, str], Standing] = {}
+        self._changed = set()
+
+        rows = self._connection.execute("SELECT station, date, competitor, puzzle, time, penalty FROM solves")
+        for station, date, competitor, puzzle, time, penalty in rows:
+            self._put(station, date, competitor, puzzle, apply_penalty(interpret_time_in_seconds(time), penalty))
+
+    def close(self):
+        self._connection.close()
+
+    def submit(self, batch: dict) -> Tuple[int, int]:
+        """
+        Store a batch of a station, in one transaction. Return how many solves were stored and removed.
+        Raises InvalidRequestError.
+
+        """
+        try:
+            station = batch["station"]
+            solves = [(station, solve["date"], solve["competitor"], solve["puzzle"], solve["time"],
+                       solve.get("scramble", ""), solve.get("penalty", NO_PENALTY))
+                      for solve in batch.get("solves", [])]
+            removed = [(station, date) for date in batch.get("removed", [])]
+            results = [apply_penalty(interpret_time_in_seconds(solve[4]), solve[6]) for solve in solves]
+        except (KeyError, TypeError, AttributeError, ValueError) as err:
+            raise InvalidRequestError(f"Invalid batch: {err}")
+
+        texts = [station] + [value for solve in solves for value in solve] + [date for _, date in removed]
+        if not all(isinstance(text, str) for text in texts) or any(solve[6] not in PENALTIES for solve in solves):
+            raise InvalidRequestError("Invalid batch: wrong types")
+
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO solves VALUES (?, ?, ?, ?, ?, ?, ?)", solves)
+            self._connection.executemany("DELETE FROM solves WHERE station = ? AND date = ?", removed)
+
+        for solve, result in zip(solves, results):
+            self._put(solve[0], solve[1], solve[2], solve[3], result)
+        for key in removed:
+            self._remove(key)
+
+        return len(solves), len(removed)
+
+    def rankings(self, puzzle: Optional[str] = None) -> Dict[str, List[Standing]]:
+        for key in self._changed:
+            if key in self._results:
+                self._standings[key] = _standing(key[1], self._results[key])
+            else:
+                self._standings.pop(key, None)
+        self._changed.clear()
+
+        rankings: Dict[str, List[Standing]] = {}
+        for (standing_puzzle, _), standing in self._standings.items():
+            if puzzle is None or standing_puzzle == puzzle:
+                rankings.setdefault(standing_puzzle, []).append(standing)
+
+        for standings in rankings.values():
+            standings.sort(key=Standing.sort_key)
+
+        return rankings
+
+    def _put(self, station: str, date: str, competitor: str, puzzle: str, result: float):
+        key = (station, date)
+        self._remove(key)  # It might have been of another competitor or puzzle
+
+        owner = (puzzle, competitor)
+        self._owners[key] = owner
+        self._results.setdefault(owner, {})[key] = result
+        self._changed.add(owner)
+
+    def _remove(self, key: Tuple[str, str]):
+        owner = self._owners.pop(key, None)
+        if owner is None:
+            return
+
+        results = self._results[owner]
+        del results[key]
+        if not results:
+            del self._results[owner]
+        self._changed.add(owner)
+
+
+class CompetitionServer:
+    """
+    Serve a CompetitionStore over HTTP, on the running event loop. Give it port 0 to get a free port, which is told by
+    start(); the tests drive it from the same loop.
+
+    """
+
+    def __init__(self, store: CompetitionStore):
+        self.store = store
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> int:
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), _IDLE_TIMEOUT)
+                except InvalidRequestError as err:
+                    _write_response(writer, 413 if "too large" in str(err) else 400, {"error": str(err)}, False)
+                    await writer.drain()
+                    return
+
+                if request is None:  # The station closed the connection
+                    return
+
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                status, response = self._respond(method, target, body)
+                _write_response(writer, status, response, keep_alive)
+                await writer.drain()
+
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):  # Lines too long too
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, method: str, target: str, body: bytes) -> Tuple[int, dict]:
+        url = urllib.parse.urlsplit(target)
+
+        if url.path == "/solves":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+
+            try:
+                batch = json.loads(body)
+                if not isinstance(batch, dict):
+                    raise InvalidRequestError("Invalid batch: not an object")
+                stored, removed = self.store.submit(batch)
+            except (json.decoder.JSONDecodeError, UnicodeDecodeError, InvalidRequestError) as err:
+                return 400, {"error": str(err)}
+
+            logging.debug(f"Stored {stored} and removed {removed} solves of station {batch['station']}")
+            return 200, {"stored": stored, "removed": removed}
+
+        if url.path == "/rankings":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+
+            puzzle = urllib.parse.parse_qs(url.query).get("puzzle", [None])[0]
+            rankings = self.store.rankings(puzzle)
+            return 200, {puzzle: [_standing_to_json(rank + 1, standing) for rank, standing in enumerate(standings)]
+                         for puzzle, standings in rankings.items()}
+
+        return 404, {"error": f"Nothing at {url.path}"}
+
+
+def serve(database_path: str, host: str, port: int):
+    """
+    Run the server until it's interrupted.
+
+    """
+    store = CompetitionStore(database_path)
+    server = CompetitionServer(store)
+
+    async def run():
+        bound_port = await server.start(host, port)
+        logging.info(f"Serving the competition on {host}:{bound_port}")
+        await asyncio.Event().wait()  # Forever
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+def _standing(competitor: str, results: Dict[Tuple[str, str], float]) -> Standing:
+    times = [results[key] for key in sorted(results, key=lambda key: key[1])]  # By date
+    statistics = RollingStatistics(times)
+
+    return Standing(competitor, len(times), statistics.best_single, statistics.best_ao5, statistics.current_ao5,
+                    statistics.mean)
+
+
+def _standing_to_json(rank: int, standing: Standing) -> dict:
+    # JSON has no infinity, so DNFs are sent as "DNF"
+    contents = {name: "DNF" if isinstance(value, float) and math.isinf(value) else value
+                for name, value in dataclasses.asdict(standing).items()}
+    contents["rank"] = rank
+
+    return contents
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, target, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise InvalidRequestError("Invalid request line")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        if len(headers) >= _MAX_HEADER_COUNT:
+            raise InvalidRequestError("Too many headers")
+
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise InvalidRequestError("Invalid Content-Length")
+    if length > _MAX_BODY_SIZE:
+        raise InvalidRequestError("Request too large")
+
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, target, headers, body
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int, response: dict, keep_alive: bool):
+    body = json.dumps(response).encode()
+
+    writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                 "Content-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n"
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                 "\r\n".encode() + body)
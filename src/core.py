@@ -0,0 +1,319 @@
+import logging
+import datetime
+import dataclasses
+from typing import List, Tuple, Callable, Optional
+
+from src.session import SessionData, Solve, SolveColumns, FileCorruptedError, MAX_SOLVES, create_new_session, \
+    load_session_data, read_session_tail, dump_data, remove_solve_out_of_session, set_penalty, rename_session, \
+    change_type
+from src.stats import RollingStatistics
+from src.analysis import SessionAnalysis
+from src.writer import SessionWriter, WriteCommand
+from src.instrument import span
+
+# The session being timed, without any window: the solves, their statistics and the file are kept together here and
+# every change is announced to the subscribers, which draw it. The tests and the worker processes drive it directly.
+
+# Kinds of events
+SOLVE_ADDED = "solve_added"
+SOLVE_REMOVED = "solve_removed"
+PENALTY_CHANGED = "penalty_changed"
+STATISTICS_CHANGED = "statistics_changed"
+SOLVES_LOADED = "solves_loaded"
+RENAMED = "renamed"
+TYPE_CHANGED = "type_changed"
+SAVE_FAILED = "save_failed"
+
+# What failed to be saved, for SAVE_FAILED
+SAVE_SOLVE = "save_solve"
+REMOVE_SOLVE = "remove_solve"
+SAVE_PENALTY = "save_penalty"
+SAVE_TYPE = "save_type"
+RENAME = "rename"
+
+
+@dataclasses.dataclass
+class SessionEvent:
+    kind: str
+    index: int = 0  # From 1, of the solve the event is about
+    solve: Optional[Solve] = None
+    new_bests: List[Tuple[str, float]] = dataclasses.field(default_factory=list)  # "single", "ao5" or "ao12"
+    operation: str = ""  # For SAVE_FAILED
+    error: Optional[Exception] = None  # For SAVE_FAILED
+    external: bool = False  # For SOLVE_ADDED, of a solve that someone else appended to the file
+
+
+# Solves read from the end of the file for finding the ones appended by someone else; it's read further back, if needed
+_TAIL_SIZE = 16
+_MAX_TAIL_SIZE = 4096
+
+
+class SessionFullError(RuntimeError):
+    pass
+
+
+class TimerSession:
+    """
+    A session and its statistics. The solves are changed in memory first and then written to the file; a file that
+    can't be written is told with a SAVE_FAILED event, not with an exception. With a writer, the file is written in
+    the background and its failures are collected from the writer instead.
+
+    A big session can start with only its last solves, the older pending ones being read meanwhile; then there are no
+    statistics until finish_loading() is given the whole session.
+
+    """
+
+    def __init__(self, session_data: SessionData, pending: int = 0, writer: Optional[SessionWriter] = None):
+        self.session_data = session_data
+        self.pending = pending  # Older solves that are not in session_data yet
+        self.writer = writer
+        self.statistics: Optional[RollingStatistics] = None
+        self.analysis: Optional[SessionAnalysis] = None  # Calculated with the statistics
+        self._subscribers: List[Callable[[SessionEvent], None]] = []
+        self._loaded_count = len(session_data.solves)  # Before any solves are added while loading
+
+        if not pending:
+            self._calculate_statistics()
+
+    @staticmethod
+    def load(name: str, writer: Optional[SessionWriter] = None) -> Optional["TimerSession"]:
+        """
+        Return None, if the session has missing data, or it is non-existent, or it is corrupted.
+
+        """
+        session_data = load_session_data(name + ".json")
+        if session_data is None:
+            return None
+
+        return TimerSession(session_data, writer=writer)
+
+    @staticmethod
+    def create(name: str, check_first: bool, writer: Optional[SessionWriter] = None) -> "TimerSession":
+        # Let the caller handle FileExistsError
+        return TimerSession(create_new_session(name, check_first), writer=writer)
+
+    @property
+    def name(self) -> str:
+        return self.session_data.name
+
+    @property
+    def solves(self) -> SolveColumns:
+        return self.session_data.solves
+
+    def is_full(self) -> bool:
+        return self.pending + len(self.session_data.solves) >= MAX_SOLVES - 1
+
+    def subscribe(self, callback: Callable[[SessionEvent], None]):
+        self._subscribers.append(callback)
+
+    def add_solve(self, time: str, scramble: str, seed: Optional[int], date: Optional[str] = None) -> Solve:
+        """
+        time is already formatted. The date is now, if not given.
+
+        """
+        if self.is_full():
+            raise SessionFullError
+
+        if date is None:
+            date = str(datetime.datetime.now())
+
+        self.session_data.solves.add(time, scramble, date, seed)
+        solve = self.session_data.solves[-1]
+        index = self.pending + len(self.session_data.solves)
+        self._emit(SessionEvent(SOLVE_ADDED, index, solve))
+
+        if self.statistics is not None:
+            with span("stats"):
+                previous_bests = self._bests()
+                self.statistics.append(solve.result)
+                self.analysis.append(solve.result)
+                self._update_averages()
+
+            self._emit(SessionEvent(STATISTICS_CHANGED, index, new_bests=self._new_bests(previous_bests)))
+
+        self._write(WriteCommand(SAVE_SOLVE, dump_data, (self.name + ".json", solve)))
+
+        return solve
+
+    def merge_solves(self, solves: List[Solve]):
+        """
+        Append solves that someone else appended to the file, without writing them again.
+        Raises SessionFullError, if they don't all fit in the session; then none of them is appended.
+
+        """
+        if not solves:
+            return
+
+        if self.pending + len(self.session_data.solves) + len(solves) > MAX_SOLVES - 1:
+            raise SessionFullError
+
+        previous_bests = self._bests() if self.statistics is not None else None
+
+        for solve in solves:
+            self.session_data.solves.append(solve)
+            index = self.pending + len(self.session_data.solves)
+            self._emit(SessionEvent(SOLVE_ADDED, index, self.session_data.solves[-1], external=True))
+
+            if self.statistics is not None:
+                with span("stats"):
+                    self.statistics.append(solve.result)
+                    self.analysis.append(solve.result)
+
+        if self.statistics is not None:
+            self._update_averages()
+            self._emit(SessionEvent(STATISTICS_CHANGED, index, new_bests=self._new_bests(previous_bests)))
+
+    def remove_solve(self, index: int):
+        """
+        index is from 1 to 9997.
+        -1 is handled separately; don't put negative numbers except for -1.
+
+        """
+        if index == -1:
+            index = self.pending + len(self.session_data.solves)
+            to_remove = -1
+        else:
+            to_remove = index
+
+        solve = self.session_data.solves[index - 1 - self.pending]
+        del self.session_data.solves[index - 1 - self.pending]
+        self._emit(SessionEvent(SOLVE_REMOVED, index, solve))
+
+        # Only the averages with this solve are calculated again
+        if self.statistics is not None:
+            with span("stats"):
+                self.statistics.delete(index - 1)
+                self.analysis.delete(index - 1)
+                self._update_averages()
+            self._emit(SessionEvent(STATISTICS_CHANGED, index))
+
+        self._write(WriteCommand(REMOVE_SOLVE, remove_solve_out_of_session, (self.name + ".json", to_remove)))
+
+    def set_penalty(self, index: int, penalty: str):
+        """
+        index is from 1 to 9997.
+
+        """
+        self.session_data.solves.set_penalty(index - 1 - self.pending, penalty)
+        solve = self.session_data.solves[index - 1 - self.pending]
+        self._emit(SessionEvent(PENALTY_CHANGED, index, solve))
+
+        if self.statistics is not None:
+            with span("stats"):
+                self.statistics.replace(index - 1, solve.result)
+                self.analysis.replace(index - 1, solve.result)
+                self._update_averages()
+            self._emit(SessionEvent(STATISTICS_CHANGED, index))
+
+        self._write(WriteCommand(SAVE_PENALTY, set_penalty, (self.name + ".json", index, penalty)))
+        logging.info(f"Set penalty of solve {index} to \"{penalty}\"")
+
+    def rename(self, name: str):
+        source_name = self.name
+
+        self.session_data.name = name
+        self._emit(SessionEvent(RENAMED))
+
+        self._write(WriteCommand(RENAME, rename_session, (source_name, name), alone=True))
+        logging.info(f'Renamed session to "{name}"')
+
+    def change_type(self, scramble_type: str):
+        self.session_data.scramble_type = scramble_type
+        self._emit(SessionEvent(TYPE_CHANGED))
+
+        self._write(WriteCommand(SAVE_TYPE, change_type, (self.name + ".json", scramble_type)))
+
+    def finish_loading(self, full_session_data: SessionData):
+        """
+        Put the pending solves before the ones there are, now that the whole session is read.
+
+        """
+        # The file might have been read before or after some of the solves done while loading were saved
+        solve_count = self.pending + self._loaded_count
+        new_solves = self.session_data.solves[self._loaded_count + max(len(full_session_data.solves) - solve_count, 0):]
+
+        full_session_data.solves.extend(new_solves)
+        self.session_data.solves = full_session_data.solves
+        self.pending = 0
+
+        self._calculate_statistics()
+        self._emit(SessionEvent(SOLVES_LOADED))
+        self._emit(SessionEvent(STATISTICS_CHANGED))
+
+    def merge_file_changes(self) -> bool:
+        """
+        Merge the solves that someone else appended to the file, reading only its end. Return False, if the file was
+        changed some other way, or if it can't be read like that; then the session must be loaded again. Everything
+        must be written already.
+        Raises SessionFullError, like merge_solves().
+
+        """
+        solves = self.session_data.solves
+        last_date = solves[-1].date if solves else None
+        count = _TAIL_SIZE
+
+        while True:
+            tail = read_session_tail(self.name + ".json", count)
+            if tail is None:
+                return False
+
+            whole = len(tail) < count  # The file has no more solves
+            if last_date is None:
+                position = -1 if whole else None
+            else:
+                position = next((i for i in range(len(tail) - 1, -1, -1) if tail[i].date == last_date), None)
+
+            if position is not None:
+                break
+            if whole or count >= _MAX_TAIL_SIZE:
+                return False
+            count *= 4
+
+        # The solves before must be the ones there are, or the file was changed in the middle
+        known = tail[:position + 1]
+        if len(known) > len(solves):
+            return False
+        if any((solve.date, solve.time, solve.penalty) != (other.date, other.time, other.penalty)
+               for solve, other in zip(known, solves[len(solves) - len(known):])):
+            return False
+
+        new_solves = tail[position + 1:]
+        if new_solves:
+            logging.info(f'Merging {len(new_solves)} solves appended to session "{self.name}"')
+            self.merge_solves(new_solves)
+
+        return True
+
+    def _calculate_statistics(self):
+        with span("stats"):
+            self.statistics = RollingStatistics(self.session_data.solves.results)
+            self.analysis = SessionAnalysis(self.session_data.solves.results)
+            self._update_averages()
+
+    def _bests(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return self.statistics.best_single, self.statistics.best_ao5, self.statistics.best_ao12
+
+    def _new_bests(self, previous_bests: Tuple[Optional[float], Optional[float], Optional[float]]) \
+            -> List[Tuple[str, float]]:
+        return [(kind, best) for kind, previous, best in zip(("single", "ao5", "ao12"), previous_bests, self._bests())
+                if previous is not None and best is not None and best < previous]
+
+    def _update_averages(self):
+        self.session_data.all_ao5 = self.statistics.all_ao5
+        self.session_data.all_ao12 = self.statistics.all_ao12
+
+    def _write(self, command: WriteCommand):
+        if self.writer is not None:
+            self.writer.submit(command)
+            return
+
+        try:
+            with span("save"):
+                command.run()
+        except (OSError, FileCorruptedError, KeyError) as err:
+            logging.error(f"Could not write the session: {err}")
+            self._emit(SessionEvent(SAVE_FAILED, operation=command.operation, error=err))
+
+    def _emit(self, event: SessionEvent):
+        for subscriber in self._subscribers:
+            subscriber(event)
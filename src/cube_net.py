@@ -0,0 +1,72 @@
+import tkinter as tk
+from typing import List, Optional
+
+from src.simulator import get_simulator
+
+# In the order of src.simulator.FACES
+COLORS = ("white", "red", "green", "yellow", "orange", "blue")
+
+# Where each face is in the net, in faces
+_FACE_PLACES = ((1, 0), (2, 1), (1, 1), (1, 2), (0, 1), (3, 1))
+
+
+class CubeNet(tk.Canvas):
+    """
+    Shows the state of a cube after a scramble as an unfolded net. The rectangles are created only when the cube
+    size changes; otherwise only their colors are changed.
+
+    """
+
+    def __init__(self, master: tk.Widget, face_size: int = 30, **kwargs):
+        super().__init__(master, width=face_size * 4 + 6, height=face_size * 3 + 6, highlightthickness=0, **kwargs)
+        self.face_size = face_size
+
+        self._size = 0
+        self._stickers: List[int] = []
+        self._colors: List[Optional[str]] = []
+
+    def show(self, scramble_type: str, scramble: str):
+        """
+        Hide the net, if the scramble type can't be simulated or the scramble is invalid.
+
+        """
+        simulator = get_simulator(scramble_type)
+        if simulator is None:
+            self.hide()
+            return
+
+        try:
+            state = simulator.apply(scramble)
+        except ValueError:
+            self.hide()
+            return
+
+        if simulator.size != self._size:
+            self._create_stickers(simulator.size)
+
+        for i, face in enumerate(state):
+            color = COLORS[face]
+            if self._colors[i] != color:
+                self.itemconfigure(self._stickers[i], fill=color)
+                self._colors[i] = color
+
+    def hide(self):
+        self.delete("all")
+        self._size = 0
+        self._stickers.clear()
+        self._colors.clear()
+
+    def _create_stickers(self, size: int):
+        self.hide()
+        self._size = size
+
+        sticker_size = self.face_size / size
+
+        for column, row in _FACE_PLACES:
+            for i in range(size):
+                for j in range(size):
+                    x = 3 + column * self.face_size + j * sticker_size
+                    y = 3 + row * self.face_size + i * sticker_size
+                    self._stickers.append(self.create_rectangle(x, y, x + sticker_size, y + sticker_size,
+                                                                outline="black"))
+                    self._colors.append(None)
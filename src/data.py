@@ -1,13 +1,23 @@
 import os
+import copy
 import json
+import logging
+import threading
+import dataclasses
 from os.path import join, isdir
+from typing import Callable, List, Optional
 
 from src.timer import DEFAULT_READY_COLOR, DEFAULT_INSPECTION_COLOR
+from src.atomic import write_json
 
 DATA_PATH = join("data", "data.json")
+SESSIONS_PATH = join("data", "sessions")
 DEFAULT_BACKGROUND_COLOR = "#f0f0ed"
 DEFAULT_TIMER_SIZE = 120
 DEFAULT_SCRAMBLE_SIZE = 28
+DEFAULT_BACKUP_KEEP_LAST = 10
+DEFAULT_BACKUP_KEEP_DAILY = 7
+DEFAULT_BACKUP_KEEP_MONTHLY = 12
 
 _EMPTY_DATA_FILE = {
     "last_session": "",
@@ -18,6 +28,9 @@ _EMPTY_DATA_FILE = {
     "foreground_color": "#000000",
     "enable_backup": False,
     "backup_path": "",
+    "backup_keep_last": DEFAULT_BACKUP_KEEP_LAST,
+    "backup_keep_daily": DEFAULT_BACKUP_KEEP_DAILY,
+    "backup_keep_monthly": DEFAULT_BACKUP_KEEP_MONTHLY,
     "ready_color": DEFAULT_READY_COLOR,
     "inspection_color": DEFAULT_INSPECTION_COLOR
 }
@@ -39,5 +52,141 @@ def data_folder_exists() -> bool:
 
 
 def recreate_data_file():
-    with open(DATA_PATH, "w") as file:
-        json.dump(_EMPTY_DATA_FILE, file, indent=2)
+    write_json(DATA_PATH, _EMPTY_DATA_FILE)
+
+
+@dataclasses.dataclass
+class SettingsConfig:
+    timer_size: int
+    scramble_size: int
+    enable_inspection: bool
+    background_color: str
+    foreground_color: str
+    enable_backup: bool
+    backup_path: str
+    ready_color: str
+    inspection_color: str
+    backup_keep_last: int
+    backup_keep_daily: int
+    backup_keep_monthly: int
+
+
+class SettingsStore:
+    """
+    The contents of the data file, read once and kept in memory. Changes are written after a short delay, so that a
+    burst of them is written once, and are announced to the subscribers right away.
+
+    """
+
+    def __init__(self, path: str, write_delay: float = 0.5):
+        self.path = path
+        self.write_delay = write_delay
+
+        self._contents: Optional[dict] = None  # Keys of other versions are kept, too
+        self._config: Optional[SettingsConfig] = None
+        self._subscribers: List[Callable[[SettingsConfig], None]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Held for the whole write, so that exiting waits for a write in progress
+        self._timer: Optional[threading.Timer] = None
+
+    def load(self):
+        """
+        Read the data file, if it wasn't read yet. If it's missing, corrupted or incomplete, it's recreated and the
+        defaults are used. Raises FileNotFoundError, json.decoder.JSONDecodeError and KeyError after that, so that the
+        caller can report it.
+
+        """
+        with self._lock:
+            if self._contents is not None:
+                return
+
+            try:
+                with open(self.path, "r") as file:
+                    contents = json.load(file)
+                config = _config_from_contents(contents)
+                if not isinstance(contents.get("last_session"), str):
+                    raise KeyError("last_session")
+            except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError):
+                self._contents = copy.copy(_EMPTY_DATA_FILE)
+                self._config = _config_from_contents(self._contents)
+                write_json(self.path, self._contents)
+                raise
+
+            self._contents = contents
+            self._config = config
+
+    @property
+    def settings(self) -> SettingsConfig:
+        self.load()
+        with self._lock:
+            return dataclasses.replace(self._config)
+
+    @property
+    def last_session(self) -> str:
+        self.load()
+        with self._lock:
+            return self._contents["last_session"]
+
+    def update(self, settings_config: SettingsConfig):
+        self.load()
+        with self._lock:
+            self._config = dataclasses.replace(settings_config)
+            self._contents.update(dataclasses.asdict(settings_config))
+            self._schedule_write()
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            subscriber(dataclasses.replace(settings_config))
+
+    def set_last_session(self, name: str):
+        self.load()
+        with self._lock:
+            if self._contents["last_session"] == name:
+                return
+            self._contents["last_session"] = name
+            self._schedule_write()
+
+    def subscribe(self, callback: Callable[[SettingsConfig], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def flush(self):
+        """
+        Write the pending changes now. Call this before exiting.
+
+        """
+        with self._write_lock:
+            with self._lock:
+                if self._timer is None:
+                    return
+                self._timer.cancel()
+                self._timer = None
+                contents = copy.copy(self._contents)
+
+            try:
+                write_json(self.path, contents)
+            except OSError as err:
+                logging.error(f"Could not write the data file: {err}")
+            else:
+                logging.debug("Wrote the data file")
+
+    def _schedule_write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer = threading.Timer(self.write_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+def _config_from_contents(contents: dict) -> SettingsConfig:
+    # Data files from older versions don't have the retention policy
+    return SettingsConfig(contents["timer_size"], contents["scramble_size"], contents["enable_inspection"],
+                          contents["background_color"], contents["foreground_color"], contents["enable_backup"],
+                          contents["backup_path"], contents["ready_color"], contents["inspection_color"],
+                          contents.get("backup_keep_last", DEFAULT_BACKUP_KEEP_LAST),
+                          contents.get("backup_keep_daily", DEFAULT_BACKUP_KEEP_DAILY),
+                          contents.get("backup_keep_monthly", DEFAULT_BACKUP_KEEP_MONTHLY))
+
+
+settings_store = SettingsStore(DATA_PATH)
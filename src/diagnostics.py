@@ -0,0 +1,101 @@
+import logging
+import tkinter as tk
+from tkinter import messagebox, filedialog, ttk
+
+import src.instrument as instrument
+
+# Column identifiers and headings of the span list
+_COLUMNS = {
+    "name": "Span",
+    "count": "Count",
+    "p50": "p50 (ms)",
+    "p95": "p95 (ms)",
+    "p99": "p99 (ms)",
+    "max": "Max (ms)"
+}
+
+
+class Diagnostics(tk.Frame):
+
+    def __init__(self, top_level: tk.Toplevel, x: int, y: int):
+        super().__init__(top_level)
+        self.top_level = top_level
+        self.pack(padx=10, pady=10, expand=True)
+
+        self.top_level.title("Diagnostics")
+        self.top_level.geometry(f"+{x}+{y}")
+
+        self.var_record = tk.BooleanVar(self, value=instrument.is_enabled())
+        tk.Checkbutton(self, text="Record timings", variable=self.var_record, command=self.toggle_recording) \
+            .grid(row=0, column=0, columnspan=4, sticky="w")
+
+        self.tre_spans = ttk.Treeview(self, columns=list(_COLUMNS), show="headings", height=len(instrument.SPAN_NAMES),
+                                      selectmode="none")
+        self.tre_spans.grid(row=1, column=0, columnspan=4, pady=(6, 12))
+
+        for column, heading in _COLUMNS.items():
+            self.tre_spans.heading(column, text=heading)
+            self.tre_spans.column(column, width=90 if column == "name" else 70, anchor="w" if column == "name" else "e")
+
+        tk.Button(self, text="Clear", command=self.clear).grid(row=2, column=0)
+        tk.Button(self, text="Save Trace", command=self.save_trace).grid(row=2, column=1)
+        self.btn_profile = tk.Button(self, text="Start Profile", command=self.toggle_profile)
+        self.btn_profile.grid(row=2, column=2)
+        tk.Button(self, text="Ok", command=self.top_level.destroy).grid(row=2, column=3)
+
+        if instrument.is_profiling():
+            self.btn_profile.configure(text="Stop Profile")
+
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():  # The window was closed
+            return
+
+        self.tre_spans.delete(*self.tre_spans.get_children())
+        for summary in instrument.summarize():
+            self.tre_spans.insert("", "end", values=(summary.name, summary.count, _milliseconds(summary.p50),
+                                                     _milliseconds(summary.p95), _milliseconds(summary.p99),
+                                                     _milliseconds(summary.max)))
+
+        self.after(1000, self.refresh)
+
+    def toggle_recording(self):
+        instrument.enable(self.var_record.get())
+        logging.info(f"Recording timings: {self.var_record.get()}")
+
+    def clear(self):
+        instrument.clear()
+        self.tre_spans.delete(*self.tre_spans.get_children())
+
+    def save_trace(self):
+        file_path: str = filedialog.asksaveasfilename(parent=self.top_level, initialfile="py-cube-timer-trace.json",
+                                                      filetypes=[("Chrome trace", "*.json")])
+        if not file_path:  # The user cancelled
+            return
+
+        try:
+            instrument.write_chrome_trace(file_path)
+        except OSError as err:
+            logging.error(f"Could not write the trace: {err}")
+            messagebox.showerror("Trace Failure", "Could not write the trace file.", parent=self.top_level)
+
+    def toggle_profile(self):
+        if not instrument.is_profiling():
+            instrument.start_profile()
+            self.btn_profile.configure(text="Stop Profile")
+            return
+
+        file_path: str = filedialog.asksaveasfilename(parent=self.top_level, initialfile="py-cube-timer.prof",
+                                                      filetypes=[("cProfile statistics", "*.prof")])
+        try:
+            instrument.stop_profile(file_path or None)  # Thrown away, if the user cancelled
+        except OSError as err:
+            logging.error(f"Could not write the profile: {err}")
+            messagebox.showerror("Profile Failure", "Could not write the profile file.", parent=self.top_level)
+
+        self.btn_profile.configure(text="Start Profile")
+
+
+def _milliseconds(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
@@ -3,16 +3,21 @@ from typing import Callable
 import tkinter as tk
 
 from src.session import Solve
+from src.cube_net import CubeNet
+from src.stats import NO_PENALTY, PLUS_TWO, DNF, format_result
 
 
 class InspectSolve(tk.Frame):
 
-    def __init__(self, top_level: tk.Toplevel, index: int, solve: Solve, delete_solve: Callable[[int, tk.Toplevel], bool],
+    def __init__(self, top_level: tk.Toplevel, index: int, solve: Solve, scramble_type: str,
+                 delete_solve: Callable[[int, tk.Toplevel], bool], set_penalty: Callable[[int, str, tk.Toplevel], bool],
                  x: int, y: int):
         super().__init__(top_level)
         self.top_level = top_level
         self.index = index
+        self.solve = solve
         self.delete_solve = delete_solve
+        self.set_penalty = set_penalty
         self.pack(padx=10, pady=10, expand=True)
 
         self.top_level.title("Inspect Solve")
@@ -21,12 +26,26 @@ class InspectSolve(tk.Frame):
         date = solve.date.split(".")[0]
 
         tk.Label(self, text=f"Solve number {index}", font="Times, 18").grid(row=0, column=0)
-        tk.Label(self, text=solve.time, font="Times, 13").grid(row=1, column=0)
+        self.var_time = tk.StringVar(self, value=format_result(solve.raw_time, solve.penalty))
+        tk.Label(self, textvariable=self.var_time, font="Times, 13").grid(row=1, column=0)
         tk.Label(self, text=solve.scramble, font="Times, 13", wraplength=440).grid(row=2, column=0)
         tk.Label(self, text=date, font="Times, 13").grid(row=3, column=0)
 
+        # Shows nothing, if the scramble can't be simulated
+        cvs_cube_net = CubeNet(self)
+        cvs_cube_net.grid(row=0, column=1, rowspan=5, padx=(10, 0))
+        cvs_cube_net.show(scramble_type, solve.scramble)
+
+        frm_penalty = tk.Frame(self)
+        frm_penalty.grid(row=4, column=0)
+
+        self.var_penalty = tk.StringVar(frm_penalty, value=solve.penalty)
+        for text, penalty in (("No penalty", NO_PENALTY), ("+2", PLUS_TWO), ("DNF", DNF)):
+            tk.Radiobutton(frm_penalty, text=text, variable=self.var_penalty, value=penalty,
+                           command=self.change_penalty).pack(side="left")
+
         self.frm_buttons = tk.Frame(self)
-        self.frm_buttons.grid(row=4, column=0, pady=(12, 0))
+        self.frm_buttons.grid(row=5, column=0, columnspan=2, pady=(12, 0))
 
         tk.Button(self.frm_buttons, text="Ok", command=self.top_level.destroy).grid(row=0, column=0)
         tk.Button(self.frm_buttons, text="Delete", command=self.delete, background="red") \
@@ -35,3 +54,12 @@ class InspectSolve(tk.Frame):
     def delete(self):
         if self.delete_solve(self.index, self.top_level):
             self.top_level.destroy()
+
+    def change_penalty(self):
+        penalty = self.var_penalty.get()
+
+        if self.set_penalty(self.index, penalty, self.top_level):
+            self.solve.penalty = penalty
+            self.var_time.set(format_result(self.solve.raw_time, penalty))
+        else:
+            self.var_penalty.set(self.solve.penalty)  # Back to how it was
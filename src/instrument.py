@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import cProfile
+import threading
+import contextlib
+import collections
+import dataclasses
+from typing import Dict, List, Deque, Tuple, Optional
+
+# Timing of the things that can make the timer lag, for when someone complains about it. It's off until it's turned
+# on from the Diagnostics window or with --diagnostics; then every span is kept, the last ones in a ring buffer.
+SPAN_NAMES = ("save", "stats", "render", "scramble", "backup")
+BUFFER_SIZE = 2000  # Spans kept per name
+TRACE_BUFFER_SIZE = 10000  # Spans kept in order, for the trace file
+
+_enabled = False
+_lock = threading.Lock()
+_durations: Dict[str, Deque[int]] = collections.defaultdict(lambda: collections.deque(maxlen=BUFFER_SIZE))
+_trace: Deque[Tuple[str, int, int, int]] = collections.deque(maxlen=TRACE_BUFFER_SIZE)  # Name, start, duration, thread
+_profile: Optional[cProfile.Profile] = None
+
+
+@dataclasses.dataclass
+class SpanSummary:
+    name: str
+    count: int
+    p50: float  # In seconds
+    p95: float
+    p99: float
+    max: float
+
+
+class _Span:
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *_exception):
+        duration = time.perf_counter_ns() - self.start
+        with _lock:
+            _durations[self.name].append(duration)
+            _trace.append((self.name, self.start, duration, threading.get_ident()))
+
+
+_NOTHING = contextlib.nullcontext()
+
+
+def span(name: str):
+    """
+    Time the block inside, like: with span("save"): ... It costs next to nothing, while it's off.
+
+    """
+    return _Span(name) if _enabled else _NOTHING
+
+
+def enable(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def clear():
+    with _lock:
+        _durations.clear()
+        _trace.clear()
+
+
+def summarize() -> List[SpanSummary]:
+    """
+    The percentiles of every span name that has spans, in the order of SPAN_NAMES first.
+
+    """
+    with _lock:
+        durations = {name: sorted(values) for name, values in _durations.items() if values}
+
+    names = [name for name in SPAN_NAMES if name in durations] + sorted(set(durations) - set(SPAN_NAMES))
+
+    return [SpanSummary(name, len(durations[name]), _percentile(durations[name], 50),
+                        _percentile(durations[name], 95), _percentile(durations[name], 99),
+                        durations[name][-1] / 1e9) for name in names]
+
+
+def write_chrome_trace(path: str):
+    """
+    Write the spans in the Trace Event Format, which chrome://tracing and Perfetto open.
+
+    """
+    with _lock:
+        spans = list(_trace)
+
+    events = [{"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": os.getpid(), "tid": thread}
+              for name, start, duration, thread in spans]
+
+    with open(path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+def start_profile():
+    """
+    Profile the UI thread with cProfile, until stop_profile().
+
+    """
+    global _profile
+
+    if _profile is not None:
+        return
+
+    _profile = cProfile.Profile()
+    _profile.enable()
+
+
+def stop_profile(path: Optional[str]):
+    """
+    Stop profiling and write the statistics to path, for pstats or snakeviz; nothing is written, if path is None.
+
+    """
+    global _profile
+
+    if _profile is None:
+        return
+
+    profile, _profile = _profile, None
+    profile.disable()
+    if path is not None:
+        profile.dump_stats(path)
+
+
+def is_profiling() -> bool:
+    return _profile is not None
+
+
+def _percentile(ordered: List[int], percent: int) -> float:
+    # Nearest rank; the durations are in nanoseconds
+    index = max(-(-len(ordered) * percent // 100) - 1, 0)
+    return ordered[index] / 1e9
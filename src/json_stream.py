@@ -0,0 +1,203 @@
+import os
+import re
+import json
+from typing import Iterator, Tuple, Any, List, Optional, TextIO, BinaryIO, Callable
+
+# Reading JSON a piece at a time, for the session files, which can get big. Only the elements of the chosen arrays
+# are yielded one by one; every other value is decoded whole.
+_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+_SKIP_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.buffer = ""
+        self.position = 0
+        self.end_of_file = False
+
+    def read_more(self) -> bool:
+        if self.end_of_file:
+            return False
+
+        chunk = self.file.read(_CHUNK_SIZE)
+        if not chunk:
+            self.end_of_file = True
+            return False
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip the whitespace and return the next character, or an empty string at the end.
+
+        """
+        while True:
+            self.position = _SKIP_WHITESPACE.match(self.buffer, self.position).end()
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.read_more():
+                return ""
+
+    def expect(self, character: str):
+        if self.peek() != character:
+            raise json.decoder.JSONDecodeError(f"Expecting '{character}'", self.buffer, self.position)
+        self.position += 1
+
+    def decode(self) -> Any:
+        self.peek()
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.decoder.JSONDecodeError:
+                if self.read_more():
+                    continue
+                raise
+
+            # A number at the end of the buffer might go on in the next chunk
+            if end == len(self.buffer) and self.read_more():
+                continue
+
+            self.position = end
+            return value
+
+
+def iterate_object(file: TextIO, array_key: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield the key and value pairs of the object in file. The value of array_key must be an array and its elements are
+    yielded one by one, each with array_key. Raises json.decoder.JSONDecodeError.
+
+    """
+    return iterate_object_arrays(file, lambda key: key == array_key)
+
+
+def iterate_object_arrays(file: TextIO, is_array_key: Callable[[str], bool]) -> Iterator[Tuple[str, Any]]:
+    """
+    Like iterate_object(), but the elements of every array whose key passes is_array_key are yielded one by one.
+
+    """
+    reader = _Reader(file)
+    reader.expect("{")
+
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise json.decoder.JSONDecodeError("Expecting a key", reader.buffer, reader.position)
+        reader.expect(":")
+
+        if is_array_key(key):
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.position += 1
+            else:
+                while True:
+                    yield key, reader.decode()
+
+                    if reader.peek() == ",":
+                        reader.position += 1
+                    else:
+                        reader.expect("]")
+                        break
+        else:
+            yield key, reader.decode()
+
+        if reader.peek() == ",":
+            reader.position += 1
+        else:
+            reader.expect("}")
+            return
+
+
+def read_array_tail(file: BinaryIO, count: int) -> Optional[List[dict]]:
+    """
+    Return the last count elements, in order, of the array that is the last value of the object in file, without
+    reading the whole file. The elements must be objects. Return None, if the file doesn't look like that.
+
+    """
+    size = file.seek(0, os.SEEK_END)
+    block_size = _CHUNK_SIZE
+
+    while True:
+        start = max(size - block_size, 0)
+        file.seek(start)
+        # The block might start in the middle of a character, but nothing is decoded from there
+        text = file.read(size - start).decode("utf-8", errors="replace")
+
+        elements = _array_tail(text, count)
+        if elements is not None:
+            return elements
+        if start == 0:
+            return None
+
+        block_size *= 4
+
+
+def _array_tail(text: str, count: int) -> Optional[List[dict]]:
+    # Going backwards: the closing brace of the object, the closing bracket of the array and then the elements
+    position = _skip_whitespace_backwards(text, len(text))
+    if position == 0 or text[position - 1] != "}":
+        return None
+
+    position = _skip_whitespace_backwards(text, position - 1)
+    if position == 0 or text[position - 1] != "]":
+        return None
+    position -= 1
+
+    elements: List[dict] = []
+
+    previous = _skip_whitespace_backwards(text, position)
+    if previous > 0 and text[previous - 1] == "[":
+        return elements  # Empty
+
+    while len(elements) < count:
+        end = _skip_whitespace_backwards(text, position)
+        if end == 0 or text[end - 1] != "}":
+            return None
+
+        # Try the opening braces from the nearest one, until one decodes into an object that ends right there
+        candidate = end
+        while True:
+            candidate = text.rfind("{", 0, candidate)
+            if candidate == -1:
+                return None  # Needs a bigger block
+
+            try:
+                element, element_end = _decoder.raw_decode(text, candidate)
+            except json.decoder.JSONDecodeError:
+                continue
+
+            if element_end == end and isinstance(element, dict):
+                break
+
+        elements.append(element)
+
+        previous = _skip_whitespace_backwards(text, candidate)
+        if previous == 0:
+            return None
+        if text[previous - 1] == "[":
+            break  # That was the first element
+        if text[previous - 1] != ",":
+            return None
+
+        position = previous - 1
+
+    elements.reverse()
+    return elements
+
+
+def _skip_whitespace_backwards(text: str, position: int) -> int:
+    while position > 0 and text[position - 1] in _WHITESPACE:
+        position -= 1
+    return position
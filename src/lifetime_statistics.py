@@ -0,0 +1,144 @@
+import queue
+import threading
+import tkinter as tk
+from typing import Dict, Optional
+from tkinter import messagebox
+
+from src.aggregate import Aggregate, aggregate_sessions, HISTOGRAM_BUCKET
+from src.scramble import PUZZLE_TYPES
+from src.timer import format_time_seconds
+from src.stats import format_statistic
+
+
+class LifetimeStatistics(tk.Frame):
+
+    def __init__(self, top_level: tk.Toplevel, x: int, y: int):
+        super().__init__(top_level)
+        self.top_level = top_level
+        self.pack(padx=10, pady=10, expand=True)
+
+        self.top_level.title("Lifetime Statistics")
+        self.top_level.geometry(f"+{x}+{y}")
+
+        self.aggregates: Dict[str, Aggregate] = {}
+
+        self.var_scramble_type = tk.StringVar(self, value="")
+        self.var_scramble_type.trace_add("write", lambda *_args: self.show_aggregate())
+        self.opt_scramble_type = tk.OptionMenu(self, self.var_scramble_type, "")
+        self.opt_scramble_type.grid(row=0, column=0, columnspan=2)
+
+        frm_numbers = tk.Frame(self)
+        frm_numbers.grid(row=1, column=0, sticky="n", padx=(0, 16), pady=(8, 0))
+
+        self.vars_numbers: Dict[str, tk.StringVar] = {}
+        for i, title in enumerate(["Sessions", "Solves", "Mean", "Best single", "Best ao5", "Best ao12"]):
+            tk.Label(frm_numbers, text=title, font="Times, 14").grid(row=i, column=0, sticky="w", padx=(0, 8))
+            self.vars_numbers[title] = tk.StringVar(frm_numbers, value="n/a")
+            tk.Label(frm_numbers, textvariable=self.vars_numbers[title], font="Times, 14").grid(row=i, column=1, sticky="w")
+
+        frm_months = tk.Frame(frm_numbers)
+        frm_months.grid(row=6, column=0, columnspan=2, pady=(12, 0))
+
+        tk.Label(frm_months, text="Monthly means", font="Times, 14").pack()
+
+        bar_months = tk.Scrollbar(frm_months, orient="vertical")
+        bar_months.pack(side="right", fill="y")
+
+        self.lst_months = tk.Listbox(frm_months, width=24, height=8, yscrollcommand=bar_months.set)
+        self.lst_months.pack(side="left", fill="both")
+        bar_months.configure(command=self.lst_months.yview)
+
+        self.cvs_histogram = tk.Canvas(self, width=420, height=300, borderwidth=0)
+        self.cvs_histogram.grid(row=1, column=1, pady=(8, 0))
+
+        tk.Button(self, text="Ok", command=self.top_level.destroy).grid(row=2, column=0, columnspan=2, pady=(12, 0))
+
+        # The sessions are read in the background, so that the window doesn't freeze
+        self.vars_numbers["Sessions"].set("reading...")
+        self.results: queue.Queue = queue.Queue()
+        threading.Thread(target=self.aggregate, daemon=True).start()
+        self.check_results()
+
+    def aggregate(self):
+        try:
+            self.results.put(aggregate_sessions())
+        except OSError as err:
+            self.results.put(err)
+
+    def check_results(self):
+        if not self.winfo_exists():  # The window was closed
+            return
+
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            self.after(100, self.check_results)
+            return
+
+        if isinstance(result, Exception):
+            messagebox.showerror("Statistics Failure", "Could not read the sessions folder.", parent=self.top_level)
+            self.vars_numbers["Sessions"].set("n/a")
+            return
+
+        if not result:
+            messagebox.showinfo("No Sessions", "There are no sessions yet.", parent=self.top_level)
+            self.vars_numbers["Sessions"].set("0")
+            return
+
+        # Known types first, in the order of the menu
+        self.aggregates = {scramble_type: result[scramble_type] for scramble_type in PUZZLE_TYPES
+                           if scramble_type in result}
+        self.aggregates.update(result)
+
+        menu = self.opt_scramble_type["menu"]
+        menu.delete(0, "end")
+        for scramble_type in self.aggregates:
+            menu.add_command(label=scramble_type, command=lambda value=scramble_type: self.var_scramble_type.set(value))
+
+        self.var_scramble_type.set(next(iter(self.aggregates)))
+
+    def show_aggregate(self):
+        aggregate = self.aggregates.get(self.var_scramble_type.get())
+        if aggregate is None:
+            return
+
+        self.vars_numbers["Sessions"].set(str(aggregate.session_count))
+        self.vars_numbers["Solves"].set(str(aggregate.solve_count))
+        self.vars_numbers["Mean"].set(format_statistic(aggregate.mean))
+        self.vars_numbers["Best single"].set(_format_best(aggregate.best_single, aggregate.best_single_session))
+        self.vars_numbers["Best ao5"].set(_format_best(aggregate.best_ao5, aggregate.best_ao5_session))
+        self.vars_numbers["Best ao12"].set(_format_best(aggregate.best_ao12, aggregate.best_ao12_session))
+
+        self.lst_months.delete(0, "end")
+        for month, mean in reversed(aggregate.monthly_means()):  # Newest first
+            self.lst_months.insert("end", f"{month}  -  {format_time_seconds(mean)}")
+
+        self.draw_histogram(aggregate)
+
+    def draw_histogram(self, aggregate: Aggregate):
+        self.cvs_histogram.delete("all")
+
+        if not aggregate.histogram:
+            return
+
+        width = int(self.cvs_histogram["width"])
+        height = int(self.cvs_histogram["height"])
+        bottom = height - 20
+
+        first = min(aggregate.histogram)
+        last = max(aggregate.histogram)
+        largest = max(aggregate.histogram.values())
+        bar_width = width / (last - first + 1)
+
+        for bucket, count in aggregate.histogram.items():
+            left = (bucket - first) * bar_width
+            top = bottom - (bottom - 10) * count / largest
+            self.cvs_histogram.create_rectangle(left, top, left + bar_width, bottom, fill="gray")
+
+        self.cvs_histogram.create_text(0, height - 4, anchor="sw", text=format_time_seconds(first * HISTOGRAM_BUCKET))
+        self.cvs_histogram.create_text(width, height - 4, anchor="se",
+                                       text=format_time_seconds((last + 1) * HISTOGRAM_BUCKET))
+
+
+def _format_best(time_: Optional[float], session_name: str) -> str:
+    return f"{format_statistic(time_)} ({session_name})" if time_ is not None else "n/a"
@@ -1,40 +1,79 @@
 import logging
+import argparse
+import json
+import queue
+import random
 import time
 import threading
-import datetime
-import copy
 import webbrowser
+import dataclasses
 import sys
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 from typing import Optional, List
 from os.path import join
 
 import src.globals
-from src.timer import Timer, interpret_time_in_seconds, format_time_seconds, DEFAULT_READY_COLOR, DEFAULT_INSPECTION_COLOR
-from src.scramble import generate_3x3x3_scramble, generate_4x4x4_scramble, generate_2x2x2_scramble
-from src.session import create_new_session, dump_data, SessionData, Solve, remember_last_session, get_last_session, \
-    load_session_data, remove_solve_out_of_session, rename_session, destroy_session, backup_session, \
-    FileCorruptedError, SameFileError, change_type
+from src.timer import Timer, format_time_seconds
+from src.scramble import generate_scramble, PUZZLE_TYPES, DEFAULT_SCRAMBLE_TYPE
+from src.seed import new_seed
+from src.session import SessionData, Solve, remember_last_session, get_last_session, load_session_data, \
+    destroy_session, FileCorruptedError, SameFileError, SESSIONS_PATH, read_session_tail, LAZY_LOAD_SIZE, MAX_SOLVES
+from src.core import TimerSession, SessionEvent, SOLVE_ADDED, SOLVE_REMOVED, PENALTY_CHANGED, STATISTICS_CHANGED, \
+    SOLVES_LOADED, RENAMED, SAVE_FAILED, SAVE_SOLVE, REMOVE_SOLVE, SAVE_PENALTY, SAVE_TYPE, RENAME, \
+    SessionFullError
 from src.select_session import SelectSession, Mode
 from src.settings import Settings, get_settings
-from src.data import data_folder_exists, recreate_data_folder, DEFAULT_BACKGROUND_COLOR, DEFAULT_TIMER_SIZE, \
-    DEFAULT_SCRAMBLE_SIZE
+from src.data import data_folder_exists, recreate_data_folder, settings_store, SettingsConfig
 from src.about import About
 from src.plot import plot
 from src.inspect_solve import InspectSolve
-from src.settings import SettingsConfig
-
-logging.basicConfig(level=logging.DEBUG, format="%(levelname)s:%(lineno)d:%(message)s")
-if not __debug__:
-    logging.disable()
+from src.cube_net import CubeNet
+from src.backup import BackupWorker
+from src.writer import SessionWriter
+from src.session_cache import SessionCache
+from src.watcher import SessionWatcher
+from src.station import StationClient
+from src.archive import RetentionPolicy, archive_path
+from src.restore_backup import RestoreBackup
+from src.stats import calculate_ao5, calculate_ao12, format_result, format_statistic
+from src.lifetime_statistics import LifetimeStatistics
+from src.catalog import CatalogEntry, get_entry
+from src.atomic import recover_files
+from src.transfer import import_cstimer, import_csv, import_binary, export_cstimer, export_csv, export_binary, \
+    InvalidFileError
+from src.binary_session import BINARY_EXTENSION
+from src.diagnostics import Diagnostics
+from src.instrument import span
+import src.instrument as instrument
+
+
+@dataclasses.dataclass
+class SolveList:
+    """
+    The left list of a session that was put away, as it was left.
+
+    """
+
+    frm_indices: tk.Frame
+    frm_solves: tk.Frame
+    btn_more: Optional[tk.Button]
+    solve_index: int
+    solves_unshown: int
+
+    def destroy(self):
+        self.frm_indices.destroy()
+        self.frm_solves.destroy()
+        if self.btn_more is not None:
+            self.btn_more.destroy()
 
 
 class MainApplication(tk.Frame):
 
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, station: Optional[StationClient] = None):
         super().__init__(root)
         self.root = root
+        self.station = station  # Sends the solves to the competition server, if there is one
         self.pack(fill="both", expand=True)
         self.columnconfigure(0, weight=0)
         self.columnconfigure(1, weight=1)
@@ -59,7 +98,11 @@ class MainApplication(tk.Frame):
         men_file.add_command(label="New Session", command=self.new_session)
         men_file.add_command(label="Open Session", command=self.open_session)
         men_file.add_command(label="See Statistics", command=self.see_statistics)
+        men_file.add_command(label="Lifetime Statistics", command=self.lifetime_statistics)
         men_file.add_command(label="Backup Session Now", command=self.backup_session_now)
+        men_file.add_command(label="Restore Backup", command=self.restore_backup)
+        men_file.add_command(label="Import Sessions", command=self.import_sessions)
+        men_file.add_command(label="Export Session", command=self.export_session)
         men_file.add_command(label="Exit", command=self.exit)
 
         men_edit = tk.Menu(self)
@@ -71,6 +114,7 @@ class MainApplication(tk.Frame):
         men_help = tk.Menu(self)
         men_help.add_command(label="Info", command=self.info)
         men_help.add_command(label="About", command=self.about)
+        men_help.add_command(label="Diagnostics", command=self.diagnostics)
 
         men_main = tk.Menu(self)
         men_main.add_cascade(label="File", menu=men_file)
@@ -92,30 +136,31 @@ class MainApplication(tk.Frame):
         self.frm_event = tk.Frame(self, relief="ridge", bd=3, height=33)
         self.frm_event.grid(row=2, column=1, sticky="wes")
 
-        # Get settings from data
-        error = False
+        # Check for data folder
+        if not data_folder_exists():
+            logging.error("The data folder is missing")
+            messagebox.showerror("No Data folder", "The data folder is missing.", parent=self.root)
+            recreate_data_folder()
+        else:
+            # Repair files broken by a crash while they were written
+            recovered = recover_files(["data", SESSIONS_PATH])
+            if recovered:
+                messagebox.showwarning("Recovered Files", "These files were damaged and were restored from their "
+                                       "previous version:\n" + "\n".join(recovered), parent=self.root)
 
+        # Read the settings; they are kept in memory from now on
         try:
-            settings_config = get_settings()
-            self.foreground_color = settings_config.foreground_color
+            get_settings()
         except FileNotFoundError:
             messagebox.showerror("Data Error", "The data file is missing.", parent=self.root)
-            error = True
         except FileCorruptedError:
             messagebox.showerror("Data Error", "The data file is corrupted.", parent=self.root)
-            error = True
         except KeyError:
             messagebox.showerror("Data Error", "Missing entry in data file.", parent=self.root)
-            error = True
 
-        if error:
-            settings_config = SettingsConfig(timer_size=DEFAULT_TIMER_SIZE, scramble_size=DEFAULT_SCRAMBLE_SIZE,
-                                             enable_inspection=True, background_color=DEFAULT_BACKGROUND_COLOR,
-                                             foreground_color="#000000", enable_backup=False, backup_path="",
-                                             ready_color=DEFAULT_READY_COLOR, inspection_color=DEFAULT_INSPECTION_COLOR)
-            self.foreground_color = settings_config.foreground_color
+        settings_config = settings_store.settings  # The defaults, if the data file was recreated
+        self.foreground_color = settings_config.foreground_color
 
-        # noinspection PyUnboundLocalVariable
         self.root.tk_setPalette(background=settings_config.background_color, foreground=self.foreground_color)
 
         # Scramble area
@@ -123,17 +168,29 @@ class MainApplication(tk.Frame):
         frm_scramble_buttons.pack()
 
         # Needed by the OptionMenu below
-        self.var_scrtype = tk.StringVar(frm_scramble_buttons, value="3x3x3")  # Default is this, but it may be set after load
+        self.var_scrtype = tk.StringVar(frm_scramble_buttons, value=DEFAULT_SCRAMBLE_TYPE)  # It may be set after load
 
-        tk.OptionMenu(frm_scramble_buttons, self.var_scrtype, "3x3x3", "4x4x4", "2x2x2",
+        tk.OptionMenu(frm_scramble_buttons, self.var_scrtype, *PUZZLE_TYPES,
                       command=self.on_scramble_type_change).grid(row=0, column=0)
 
         tk.Button(frm_scramble_buttons, text="Generate Next", command=self.generate_next_scramble).grid(row=0, column=1)
 
-        self.var_scramble = tk.StringVar(frm_scramble, value=generate_3x3x3_scramble())  # It may be set later after load
+        # Seed of the current scramble, saved with the solve
+        self.scramble_seed = 0
+
+        self.var_scramble = tk.StringVar(frm_scramble, value=generate_scramble(DEFAULT_SCRAMBLE_TYPE,
+                                                                               self.next_scramble_rng()))  # It may be set later after load
+
+        self.cvs_cube_net = CubeNet(frm_scramble)
+        self.cvs_cube_net.pack(side="right", padx=(0, 6), pady=(0, 6))
+
         self.lbl_scramble = tk.Label(frm_scramble, textvariable=self.var_scramble, font=f"Times, {settings_config.scramble_size}")
         self.lbl_scramble.pack()
 
+        # Redraw the net on every new scramble
+        self.var_scramble.trace_add("write", lambda *_args: self.show_cube_net())
+        self.show_cube_net()
+
         frm_scramble.bind("<Configure>", self.on_window_resize)
 
         # Left side area
@@ -185,11 +242,17 @@ class MainApplication(tk.Frame):
         lbl_best_ao12 = tk.Label(frm_statistics, textvariable=self.var_best_ao12, font="Times, 14")
         lbl_best_ao12.grid(row=3, column=2)
 
-        # Session mean
-        self.var_session_mean = tk.StringVar(frm_left_side, value="n/a")
-        lbl_session_mean = tk.Label(frm_left_side, textvariable=self.var_session_mean, font="Times, 20")
+        # Session mean, median and standard deviation
+        frm_session = tk.Frame(frm_left_side)
+        frm_session.grid(row=2, column=0, pady=6)
 
-        lbl_session_mean.grid(row=2, column=0, pady=6)
+        self.var_session_mean = tk.StringVar(frm_session, value="n/a")
+        lbl_session_mean = tk.Label(frm_session, textvariable=self.var_session_mean, font="Times, 20")
+        lbl_session_mean.pack()
+
+        self.var_session_spread = tk.StringVar(frm_session, value="")
+        lbl_session_spread = tk.Label(frm_session, textvariable=self.var_session_spread, font="Times, 12")
+        lbl_session_spread.pack()
 
         # Times
         frm_times = tk.Frame(frm_left_side)
@@ -228,11 +291,10 @@ class MainApplication(tk.Frame):
         # self.frm_ao12.grid(row=0, column=3)
 
         self.solve_index = 1  # Next solve index to be added (last one in the list + 1)
-        self.MAX_SOLVES = 9997
+        self.MAX_SOLVES = MAX_SOLVES
 
-        # These two are used in the logic for loading more solves; they don't need to be updated when a solve is removed
-        self.solves_loaded = 0
-        self.SOLVES_ON_LOAD: Optional[List[Solve]] = None
+        # The oldest solves of the session, which are not in the list yet; they are never removed, while not shown
+        self.solves_unshown = 0
 
         self.btn_more: Optional[tk.Button] = None
 
@@ -261,27 +323,44 @@ class MainApplication(tk.Frame):
         self.last_press_time = 0.0
         self.last_release_time = 0.0
 
-        # Data class to hold a session
-        self.session_data: Optional[SessionData] = None
+        # The session in use, with its statistics; the window is updated by its events
+        self.session: Optional[TimerSession] = None
+
+        # The sessions used lately, for switching back to them right away
+        self.session_cache = SessionCache(on_evict=SolveList.destroy)
 
         # Backup settings
         self.enable_backup = settings_config.enable_backup
         self.backup_path = settings_config.backup_path
+        self.backup_policy = RetentionPolicy(settings_config.backup_keep_last, settings_config.backup_keep_daily,
+                                             settings_config.backup_keep_monthly)
 
-        # Check for data folder
-        if not data_folder_exists():
-            logging.error("The data folder is missing")
-            messagebox.showerror("No Data folder", "The data folder is missing.", parent=self.root)
-            recreate_data_folder()
+        # The session files are written in the background and the failures are checked periodically
+        self.writer = SessionWriter()
+        self.check_write_failures()
+
+        # Backups are done in the background and their results are checked periodically
+        self.backup_worker = BackupWorker()
+        self.check_backup_results()
 
-        # Load session; sets session_data variable
+        # Other programs and stations might append solves to the session file; they are merged when noticed
+        self.watcher = SessionWatcher()
+        self.session_file_changed = False
+        self.check_session_file()
+
+        settings_store.subscribe(self.apply_settings)
+
+        # Load session; sets session variable
         self.load_last_session()
 
     def frame_configure(self):
         self.cvs_times.configure(scrollregion=self.cvs_times.bbox("all"))
 
     def on_window_resize(self, event):
-        self.lbl_scramble.configure(wraplength=event.width)
+        self.lbl_scramble.configure(wraplength=event.width - self.cvs_cube_net.winfo_reqwidth() - 6)
+
+    def show_cube_net(self):
+        self.cvs_cube_net.show(self.var_scrtype.get(), self.var_scramble.get())
 
     def on_key_press(self, event):
         if self.timer.is_running() and not self.timer.is_inspecting():
@@ -292,13 +371,13 @@ class MainApplication(tk.Frame):
 
         if not self.timer.is_running() or self.timer.is_inspecting():
             if event.char == " ":
-                if self.session_data is not None:
+                if self.session is not None:
                     if not self.stopped_timer:
                         self.change_timer_color(self.timer_ready_color)
 
     def on_key_release(self, event):
         if event.char == " ":
-            if self.session_data is None:
+            if self.session is None:
                 messagebox.showerror("No Session", "Please select or create a new session to use the timer.",
                                      parent=self.root)
                 return
@@ -328,24 +407,10 @@ class MainApplication(tk.Frame):
         self.change_timer_color(self.foreground_color)
 
     def on_scramble_type_change(self, value: str):
-        if value == "3x3x3":
-            self.var_scramble.set(generate_3x3x3_scramble())
-        elif value == "4x4x4":
-            self.var_scramble.set(generate_4x4x4_scramble())
-        elif value == "2x2x2":
-            self.var_scramble.set(generate_2x2x2_scramble())
-
-        try:
-            self.session_data.scramble_type = value
-        except AttributeError:  # It is None
-            return
+        self.var_scramble.set(generate_scramble(value, self.next_scramble_rng()))
 
-        try:
-            change_type(self.session_data.name + ".json", value)
-        except FileCorruptedError:
-            logging.error("Could not save the scramble type, because the session file is corrupted")
-            messagebox.showerror("Saving Failure", "Could not save the scramble type, "
-                                 "because the session file is corrupted.", parent=self.root)
+        if self.session is not None:
+            self.session.change_type(value)
 
     def show_event(self, text: str):
         label = tk.Label(self.frm_event, text=text, font="Times, 14")
@@ -358,69 +423,36 @@ class MainApplication(tk.Frame):
         self.frm_event.configure(height=33)
 
     def generate_next_scramble(self):
-        if self.var_scrtype.get() == "3x3x3":  # var_scrtype cannot be empty
-            self.var_scramble.set(generate_3x3x3_scramble())
-        elif self.var_scrtype.get() == "4x4x4":
-            self.var_scramble.set(generate_4x4x4_scramble())
-        elif self.var_scrtype.get() == "2x2x2":
-            self.var_scramble.set(generate_2x2x2_scramble())
+        # var_scrtype is always a registered type
+        with span("scramble"):
+            self.var_scramble.set(generate_scramble(self.var_scrtype.get(), self.next_scramble_rng()))
+
+    def next_scramble_rng(self) -> random.Random:
+        self.scramble_seed = new_seed()
+        return random.Random(self.scramble_seed)
 
     def change_timer_color(self, color: str):
         self.lbl_time.configure(foreground=color)
 
     def save_solve_in_session(self, solve_time: str):  # solve_time is already formatted
-        assert self.session_data is not None
+        assert self.session is not None
 
-        if self.solve_index >= self.MAX_SOLVES:
+        if self.session.is_full():
             messagebox.showerror("Saving Failure", "Could not save the solve, because the "
                                  "amount of solves per session was exceeded.", parent=self.root)
             return
 
-        # Update left GUI list
-        tk.Label(self.frm_indices, text=f"{self.solve_index}. ", font="Times, 14") \
-            .grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")
-
-        lbl_solve = tk.Label(self.frm_solves, text=f"{solve_time}", font="Times, 14")
-        lbl_solve.grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")
-        lbl_solve.bind("<Button-1>", lambda _event, index=self.solve_index: self.inspect_solve(index))  # A bit hacky
-
-        self.solve_index += 1
+        self.session.add_solve(solve_time, self.var_scramble.get(), self.scramble_seed)  # Shown by the events
 
-        if self.solve_index >= self.MAX_SOLVES:
+        if self.session.is_full():
             messagebox.showinfo("Session Ended", "The maximum amount of solves per session has exceeded. "
                                 "This session is done.", parent=self.root)
-            return
-
-        date = str(datetime.datetime.now())
-        scramble = self.var_scramble.get()
-
-        # Update list
-        self.session_data.solves.append(Solve(time=solve_time, scramble=scramble, date=date,
-                                              raw_time=interpret_time_in_seconds(solve_time)))
-
-        self.update_statistics(self.session_data, True)
-
-        assert self.session_data.name
-        try:
-            dump_data(self.session_data.name + ".json",
-                      Solve(solve_time, scramble, date, 0.0))  # dump_data doesn't care about raw_time anyway
-        except FileNotFoundError:
-            messagebox.showerror("Saving Failure", "Could not save the solve in session, because the file is missing.",
-                                 parent=self.root)
-        except FileCorruptedError:
-            messagebox.showerror("Saving Failure", "Could not save the solve, because the file is corrupted.",
-                                 parent=self.root)
-        except KeyError:
-            messagebox.showerror("Saving Failure", "Could not save the solve, because there is a missing key in the file.",
-                                 parent=self.root)
-        else:
-            logging.info("Saved solve")
 
         # Generate new scramble
         self.generate_next_scramble()
 
         # Backup the session, if appropriate
-        if len(self.session_data.solves) % 5 == 0:  # Magic number :O
+        if len(self.session.solves) % 5 == 0:  # Magic number :O
             if self.enable_backup:
                 self.backup_session()
 
@@ -433,9 +465,13 @@ class MainApplication(tk.Frame):
         -1 is handled separately; don't put negative numbers except for -1.
 
         """
-        assert self.session_data is not None
+        assert self.session is not None
+
+        if self.session.pending:
+            messagebox.showinfo("Loading Session", "Please wait until the session is loaded.", parent=self.root)
+            return False
 
-        if not self.session_data.solves:
+        if not self.session.solves:
             messagebox.showinfo("No Solves", "There are no solves in this session.", parent=self.root)
             return False
 
@@ -445,100 +481,126 @@ class MainApplication(tk.Frame):
                                    parent=self.root if parent is None else parent):
             return False
 
+        self.session.remove_solve(index)  # Shown by the events
+
+        return True
+
+    def set_solve_penalty(self, index: int, penalty: str, parent: tk.Toplevel) -> bool:
+        """
+        index is from 1 to 9997.
+
+        """
+        assert self.session is not None
+
+        if self.session.pending:
+            messagebox.showinfo("Loading Session", "Please wait until the session is loaded.", parent=parent)
+            return False
+
+        self.session.set_penalty(index, penalty)  # Shown by the events
+
+        return True
+
+    def on_session_event(self, event: SessionEvent):
+        if event.kind == SOLVE_ADDED:
+            self.show_added_solve(event.solve)
+        elif event.kind == SOLVE_REMOVED:
+            self.hide_removed_solve(event.index)
+        elif event.kind == PENALTY_CHANGED:
+            # Update the solve in the left GUI list, if it's shown
+            for label in self.frm_solves.grid_slaves(row=self.MAX_SOLVES - event.index):
+                label.configure(text=format_result(event.solve.raw_time, event.solve.penalty))
+        elif event.kind == STATISTICS_CHANGED:
+            self.show_statistics(event.new_bests)
+        elif event.kind == SOLVES_LOADED:
+            if self.solves_unshown:
+                self.btn_more = tk.Button(self.frm_canvas_frame, text="More", command=self.load_more_solves)
+                self.btn_more.grid(row=1, column=0, columnspan=2)
+
+            logging.info(f'Loaded all {len(self.session.solves)} solves of session "{self.session.name}"')
+        elif event.kind == RENAMED:
+            self.var_session_name.set(self.session.name)
+            self.watcher.watch(self.session.name + ".json")
+        elif event.kind == SAVE_FAILED:
+            self.show_save_failure(event)
+
+    def show_added_solve(self, solve: Solve):
         # Update left GUI list
-        # Search for the last widget in the list (the lowest row) and destroy it
-        time_labels = self.frm_solves.winfo_children()
-        index_labels = self.frm_indices.winfo_children()
-        assert time_labels
-        assert index_labels
+        with span("render"):
+            tk.Label(self.frm_indices, text=f"{self.solve_index}. ", font="Times, 14") \
+                .grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")
 
-        rows = map(lambda widget: widget.grid_info()["row"], time_labels)
-        time_row_widget_dict = {row: widget for row, widget in zip(rows, time_labels)}
-        time_lowest_widget_row = min(time_row_widget_dict.keys())
+            lbl_solve = tk.Label(self.frm_solves, text=format_result(solve.raw_time, solve.penalty), font="Times, 14")
+            lbl_solve.grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")
+            lbl_solve.bind("<Button-1>", lambda _event, index=self.solve_index: self.inspect_solve(index))  # A bit hacky
 
-        rows = map(lambda widget: widget.grid_info()["row"], index_labels)
-        index_row_widget_dict = {row: widget for row, widget in zip(rows, index_labels)}
-        index_lowest_widget_row = min(index_row_widget_dict.keys())
+        self.solve_index += 1
 
-        if index == -1:
-            time_row_widget_dict[time_lowest_widget_row].destroy()
-            index_row_widget_dict[index_lowest_widget_row].destroy()
-        else:
-            time_row_widget_dict[self.MAX_SOLVES - index].destroy()
-            index_row_widget_dict[self.MAX_SOLVES - index].destroy()
+        if self.session.statistics is None:  # The rest when all the solves are loaded
+            self.var_current_time.set(format_result(solve.raw_time, solve.penalty))
 
-        # Delete these, so that we don't get confused
-        del index_row_widget_dict, time_row_widget_dict, rows, index_lowest_widget_row, time_lowest_widget_row, \
-            index_labels, time_labels
+    def hide_removed_solve(self, index: int):
+        """
+        index is from 1 to 9997, of the solve that was removed.
+
+        """
+        # Update left GUI list
+        for label in self.frm_solves.grid_slaves(row=self.MAX_SOLVES - index):
+            label.destroy()
+        for label in self.frm_indices.grid_slaves(row=self.MAX_SOLVES - index):
+            label.destroy()
 
         self.solve_index -= 1
 
-        # Update list
-        if index == -1:
-            del self.session_data.solves[-1]
-        else:
-            del self.session_data.solves[index - 1]
+        # Fix indexing when deleting a solve from the middle
+        index_labels = self.frm_indices.winfo_children()
+        rows = map(lambda widget: widget.grid_info()["row"], index_labels)
+        row_widget_dict = {row: widget for row, widget in zip(rows, index_labels)}
+        for i in range(0, len(self.session.solves) - index + 1):
+            label: tk.Label = row_widget_dict[self.MAX_SOLVES - index - i - 1]
 
-        if self.session_data.solves:
-            self.update_statistics(self.session_data, False)
+            number_str = label["text"].rstrip(". ")
+            index_text = str(int(number_str) - 1) + ". "
+            label.configure(text=index_text)
 
-        # Fix indexing when deleting a solve from the middle
-        if index != -1:
-            index_labels = self.frm_indices.winfo_children()
-            rows = map(lambda widget: widget.grid_info()["row"], index_labels)
-            row_widget_dict = {row: widget for row, widget in zip(rows, index_labels)}
-            for i in range(0, len(self.session_data.solves) - index + 1):
-                label: tk.Label = row_widget_dict[self.MAX_SOLVES - index - i - 1]
-
-                number_str = label["text"].rstrip(". ")
-                index_text = str(int(number_str) - 1) + ". "
-                label.configure(text=index_text)
-
-                current_row = label.grid_info()["row"]
-                current_column = label.grid_info()["column"]
-                label.grid(row=current_row + 1, column=current_column)
-
-            time_labels = self.frm_solves.winfo_children()
-            rows = map(lambda widget: widget.grid_info()["row"], time_labels)
-            row_widget_dict = {row: widget for row, widget in zip(rows, time_labels)}
-            actual_index = index
-            for i in range(0, len(self.session_data.solves) - index + 1):
-                label: tk.Label = row_widget_dict[self.MAX_SOLVES - index - i - 1]
-
-                label.bind("<Button-1>", lambda _event, ind=actual_index: self.inspect_solve(ind))
-                actual_index += 1
-
-                current_row = label.grid_info()["row"]
-                current_column = label.grid_info()["column"]
-                label.grid(row=current_row + 1, column=current_column)
-
-        # Update these which don't always show
-        if len(self.session_data.solves) < 5:
-            self.var_current_ao5.set("n/a")
-            self.var_best_ao5.set("n/a")
-        elif len(self.session_data.solves) < 12:
-            self.var_current_ao12.set("n/a")
-            self.var_best_ao12.set("n/a")
-
-        if not self.session_data.solves:
-            self.var_current_time.set("n/a")
-            self.var_best_time.set("n/a")
-            self.var_session_mean.set("n/a")
+            current_row = label.grid_info()["row"]
+            current_column = label.grid_info()["column"]
+            label.grid(row=current_row + 1, column=current_column)
 
-        assert self.session_data.name
-        try:
-            remove_solve_out_of_session(self.session_data.name + ".json", index)
-        except FileNotFoundError:
-            messagebox.showerror("Saving Failure", "Could not remove the solve from the session, "
-                                 "because the file is missing.", parent=self.root)
-        except FileCorruptedError:
-            messagebox.showerror("Saving Failure", "Could not remove the solve, because the file is corrupted.",
-                                 parent=self.root)
-        except KeyError:
-            messagebox.showerror("Saving Failure", "Could not remove the solve, because there is a missing key in the file.",
-                                 parent=self.root)
+        time_labels = self.frm_solves.winfo_children()
+        rows = map(lambda widget: widget.grid_info()["row"], time_labels)
+        row_widget_dict = {row: widget for row, widget in zip(rows, time_labels)}
+        actual_index = index
+        for i in range(0, len(self.session.solves) - index + 1):
+            label: tk.Label = row_widget_dict[self.MAX_SOLVES - index - i - 1]
+
+            label.bind("<Button-1>", lambda _event, ind=actual_index: self.inspect_solve(ind))
+            actual_index += 1
+
+            current_row = label.grid_info()["row"]
+            current_column = label.grid_info()["column"]
+            label.grid(row=current_row + 1, column=current_column)
+
+    def show_save_failure(self, event: SessionEvent):
+        what = {
+            SAVE_SOLVE: "save the solve",
+            REMOVE_SOLVE: "remove the solve from the session",
+            SAVE_PENALTY: "save the penalty",
+            SAVE_TYPE: "save the scramble type",
+            RENAME: "rename the session"
+        }[event.operation]
+
+        if isinstance(event.error, FileCorruptedError):
+            reason = "the file is corrupted"
+        elif isinstance(event.error, FileNotFoundError):
+            reason = "the file is missing"
+        elif isinstance(event.error, KeyError):
+            reason = "there is a missing key in the file"
+        else:
+            logging.error(f"Unexpected saving error: {event.error}")
+            reason = "the file could not be written"
 
-        return True
+        messagebox.showerror("Rename Failure" if event.operation == RENAME else "Saving Failure",
+                             f"Could not {what}, because {reason}.", parent=self.root)
 
     def rename_this_session(self):
         top_level = tk.Toplevel(self.root)
@@ -546,19 +608,11 @@ class MainApplication(tk.Frame):
                       self.root.winfo_y() + 50)
 
     def rename_session(self, name: str):
-        try:
-            rename_session(self.session_data.name, name)
-        except FileNotFoundError:
-            messagebox.showerror("Rename Failure", "Could not rename the session, because the file is missing.",
-                                 parent=self.root)
-            return
-
-        self.session_data.name = name
-        self.var_session_name.set(name)
-        logging.info(f'Renamed session to "{name}"')
+        self.session_cache.discard(name)  # Its file is overwritten
+        self.session.rename(name)  # Shown by the events
 
     def delete_this_session(self):
-        if self.session_data is None:
+        if self.session is None:
             messagebox.showerror("No Session", "There is no session selected.", parent=self.root)
             return
 
@@ -569,22 +623,18 @@ class MainApplication(tk.Frame):
             # Clear first
             self.clear_left_UI()
 
+            self.writer.flush()  # Or the file would be written again
+
             try:
-                destroy_session(self.session_data.name)
+                destroy_session(self.session.name)
             except FileNotFoundError:
                 messagebox.showerror("Deletion Failure", "Could not delete this session, "
                                      "because the file is missing (it's already deleted).", parent=self.root)
 
-            self.session_data = None
+            self.session = None
+            self.watcher.watch(None)
 
-            try:
-                remember_last_session("")  # Set last session as nothing
-            except FileNotFoundError:
-                messagebox.showerror("Saving Failure", "Could not remember last session, because the data file is missing.",
-                                     parent=self.root)
-            except FileCorruptedError:
-                messagebox.showerror("Saving Failure", "Could not remember last session, "
-                                     "because the data file is corrupted.", parent=self.root)
+            remember_last_session("")  # Set last session as nothing
 
     def check_to_save_in_session(self):
         if src.globals.can_save_solve_now:
@@ -594,108 +644,59 @@ class MainApplication(tk.Frame):
         self.after(700, self.check_to_save_in_session)
 
     def exit(self):
-        if self.session_data is None:
-            self.root.destroy()
-            return
-
-        try:
-            remember_last_session(self.session_data.name)
-        except FileNotFoundError:
-            messagebox.showerror("Saving Failure", "Could not remember last session, because the data file is missing.",
-                                 parent=self.root)
-        except FileCorruptedError:
-            messagebox.showerror("Saving Failure", "Could not remember last session, because the data file is corrupted.",
-                                 parent=self.root)
-        else:
-            logging.debug(f'Session remembered is "{self.session_data.name}"')
+        self.watcher.stop()
+        self.writer.stop()  # Before the backups, which it may still request
+        self.backup_worker.stop()
+        if self.station is not None:
+            self.station.stop()
 
-        self.root.destroy()
+        if self.session is not None:
+            remember_last_session(self.session.name)
+            logging.debug(f'Session remembered is "{self.session.name}"')
 
-    @staticmethod
-    def calculate_ao5(list_5: list) -> float:
-        smallest = min(list_5)
-        largest = max(list_5)
+        settings_store.flush()  # Write what is still pending
 
-        clone = copy.copy(list_5)
-        clone.remove(smallest)
-        clone.remove(largest)
-        return sum(clone) / 3
+        self.root.destroy()
 
-    @staticmethod
-    def calculate_ao12(list_12: list) -> float:
-        smallest = min(list_12)
-        largest = max(list_12)
+    def show_statistics(self, new_bests: Optional[list] = None):
+        """
+        new_bests are the bests that the last solve added made, for telling about them.
 
-        clone = copy.copy(list_12)
-        clone.remove(smallest)
-        clone.remove(largest)
-        return sum(clone) / 10
+        """
+        statistics = self.session.statistics
+        solves = self.session.solves
 
-    def update_statistics(self, session_data: SessionData, from_save: bool):
-        solves_raw = list(map(lambda solve: solve.raw_time, session_data.solves))
+        # Update mean, median and standard deviation
+        self.var_session_mean.set(format_statistic(statistics.mean))
+        logging.debug(f"Mean is {statistics.mean}")
 
-        # Update mean
-        mean = sum(solves_raw) / len(session_data.solves)
-        self.var_session_mean.set(format_time_seconds(mean))
-        logging.debug(f"Mean is {mean}")
+        spread = self.session.analysis.spread
+        if spread.median is not None:
+            self.var_session_spread.set(f"median {format_statistic(spread.median)}, "
+                                        f"σ {format_statistic(spread.std)}")
+        else:
+            self.var_session_spread.set("")
 
         # Update current time, current ao5 and current ao12
-        self.var_current_time.set(session_data.solves[-1].time)
-
-        ao5_list = solves_raw[-5:]
-        if len(ao5_list) >= 5:
-            ao5 = MainApplication.calculate_ao5(ao5_list)
-            self.var_current_ao5.set(format_time_seconds(ao5))
-            logging.debug(f"ao5 is {ao5}")
+        if solves:
+            last_solve = solves[-1]
+            self.var_current_time.set(format_result(last_solve.raw_time, last_solve.penalty))
+        else:
+            self.var_current_time.set("n/a")
 
-        ao12_list = solves_raw[-12:]
-        if len(ao12_list) >= 12:
-            ao12 = MainApplication.calculate_ao12(ao12_list)
-            self.var_current_ao12.set(format_time_seconds(ao12))
-            logging.debug(f"ao12 is {ao12}")
+        self.var_current_ao5.set(format_statistic(statistics.current_ao5))
+        self.var_current_ao12.set(format_statistic(statistics.current_ao12))
+        logging.debug(f"ao5 is {statistics.current_ao5}, ao12 is {statistics.current_ao12}")
 
         # Update best time, best ao5 and best ao12
-        best_time = min(solves_raw)
-        if from_save:
-            if self.var_best_time.get() != "n/a":
-                if best_time < interpret_time_in_seconds(self.var_best_time.get()):
-                    logging.debug(f"New PB of {format_time_seconds(best_time)}!")
-                    self.show_event(f"New PB of {format_time_seconds(best_time)}!")
-        self.var_best_time.set(format_time_seconds(best_time))
-
-        if len(ao5_list) >= 5:
-            averages = []
-            for i in range(len(solves_raw) - 4):
-                five = solves_raw[0 + i:5 + i]
-                averages.append(MainApplication.calculate_ao5(five))
-
-            best_ao5 = min(averages)
-            if from_save:
-                if self.var_best_ao5.get() != "n/a":
-                    if best_ao5 < interpret_time_in_seconds(self.var_best_ao5.get()):
-                        logging.debug(f"New ao5 best of {format_time_seconds(best_ao5)}!")
-                        self.show_event(f"New ao5 best of {format_time_seconds(best_ao5)}!")
-            self.var_best_ao5.set(format_time_seconds(best_ao5))
-            session_data.all_ao5 = averages  # Write to session data
-        else:
-            session_data.all_ao5.clear()
-
-        if len(ao12_list) >= 12:
-            averages = []
-            for i in range(len(solves_raw) - 11):
-                twelve = solves_raw[0 + i:12 + i]
-                averages.append(MainApplication.calculate_ao12(twelve))
-
-            best_ao12 = min(averages)
-            if from_save:
-                if self.var_best_ao12.get() != "n/a":
-                    if best_ao12 < interpret_time_in_seconds(self.var_best_ao12.get()):
-                        logging.debug(f"New ao12 best of {format_time_seconds(best_ao12)}!")
-                        self.show_event(f"New ao12 best of {format_time_seconds(best_ao12)}!")
-            self.var_best_ao12.set(format_time_seconds(best_ao12))
-            session_data.all_ao12 = averages  # Write to session data
-        else:
-            session_data.all_ao12.clear()
+        for kind, best in new_bests or []:
+            title = {"single": "PB", "ao5": "ao5 best", "ao12": "ao12 best"}[kind]
+            logging.debug(f"New {title} of {format_time_seconds(best)}!")
+            self.show_event(f"New {title} of {format_time_seconds(best)}!")
+
+        self.var_best_time.set(format_statistic(statistics.best_single))
+        self.var_best_ao5.set(format_statistic(statistics.best_ao5))
+        self.var_best_ao12.set(format_statistic(statistics.best_ao12))
 
     def load_last_session(self):
         try:
@@ -720,12 +721,16 @@ class MainApplication(tk.Frame):
 
     def settings(self):
         top_level = tk.Toplevel(self.root)
-        Settings(top_level, self.apply_settings,  self.root.winfo_x() + 50, self.root.winfo_y() + 50)
+        Settings(top_level, self.root.winfo_x() + 50, self.root.winfo_y() + 50)
 
     def about(self):
         top_level = tk.Toplevel(self.root)
         About(top_level, self.root.winfo_x() + 50, self.root.winfo_y() + 50)
 
+    def diagnostics(self):
+        top_level = tk.Toplevel(self.root)
+        Diagnostics(top_level, self.root.winfo_x() + 50, self.root.winfo_y() + 50)
+
     @staticmethod
     def info():
         webbrowser.open(join("info", "index.html"))
@@ -739,15 +744,24 @@ class MainApplication(tk.Frame):
         SelectSession(top_level, self.load_session, Mode.OPEN_SESSION, self.root.winfo_x() + 50, self.root.winfo_y() + 50)
 
     def see_statistics(self):
-        if self.session_data is None:
+        if self.session is None:
             messagebox.showinfo("No Session", "There is no session in use. Please select a session.", parent=self.root)
             return
 
-        if not self.session_data.solves:
+        if self.session.pending:
+            messagebox.showinfo("Loading Session", "Please wait until the session is loaded.", parent=self.root)
+            return
+
+        if not self.session.solves:
             messagebox.showinfo("No Solves", "There are no solves in this session.", parent=self.root)
             return
 
-        plot(self.session_data)
+        plot(self.session.session_data, self.session.analysis)
+
+    def lifetime_statistics(self):
+        self.writer.flush()  # The sessions are read from the files
+        top_level = tk.Toplevel(self.root)
+        LifetimeStatistics(top_level, self.root.winfo_x() + 50, self.root.winfo_y() + 50)
 
     def backup_session_now(self):
         if self.enable_backup:
@@ -758,33 +772,156 @@ class MainApplication(tk.Frame):
                                 parent=self.root)
 
     def backup_session(self):
+        if self.session is None:
+            messagebox.showerror("Backup Failure", "There is no session in use. Please select a session.",
+                                 parent=self.root)
+            return
+
         if self.backup_path:
+            # After the solves are written; the result is shown later by check_backup_results
+            file_name, folder_path, policy = self.session.name + ".json", self.backup_path, self.backup_policy
+            self.writer.call_after(lambda: self.backup_worker.request(file_name, folder_path, policy))
+            return  # Success, so don't continue messaging that backup is disabled
+        else:  # The string was empty
+            logging.error("Couldn't backup the session, because the path is not specified")
+            messagebox.showerror("No Backup Folder", "Couldn't backup the session, because "
+                                 "the path is not specified.", parent=self.root)
+            return
+
+    def restore_backup(self):
+        self.writer.flush()  # The session file might be replaced
+        if not self.backup_path or self.session is None:
+            path = None  # Let the user choose the archive
+        else:
+            path = archive_path(self.backup_path, self.session.name + ".json")
+
+        top_level = tk.Toplevel(self.root)
+        RestoreBackup(top_level, path, self.load_restored_session, self.root.winfo_x() + 50,
+                      self.root.winfo_y() + 50)
+
+    def load_restored_session(self, name: str):
+        self.session_cache.discard(name)  # The file might have its old modification time back
+        self.load_session(name)
+
+    def import_sessions(self):
+        file_path: str = filedialog.askopenfilename(parent=self.root, filetypes=[("csTimer export", "*.txt *.json"),
+                                                                                 ("CSV", "*.csv"),
+                                                                                 ("Binary session",
+                                                                                  "*" + BINARY_EXTENSION)])
+        if not file_path:  # The user cancelled
+            return
+
+        try:
+            if file_path.lower().endswith(".csv"):
+                names = import_csv(file_path, scramble_type=self.var_scrtype.get())
+            elif file_path.lower().endswith(BINARY_EXTENSION):
+                names = import_binary(file_path)
+            else:
+                names = import_cstimer(file_path)
+        except (InvalidFileError, json.decoder.JSONDecodeError) as err:
+            logging.error(f"Could not import {file_path}: {err}")
+            messagebox.showerror("Import Failure", "Could not import the file, because it's not a csTimer export, "
+                                 "a CSV file with time, scramble and date columns or a binary session file.",
+                                 parent=self.root)
+            return
+        except OSError as err:
+            logging.error(f"Could not import {file_path}: {err}")
+            messagebox.showerror("Import Failure", "Could not import the file, because it could not be read "
+                                 "or the session could not be written.", parent=self.root)
+            return
+
+        if not names:
+            messagebox.showinfo("Nothing Imported", "There were no solves in the file.", parent=self.root)
+            return
+
+        for name in names:
+            self.session_cache.discard(name)
+
+        self.show_event(f"Imported {', '.join(names)}.")
+
+    def export_session(self):
+        if self.session is None:
+            messagebox.showerror("No Session", "There is no session selected.", parent=self.root)
+            return
+
+        file_path: str = filedialog.asksaveasfilename(parent=self.root, initialfile=self.session.name + ".csv",
+                                                      filetypes=[("CSV", "*.csv"), ("csTimer export", "*.txt *.json"),
+                                                                 ("Binary session", "*" + BINARY_EXTENSION)])
+        if not file_path:  # The user cancelled
+            return
+
+        self.writer.flush()  # The session is read from the file
+
+        try:
+            if file_path.lower().endswith(".csv"):
+                export_csv(self.session.name, file_path)
+            elif file_path.lower().endswith(BINARY_EXTENSION):
+                export_binary([self.session.name], file_path)
+            else:
+                export_cstimer([self.session.name], file_path)
+        except json.decoder.JSONDecodeError:
+            messagebox.showerror("Export Failure", "Could not export the session, because the file is corrupted.",
+                                 parent=self.root)
+            return
+        except OSError as err:
+            logging.error(f"Could not export to {file_path}: {err}")
+            messagebox.showerror("Export Failure", "Could not export the session, because either the session "
+                                 "file is missing, or the destination is not writable.", parent=self.root)
+            return
+
+        self.show_event(f"Session exported to {file_path}.")
+
+    def check_write_failures(self):
+        for failure in self.writer.failures():
+            self.show_save_failure(SessionEvent(SAVE_FAILED, operation=failure.operation, error=failure.error))
+
+        self.after(500, self.check_write_failures)
+
+    def check_session_file(self):
+        if self.watcher.changed():
+            self.session_file_changed = True
+
+        # Once all the solves are loaded and this program's changes are written
+        if self.session_file_changed and self.session is not None and not self.session.pending \
+                and self.writer.flush(timeout=0):
+            self.session_file_changed = False
+
             try:
-                backup_session(self.session_data.name + ".json", self.backup_path)
-            except FileNotFoundError:
+                merged = self.session.merge_file_changes()
+            except SessionFullError:
+                logging.error(f'Solves appended to session "{self.session.name}" by someone else don\'t fit in it')
+                messagebox.showerror("Merging Failure", "Could not show the solves added to the session by someone "
+                                     "else, because the amount of solves per session was exceeded.", parent=self.root)
+            else:
+                if not merged:
+                    logging.info(f'Session "{self.session.name}" was changed by someone else; loading it again')
+                    self.load_session(self.session.name)
+
+        self.after(500, self.check_session_file)
+
+    def check_backup_results(self):
+        for result in self.backup_worker.results():
+            if result.error is None:
+                logging.info(f"Session backed up in {result.folder_path} ({result.bytes_written} bytes written)")
+                self.show_event(f"Session backed up in {result.folder_path}.")
+            elif isinstance(result.error, SameFileError):
+                messagebox.showerror("Backup Failure", "Couldn't backup the session, because the backup folder "
+                                     "is the sessions folder.", parent=self.root)
+            elif isinstance(result.error, FileNotFoundError):
                 messagebox.showerror("Backup Failure", "Couldn't backup the session, because the session file "
                                      "is missing or the destination path is invalid.", parent=self.root)
-                return
-            except SameFileError:
-                messagebox.showerror("Backup Failure", "Couldn't backup the session, because the backup folder "
-                                     "is the sessions folder.", parent=self.root)  # TODO maybe avoid this completely
-                return
-            except OSError:
+            elif isinstance(result.error, json.decoder.JSONDecodeError):
+                messagebox.showerror("Backup Failure", "Couldn't backup the session, because the session file "
+                                     "is corrupted.", parent=self.root)
+            elif isinstance(result.error, OSError):
                 messagebox.showerror("Backup Failure", "Couldn't backup the session, because the backup folder "
                                      "is not writable (permission denied).", parent=self.root)
-                return
-            except AttributeError:  # It is None
-                messagebox.showerror("Backup Failure", "There is no session in use. Please select a session.",
+            else:
+                logging.error(f"Unexpected backup error: {result.error}")
+                messagebox.showerror("Backup Failure", f"Couldn't backup the session: {result.error}",
                                      parent=self.root)
 
-            logging.info(f"Session backed up in {self.backup_path}")
-            self.show_event(f"Session backed up in {self.backup_path}.")
-            return  # Success, so don't continue messaging that backup is disabled
-        else:  # The string was empty
-            logging.error("Couldn't backup the session, because the path is not specified")
-            messagebox.showerror("No Backup Folder", "Couldn't backup the session, because "
-                                 "the path is not specified.", parent=self.root)
-            return
+        self.after(500, self.check_backup_results)
 
     def clear_left_UI(self):
         # Only these must be reset
@@ -801,34 +938,132 @@ class MainApplication(tk.Frame):
         self.var_best_ao5.set("n/a")
         self.var_best_ao12.set("n/a")
         self.var_session_mean.set("n/a")
+        self.var_session_spread.set("")
 
         self.solve_index = 1
-        self.solves_loaded = 0  # Technically not necessary
+        self.solves_unshown = 0
         self.var_time.set("0.00")
 
     def create_session(self, name: str):
+        self.writer.flush()  # The session might be overwritten
+
         try:
-            self.session_data = create_new_session(name, check_first=True)
+            session = TimerSession.create(name, check_first=True, writer=self.writer)
         except FileExistsError:
             if messagebox.askyesno("Session Already Exists", f'Session "{name}" already exists. '
                                    "Do you want to overwrite it?", parent=self.root):
-                self.session_data = create_new_session(name, check_first=False)
+                session = TimerSession.create(name, check_first=False, writer=self.writer)
             else:
                 return
 
+        self.put_away_session(name)
+        self.session_cache.discard(name)  # It might have been one put away before
+        self.use_session(session)
+
         # Fill session name
         self.var_session_name.set(name)
 
         self.clear_left_UI()
-        self.on_scramble_type_change(self.var_scrtype.get())  # Call this manually to write to the file and to session_data
+        self.on_scramble_type_change(self.var_scrtype.get())  # Call this manually to write to the file
+
+    def use_session(self, session: TimerSession):
+        session.subscribe(self.on_session_event)
+        if self.station is not None:
+            self.station.follow(session)
+        self.session = session
+        self.watcher.watch(session.name + ".json")
 
     def load_session(self, name: str):
-        session_data = load_session_data(name + ".json")
-        if session_data is None:
+        self.writer.flush()  # It might be this session again
+
+        cached = self.session_cache.take(name)
+        if cached is not None:
+            self.put_away_session(name)
+            self.show_cached_session(*cached)
+            return
+
+        # Big sessions show their last solves first and read the rest in the background
+        entry = get_entry(name)
+        if entry is not None and entry.size >= LAZY_LOAD_SIZE:
+            tail = read_session_tail(name + ".json", 40)
+            if tail is not None:
+                self.put_away_session(name)
+                self.load_session_lazily(name, entry, tail)
+                return
+
+        session = TimerSession.load(name, self.writer)
+        if session is None:
             messagebox.showerror("Loading Failure", f'Could not load session "{name}", because either it has missing data, '
                                  "or it is non-existent, or it is corrupted.", parent=self.root)
             return
 
+        self.put_away_session(name)
+        self.show_session(session)
+
+    def put_away_session(self, next_name: str = ""):
+        """
+        Keep the session in use with its list in the cache, hidden, and leave new empty frames for the next one.
+        Its changes must have been written already.
+
+        """
+        if self.session is None or self.session.pending:  # One that is still loading is simply left
+            return
+        if self.session.name == next_name:  # Loaded again, because it changed
+            return
+
+        self.frm_indices.grid_remove()
+        self.frm_solves.grid_remove()
+        if self.btn_more is not None:
+            self.btn_more.grid_remove()
+
+        solve_list = SolveList(self.frm_indices, self.frm_solves, self.btn_more, self.solve_index, self.solves_unshown)
+        self.session_cache.put(self.session, solve_list)
+
+        self.frm_indices = tk.Frame(self.frm_canvas_frame)
+        self.frm_indices.grid(row=0, column=0)
+        self.frm_solves = tk.Frame(self.frm_canvas_frame)
+        self.frm_solves.grid(row=0, column=1)
+        self.btn_more = None
+
+        self.session = None
+
+    def show_cached_session(self, session: TimerSession, solve_list: SolveList):
+        """
+        Show a session that was put away, with its list as it was left, without reading anything.
+
+        """
+        self.var_session_name.set(session.name)
+
+        self.clear_left_UI()
+        self.frm_indices.destroy()
+        self.frm_solves.destroy()
+        if self.btn_more is not None:
+            self.btn_more.destroy()
+
+        self.frm_indices = solve_list.frm_indices
+        self.frm_indices.grid()
+        self.frm_solves = solve_list.frm_solves
+        self.frm_solves.grid()
+        self.btn_more = solve_list.btn_more
+        if self.btn_more is not None:
+            self.btn_more.grid()
+        self.solve_index = solve_list.solve_index
+        self.solves_unshown = solve_list.solves_unshown
+
+        self.session = session  # It's subscribed to already
+        self.watcher.watch(session.name + ".json")
+
+        if session.solves:
+            self.show_statistics()
+
+        self.var_scrtype.set(session.session_data.scramble_type)
+        self.var_scramble.set(generate_scramble(session.session_data.scramble_type, self.next_scramble_rng()))
+
+        logging.debug(f'Session "{session.name}" shown from the cache')
+
+    def show_session(self, session: TimerSession):
+        session_data = session.session_data
+
         # Fill session name
         self.var_session_name.set(session_data.name)
 
@@ -837,67 +1072,133 @@ class MainApplication(tk.Frame):
 
         if len(session_data.solves) > 40:
             self.solve_index = len(session_data.solves) - 40 + 1
-            self.solves_loaded = 40
+            self.solves_unshown = len(session_data.solves) - 40
 
             self.btn_more = tk.Button(self.frm_canvas_frame, text="More", command=self.load_more_solves)
             self.btn_more.grid(row=1, column=0, columnspan=2)
         else:
-            # This is useless, because you can't load more solves anyway
-            self.solves_loaded = len(session_data.solves)
-
             # Do this, because btn_more might stick from the previous session list
             if self.btn_more is not None:
                 self.btn_more.destroy()
                 self.btn_more = None
 
-        self.SOLVES_ON_LOAD = copy.copy(session_data.solves)  # Only a shallow copy needed
-
         # Fill left GUI list
-        solve: Solve
-        for solve in session_data.solves[-40:]:
-            tk.Label(self.frm_indices, text=f"{self.solve_index}. ", font="Times, 14") \
-                .grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")  # TODO maybe should be -1
+        with span("render"):
+            solve: Solve
+            for solve in session_data.solves[-40:]:
+                tk.Label(self.frm_indices, text=f"{self.solve_index}. ", font="Times, 14") \
+                    .grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")  # TODO maybe should be -1
 
-            lbl_solve = tk.Label(self.frm_solves, text=f"{solve.time}", font="Times, 14")
-            lbl_solve.grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")  # TODO maybe should be -1
-            lbl_solve.bind("<Button-1>", lambda _event, index=self.solve_index: self.inspect_solve(index))  # A bit hacky
+                lbl_solve = tk.Label(self.frm_solves, text=format_result(solve.raw_time, solve.penalty),
+                                     font="Times, 14")
+                lbl_solve.grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")  # TODO maybe should be -1
+                lbl_solve.bind("<Button-1>", lambda _event, index=self.solve_index: self.inspect_solve(index))
 
-            self.solve_index += 1
+                self.solve_index += 1
+
+        self.use_session(session)
 
         # Fill statistics
         if session_data.solves:
-            self.update_statistics(session_data, False)
+            self.show_statistics()
 
         # Set this, so that it displays the correct scramble type on load
+        if session_data.scramble_type not in PUZZLE_TYPES:  # It may be any string...
+            logging.error(f'Unknown scramble type "{session_data.scramble_type}"')
+            session_data.scramble_type = DEFAULT_SCRAMBLE_TYPE
         self.var_scrtype.set(session_data.scramble_type)
-        if session_data.scramble_type == "4x4x4":
-            self.var_scramble.set(generate_4x4x4_scramble())
-        elif session_data.scramble_type == "2x2x2":
-            self.var_scramble.set(generate_2x2x2_scramble())
-        else:  # It may be any string...
-            self.var_scramble.set(generate_3x3x3_scramble())
+        self.var_scramble.set(generate_scramble(session_data.scramble_type, self.next_scramble_rng()))
+
+    def load_session_lazily(self, name: str, entry: CatalogEntry, tail: List[Solve]):
+        """
+        Show the last solves and the statistics from the catalog now; the rest of the solves are added, when
+        check_session_loaded finds them read.
+
+        """
+        self.var_session_name.set(name)
+        self.clear_left_UI()
+
+        # Do this, because btn_more might stick from the previous session list
+        if self.btn_more is not None:
+            self.btn_more.destroy()
+            self.btn_more = None
+
+        pending = entry.solve_count - len(tail)
+        self.solve_index = pending + 1
+        self.solves_unshown = pending  # The button comes when they are loaded
+
+        solve: Solve
+        for solve in tail:
+            tk.Label(self.frm_indices, text=f"{self.solve_index}. ", font="Times, 14") \
+                .grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")
 
-        self.session_data = session_data
+            lbl_solve = tk.Label(self.frm_solves, text=format_result(solve.raw_time, solve.penalty), font="Times, 14")
+            lbl_solve.grid(row=self.MAX_SOLVES - self.solve_index, column=0, sticky="w")
+            lbl_solve.bind("<Button-1>", lambda _event, index=self.solve_index: self.inspect_solve(index))  # A bit hacky
+
+            self.solve_index += 1
+
+        # The headline statistics; the rest come with all the solves
+        times = [solve.result for solve in tail]
+        if times:
+            self.var_current_time.set(format_result(tail[-1].raw_time, tail[-1].penalty))
+        if len(times) >= 5:
+            self.var_current_ao5.set(format_statistic(calculate_ao5(times[-5:])))
+        if len(times) >= 12:
+            self.var_current_ao12.set(format_statistic(calculate_ao12(times[-12:])))
+        for variable, value in ((self.var_best_time, entry.best_single), (self.var_best_ao5, entry.best_ao5),
+                                (self.var_best_ao12, entry.best_ao12), (self.var_session_mean, entry.mean)):
+            variable.set(format_statistic(value))
+
+        scramble_type = entry.scramble_type
+        if scramble_type not in PUZZLE_TYPES:  # It may be any string...
+            logging.error(f'Unknown scramble type "{scramble_type}"')
+            scramble_type = DEFAULT_SCRAMBLE_TYPE
+        self.var_scrtype.set(scramble_type)
+        self.var_scramble.set(generate_scramble(scramble_type, self.next_scramble_rng()))
+
+        # Solves done while loading are appended to these
+        session = TimerSession(SessionData(name, scramble_type, list(tail), [], []), pending, self.writer)
+        self.use_session(session)
+
+        results: queue.Queue = queue.Queue()
+        threading.Thread(target=lambda: results.put(load_session_data(name + ".json")), daemon=True).start()
+        self.check_session_loaded(session, results)
+
+    def check_session_loaded(self, session: TimerSession, results: queue.Queue):
+        try:
+            full_session_data: Optional[SessionData] = results.get_nowait()
+        except queue.Empty:
+            self.after(50, lambda: self.check_session_loaded(session, results))
+            return
+
+        if session is not self.session:  # Another session was loaded meanwhile, or it was deleted
+            return
+
+        if full_session_data is None:
+            messagebox.showerror("Loading Failure", f'Could not load all the solves of session "{session.name}", '
+                                 "because it has missing data or it is corrupted.", parent=self.root)
+            return
+
+        session.finish_loading(full_session_data)  # Shown by the events
 
     def load_more_solves(self):
-        solve_index = len(self.SOLVES_ON_LOAD) - self.solves_loaded
+        solve_index = self.solves_unshown
 
-        solves_loaded_now = 0
         solve: Solve
-        for solve in reversed(self.SOLVES_ON_LOAD[-self.solves_loaded - 40:-self.solves_loaded]):
+        for solve in reversed(self.session.solves[max(self.solves_unshown - 40, 0):self.solves_unshown]):
             tk.Label(self.frm_indices, text=f"{solve_index}. ", font="Times, 14") \
                 .grid(row=self.MAX_SOLVES - solve_index, column=0, sticky="w")
 
-            lbl_solve = tk.Label(self.frm_solves, text=f"{format_time_seconds(solve.raw_time)}", font="Times, 14")
+            lbl_solve = tk.Label(self.frm_solves, text=format_result(solve.raw_time, solve.penalty), font="Times, 14")
             lbl_solve.grid(row=self.MAX_SOLVES - solve_index, column=0, sticky="w")
             lbl_solve.bind("<Button-1>", lambda _event, index=solve_index: self.inspect_solve(index))  # A bit hacky
 
             solve_index -= 1
-            solves_loaded_now += 1
 
-        self.solves_loaded += solves_loaded_now
+        self.solves_unshown = solve_index
 
-        if self.solves_loaded == len(self.SOLVES_ON_LOAD):
+        if not self.solves_unshown:
             self.btn_more.destroy()
             self.btn_more = None
 
@@ -909,12 +1210,16 @@ class MainApplication(tk.Frame):
         self.foreground_color = settings_config.foreground_color
         self.enable_backup = settings_config.enable_backup
         self.backup_path = settings_config.backup_path
+        self.backup_policy = RetentionPolicy(settings_config.backup_keep_last, settings_config.backup_keep_daily,
+                                             settings_config.backup_keep_monthly)
         self.timer_ready_color = settings_config.ready_color
         self.timer_inspection_color = settings_config.inspection_color
 
     def inspect_solve(self, index: int):
         top_level = tk.Toplevel(self.root)
-        InspectSolve(top_level, index, self.session_data.solves[index - 1], self.remove_solve_out_of_session,
+        # The older solves of a session that is still loading are not there yet
+        InspectSolve(top_level, index, self.session.solves[index - 1 - self.session.pending],
+                     self.session.session_data.scramble_type, self.remove_solve_out_of_session, self.set_solve_penalty,
                      self.root.winfo_x() + 50, self.root.winfo_y() + 50)
 
     # Code copied from the internet and modified
@@ -936,7 +1241,32 @@ class MainApplication(tk.Frame):
         self.last_release_time = time.time()
 
 
-def main():
+def main(arguments: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="Py-Cube-Timer", description="A Rubik's cube timer")
+    parser.add_argument("--debug", action="store_true", help="log the debug messages too; they slow the timer down")
+    parser.add_argument("--diagnostics", action="store_true",
+                        help="record timings from the start, for the Diagnostics window")
+    parser.add_argument("--profile", metavar="FILE", help="profile the whole run with cProfile and write it to FILE")
+    parser.add_argument("--server", metavar="HOST[:PORT]",
+                        help="competition server to send the solves to; the competitor is the name of the session")
+    parser.add_argument("--station", default="", help="name of this station for the server; the default is the "
+                                                      "name of the computer")
+    args = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        format="%(levelname)s:%(lineno)d:%(message)s")
+    if not __debug__:
+        logging.disable()
+
+    instrument.enable(args.diagnostics)
+    if args.profile is not None:
+        instrument.start_profile()
+
+    station = StationClient(args.server, args.station) if args.server is not None else None
+
     root = tk.Tk()
-    MainApplication(root)
+    MainApplication(root, station)
     root.mainloop()
+
+    if args.profile is not None:
+        instrument.stop_profile(args.profile)  # Unless it was stopped from the Diagnostics window
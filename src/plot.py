@@ -1,31 +1,80 @@
+import math
+
+import numpy as np
 import matplotlib.pyplot as plt
 
 from src.session import SessionData
+from src.analysis import SessionAnalysis, BUCKET_WIDTH
+from src.stats import format_statistic
+
+# How far ahead the trend is projected, in solves
+PROJECTION = 1000
 
 
-def plot(session_data: SessionData):
-    plt.figure().canvas.set_window_title("Statistics")  # This might be wrong, I'm not sure
+def plot(session_data: SessionData, analysis: SessionAnalysis):
+    figure, (times_axes, histogram_axes) = plt.subplots(2, 1, gridspec_kw={"height_ratios": [3, 1]})
+    figure.canvas.set_window_title("Statistics")  # This might be wrong, I'm not sure
 
-    times = list(map(lambda solve: solve.raw_time, session_data.solves))
+    times = _without_dnfs(session_data.solves.results)
     solve_indices = [i + 1 for i in range(len(session_data.solves))]
-    plt.plot(solve_indices, times, label="single", color="gray")
+    times_axes.plot(solve_indices, times, label="single", color="gray")
 
-    ao5 = session_data.all_ao5
+    ao5 = _without_dnfs(session_data.all_ao5)
     if ao5:  # If it's not empty
         indices = [i + 5 for i in range(len(ao5))]
-        plt.plot(indices, ao5, label="ao5", color="red")
+        times_axes.plot(indices, ao5, label="ao5", color="red")
 
-    ao12 = session_data.all_ao12
+    ao12 = _without_dnfs(session_data.all_ao12)
     if ao12:  # If it's not empty
         indices = [i + 12 for i in range(len(ao12))]
-        plt.plot(indices, ao12, label="ao12", color="blue")
+        times_axes.plot(indices, ao12, label="ao12", color="blue")
+
+    rolling = analysis.rolling
+    if len(rolling.end):
+        # Windows with DNFs in their middle times leave gaps
+        times_axes.fill_between(rolling.end, _finite(rolling.p10), _finite(rolling.p90), color="green", alpha=0.2,
+                                label=f"p10-p90 of {analysis.window}")
+        times_axes.plot(rolling.end, _finite(rolling.median), label=f"median of {analysis.window}", color="green")
+
+    trend = analysis.trend
+    if trend is not None:
+        indices = np.linspace(1, len(analysis) + PROJECTION, 200)
+        times_axes.plot(indices, trend.at(indices), label="trend", color="black", linestyle="--")
+        times_axes.plot([len(analysis) + PROJECTION], [analysis.projection(PROJECTION)], marker="o", color="black")
 
-    plt.gca().xaxis.get_major_locator().set_params(integer=True)
+    times_axes.xaxis.get_major_locator().set_params(integer=True)
 
-    plt.xlabel("solve index")
-    plt.ylabel("solve time (s)")
-    plt.title(session_data.name)
-    plt.grid()
+    times_axes.set_xlabel("solve index")
+    times_axes.set_ylabel("solve time (s)")
+    times_axes.set_title(f"{session_data.name}\n{_summary(analysis)}")
+    times_axes.grid()
+    times_axes.legend()
 
-    plt.legend()
+    edges, counts = analysis.histogram()
+    histogram_axes.bar(edges[:-1], counts, width=BUCKET_WIDTH, align="edge", color="gray")
+    histogram_axes.set_xlabel("solve time (s)")
+    histogram_axes.set_ylabel("solves")
+
+    figure.tight_layout()
     plt.show()
+
+
+def _summary(analysis: SessionAnalysis) -> str:
+    spread = analysis.spread
+    summary = (f"median {format_statistic(spread.median)}, σ {format_statistic(spread.std)}, "
+               f"p10 {format_statistic(spread.p10)}, p90 {format_statistic(spread.p90)}")
+
+    projection = analysis.projection(PROJECTION)
+    if projection is not None:
+        summary += f", in {PROJECTION} solves {format_statistic(projection)}"
+
+    return summary
+
+
+def _without_dnfs(times) -> list:
+    # DNFs leave gaps in the lines
+    return [time if math.isfinite(time) else math.nan for time in times]
+
+
+def _finite(times: np.ndarray) -> np.ndarray:
+    return np.where(np.isfinite(times), times, np.nan)
@@ -0,0 +1,117 @@
+import tkinter as tk
+from os.path import join, isfile, dirname
+from typing import Callable, Optional, List
+from tkinter import messagebox, filedialog
+
+from src.archive import Snapshot, list_snapshots, restore_snapshot, ARCHIVE_EXTENSION
+from src.session import SESSIONS_PATH, session_exists
+
+
+class RestoreBackup(tk.Frame):
+
+    def __init__(self, top_level: tk.Toplevel, path: Optional[str], on_restore: Callable[[str], None], x: int, y: int):
+        super().__init__(top_level)
+        self.top_level = top_level
+        self.path = path
+        self.on_restore = on_restore
+        self.pack(padx=10, pady=10, expand=True)
+
+        self.top_level.title("Restore Backup")
+        self.top_level.geometry(f"+{x}+{y}")
+
+        self.snapshots: List[Snapshot] = []
+
+        self.var_archive = tk.StringVar(self, value="")
+        tk.Label(self, textvariable=self.var_archive, font="Times, 12", wraplength=360).grid(row=0, column=0, columnspan=2)
+
+        frm_snapshots = tk.Frame(self)
+        frm_snapshots.grid(row=1, column=0, columnspan=2, pady=(8, 8))
+
+        bar_snapshots = tk.Scrollbar(frm_snapshots, orient="vertical")
+        bar_snapshots.pack(side="right", fill="y")
+
+        self.lst_snapshots = tk.Listbox(frm_snapshots, width=44, height=12, yscrollcommand=bar_snapshots.set)
+        self.lst_snapshots.pack(side="left", fill="both")
+        bar_snapshots.configure(command=self.lst_snapshots.yview)
+        self.lst_snapshots.bind("<<ListboxSelect>>", self.on_select)
+
+        frm_entry = tk.Frame(self)
+        frm_entry.grid(row=2, column=0, columnspan=2, pady=(0, 12))
+
+        tk.Label(frm_entry, text="Restore as").grid(row=0, column=0, padx=(0, 4))
+        self.ent_session_name = tk.Entry(frm_entry, width=18)
+        self.ent_session_name.grid(row=0, column=1)
+
+        frm_buttons = tk.Frame(self)
+        frm_buttons.grid(row=3, column=0, columnspan=2)
+
+        tk.Button(frm_buttons, text="Open archive", command=self.open_archive).grid(row=0, column=0)
+        tk.Button(frm_buttons, text="Restore", command=self.restore).grid(row=0, column=1, padx=(10, 0))
+        tk.Button(frm_buttons, text="Cancel", command=self.top_level.destroy).grid(row=0, column=2, padx=(10, 0))
+
+        if self.path is not None:
+            self.load_archive()
+
+    def load_archive(self):
+        self.lst_snapshots.delete(0, "end")
+        self.snapshots.clear()
+        self.var_archive.set(self.path)
+
+        if not isfile(self.path):
+            messagebox.showinfo("No Backups", "There are no backups of this session yet.", parent=self.top_level)
+            return
+
+        try:
+            self.snapshots = list(reversed(list_snapshots(self.path)))  # Newest first
+        except OSError:
+            messagebox.showerror("Restore Failure", "Could not read the backup archive.", parent=self.top_level)
+            return
+
+        for snapshot in self.snapshots:
+            self.lst_snapshots.insert("end", f"{str(snapshot.created).split('.')[0]}  -  {snapshot.solve_count} solves")
+
+        if self.snapshots:
+            self.lst_snapshots.selection_set(0)
+            self.on_select(None)
+
+    def on_select(self, _event):
+        selection = self.lst_snapshots.curselection()
+        if selection:
+            self.ent_session_name.delete(0, "end")
+            self.ent_session_name.insert(0, self.snapshots[selection[0]].name)
+
+    def open_archive(self):
+        file_path: str = filedialog.askopenfilename(initialdir=dirname(self.path) if self.path else None,
+                                                    filetypes=[("Backup archives", "*" + ARCHIVE_EXTENSION)],
+                                                    parent=self.top_level)
+        if file_path:  # Returned an empty tuple on cancel
+            self.path = file_path
+            self.load_archive()
+
+    def restore(self):
+        selection = self.lst_snapshots.curselection()
+        if not selection:
+            messagebox.showerror("No Backup", "Please select a backup to restore.", parent=self.top_level)
+            return
+
+        session_name = self.ent_session_name.get()
+        if not session_name:
+            messagebox.showerror("Invalid Name", "Please insert a session name.", parent=self.top_level)
+            return
+
+        if session_exists(session_name):
+            if not messagebox.askyesno("Session Already Exists", f'Session "{session_name}" already exists. '
+                                       "Do you want to overwrite it?", parent=self.top_level):
+                return
+
+        snapshot = self.snapshots[selection[0]]
+
+        try:
+            restore_snapshot(self.path, snapshot.snapshot_id, join(SESSIONS_PATH, session_name + ".json"), session_name)
+        except (OSError, KeyError):
+            messagebox.showerror("Restore Failure", "Could not restore the backup, because the archive is damaged "
+                                 "or the sessions folder is not writable.", parent=self.top_level)
+            return
+
+        self.on_restore(session_name)
+        self.top_level.destroy()
@@ -1,216 +1,203 @@
 from __future__ import annotations
 
-import enum
 import dataclasses
 import random
-from typing import List, Union, Type
+import sys
+from typing import List, Tuple, Dict, Optional, Callable
 
+# Used when the caller doesn't pass a generator; it's separate from the global one of the random module
+_rng = random.Random()
 
-class _3x3x3Letter(enum.Enum):
-    R = "R"
-    L = "L"
-    U = "U"
-    D = "D"
-    F = "F"
-    B = "B"
 
-
-class _Modifier(enum.Enum):
-    NONE = ""
-    PRIME = "'"
-    TWO = "2"
+@dataclasses.dataclass(frozen=True)
+class Move:
+    name: str  # Without modifier, for example Rw
+    axis: int  # Moves on the same axis commute
+    face: str = ""  # Of the outer layer turned by it, when it's a wide move
 
 
 @dataclasses.dataclass
-class _3x3x3Move:
-    basic_move: _3x3x3Letter
-    modifier: _Modifier
+class PuzzleType:
+    """
+    A puzzle scrambled with random moves. A move is never followed by moves on its axis that were already done
+    since the last move on another axis; this is what keeps R L R or R R out of the scrambles.
 
-    def combined(self) -> str:
-        return self.basic_move.value + self.modifier.value
+    """
+    name: str
+    moves: Tuple[Move, ...]
+    modifiers: Tuple[str, ...]
+    length: int
+    tips: Tuple[str, ...] = ()  # Each tip is added at the end, turned randomly (or not at all)
+    cube_size: Optional[int] = None  # For puzzles that can be simulated
+
+    # Exactly like the first 4x4x4 generator, which looked only at the last two moves: the wide moves are left out
+    # until this move, and afterwards they are chosen half of the time. A move can't follow itself, a wide move can't
+    # follow the outer move of its face, and neither can follow a move of the opposite face, if it's the move before.
+    wide_moves_from: Optional[int] = None
+
+    def __post_init__(self):
+        # The token of a move is at index move_index * len(modifiers) + modifier_index
+        self._tokens = tuple(sys.intern(move.name + modifier) for move in self.moves for modifier in self.modifiers)
+        self._tip_tokens = tuple((sys.intern(""), sys.intern(" " + tip), sys.intern(" " + tip + "'")) for tip in self.tips)
+
+        if self.wide_moves_from is None:
+            self._table = self._build_table()
+        else:
+            self._table = self._build_last_moves_table(lambda move: not move.face)
+            outer_table = self._table
+            wide_table = self._build_last_moves_table(lambda move: bool(move.face))
+            # Either kind first, then a move of that kind; the kinds with no allowed moves are left out
+            self._wide_table = {state: tuple(tokens for tokens in (outer_table[state], wide_table[state]) if tokens)
+                                for state in outer_table}
+
+    def generate(self, rng: random.Random) -> str:
+        choice = rng.choice
+        table = self._table
+        tokens = self._tokens
+        move_axes = tuple(move.axis for move in self.moves)
+        modifier_count = len(self.modifiers)
+        moves: List[str] = []
+
+        if self.wide_moves_from is not None:
+            wide_table = self._wide_table
+            last, second_to_last = -1, -1
+
+            for i in range(self.length):
+                if i < self.wide_moves_from:
+                    token = choice(table[(last, second_to_last)])
+                else:
+                    token = choice(choice(wide_table[(last, second_to_last)]))
+                moves.append(tokens[token])
+                last, second_to_last = token // modifier_count, last
+        else:
+            axis, used = -1, 0
 
-    def is_opposite(self, other: _3x3x3Move) -> bool:
-        if self.basic_move == _3x3x3Letter.R:
-            return other.basic_move == _3x3x3Letter.L
-        elif self.basic_move == _3x3x3Letter.L:
-            return other.basic_move == _3x3x3Letter.R
-        elif self.basic_move == _3x3x3Letter.U:
-            return other.basic_move == _3x3x3Letter.D
-        elif self.basic_move == _3x3x3Letter.D:
-            return other.basic_move == _3x3x3Letter.U
-        elif self.basic_move == _3x3x3Letter.F:
-            return other.basic_move == _3x3x3Letter.B
-        elif self.basic_move == _3x3x3Letter.B:
-            return other.basic_move == _3x3x3Letter.F
+            for _ in range(self.length):
+                token = choice(table[(axis, used)])
+                moves.append(tokens[token])
 
+                move = token // modifier_count
+                if move_axes[move] == axis:
+                    used |= 1 << move
+                else:
+                    axis, used = move_axes[move], 1 << move
 
-_ALL_3x3x3_MOVES = [move for move in _3x3x3Letter]
-_ALL_MODIFIERS = [modifier for modifier in _Modifier]
+        return " ".join(moves) + "".join(choice(tip) for tip in self._tip_tokens)
 
+    def _build_table(self) -> Dict[Tuple[int, int], Tuple[int, ...]]:
+        """
+        Map the state (axis of the last moves or -1 at the start, bit mask of the moves done on that axis) to the
+        tokens that are allowed next.
 
-def generate_3x3x3_scramble() -> str:
-    moves: List[_3x3x3Move] = []
+        """
+        modifier_count = len(self.modifiers)
+        axes = sorted({move.axis for move in self.moves})
+        table: Dict[Tuple[int, int], Tuple[int, ...]] = {}
 
-    while len(moves) < 20:
-        while True:
-            code = _add_move(moves, _3x3x3Move)
-            if code == 1:
-                continue
-            elif code == 0:
-                break
+        def allowed(axis: int, used: int) -> Tuple[int, ...]:
+            return tuple(i * modifier_count + j for i, move in enumerate(self.moves)
+                         if not (move.axis == axis and used & 1 << i) for j in range(modifier_count))
 
-    final = [move.combined() for move in moves]
-    return " ".join(final)
+        table[(-1, 0)] = allowed(-1, 0)
 
+        for axis in axes:
+            on_axis = [i for i, move in enumerate(self.moves) if move.axis == axis]
+            for subset in range(1, 1 << len(on_axis)):
+                used = 0
+                for k, i in enumerate(on_axis):
+                    if subset & 1 << k:
+                        used |= 1 << i
+                table[(axis, used)] = allowed(axis, used)
 
-class _4x4x4SpecificLetter(enum.Enum):
-    Rw = "Rw"
-    Uw = "Uw"
-    Fw = "Fw"
+        return table
 
+    def _build_last_moves_table(self, candidate: Callable[[Move], bool]) -> Dict[Tuple[int, int], Tuple[int, ...]]:
+        """
+        Map the state (last move, move before it; -1 where there is none yet) to the tokens of the candidate moves
+        that are allowed next, by the rules of wide_moves_from.
 
-@dataclasses.dataclass
-class _4x4x4Move:
-    basic_move: Union[_3x3x3Letter, _4x4x4SpecificLetter]
-    modifier: _Modifier
-
-    def combined(self) -> str:
-        return self.basic_move.value + self.modifier.value
-
-    def is_opposite(self, other: _4x4x4Move) -> bool:
-        if self.basic_move == _3x3x3Letter.R or self.basic_move == _4x4x4SpecificLetter.Rw:
-            return other.basic_move == _3x3x3Letter.L
-        elif self.basic_move == _3x3x3Letter.L:
-            return other.basic_move == _3x3x3Letter.R or other.basic_move == _4x4x4SpecificLetter.Rw
-        elif self.basic_move == _3x3x3Letter.U or self.basic_move == _4x4x4SpecificLetter.Uw:
-            return other.basic_move == _3x3x3Letter.D
-        elif self.basic_move == _3x3x3Letter.D:
-            return other.basic_move == _3x3x3Letter.U or other.basic_move == _4x4x4SpecificLetter.Uw
-        elif self.basic_move == _3x3x3Letter.F or self.basic_move == _4x4x4SpecificLetter.Fw:
-            return other.basic_move == _3x3x3Letter.B
-        elif self.basic_move == _3x3x3Letter.B:
-            return other.basic_move == _3x3x3Letter.F or other.basic_move == _4x4x4SpecificLetter.Fw
-
-    def is_type_equal(self, other: _4x4x4Move) -> bool:
-        if self.basic_move == _4x4x4SpecificLetter.Rw:
-            return other.basic_move == _3x3x3Letter.R
-        elif self.basic_move == _4x4x4SpecificLetter.Uw:
-            return other.basic_move == _3x3x3Letter.U
-        elif self.basic_move == _4x4x4SpecificLetter.Fw:
-            return other.basic_move == _3x3x3Letter.F
-
-
-_ALL_4x4x4_SPECIFIC_MOVES = [move for move in _4x4x4SpecificLetter]
-
-
-def generate_4x4x4_scramble() -> str:
-    moves: List[_4x4x4Move] = []
-
-    moves_so_far = 0
-
-    while len(moves) < 45:
-        if moves_so_far < 20:
-            while True:
-                code = _add_move(moves, _4x4x4Move)
-                if code == 1:
-                    continue
-                elif code == 0:
-                    break
-        else:
-            move_type = random.choice((_3x3x3Move, _4x4x4Move))
-
-            while True:
-                if move_type == _3x3x3Move:
-                    code = _add_move(moves, _4x4x4Move)
-                    if code == 1:
-                        continue
-                    elif code == 0:
-                        break
-                else:
-                    move = _4x4x4Move(random.choice(_ALL_4x4x4_SPECIFIC_MOVES), random.choice(_ALL_MODIFIERS))
+        """
+        modifier_count = len(self.modifiers)
+        table: Dict[Tuple[int, int], Tuple[int, ...]] = {}
 
-                    if type(moves[-1].basic_move) == _4x4x4SpecificLetter:
-                        if moves[-1].basic_move == move.basic_move:
-                            continue
-                    else:
-                        if move.is_type_equal(moves[-1]):
-                            continue
+        def blocking(move: Move) -> Tuple[str, ...]:
+            return (move.name, move.face) if move.face else (move.name,)
 
-                    if moves[-1].is_opposite(move):
-                        if type(moves[-2].basic_move) == _4x4x4SpecificLetter:
-                            if moves[-2].basic_move == move.basic_move:
-                                continue
-                        else:
-                            if move.is_type_equal(moves[-2]):
-                                continue
+        def is_opposite(move: Move, other: Move) -> bool:
+            return move.axis == other.axis and (move.face or move.name) != (other.face or other.name)
 
-                    moves.append(move)
-                    break
+        def is_allowed(move: Move, last: int, second_to_last: int) -> bool:
+            if last == -1:
+                return True
+            if self.moves[last].name in blocking(move):
+                return False
+            if second_to_last != -1 and is_opposite(self.moves[last], move):
+                return self.moves[second_to_last].name not in blocking(move)
+            return True
 
-        moves_so_far += 1
+        for last in range(-1, len(self.moves)):
+            for second_to_last in range(-1, len(self.moves) if last != -1 else 0):
+                table[(last, second_to_last)] = tuple(
+                    i * modifier_count + j for i, move in enumerate(self.moves)
+                    if candidate(move) and is_allowed(move, last, second_to_last) for j in range(modifier_count)
+                )
 
-    final = [move.combined() for move in moves]
-    return " ".join(final)
+        return table
 
 
-class _2x2x2Letter(enum.Enum):
-    R = "R"
-    U = "U"
-    F = "F"
+def _cube(size: int, length: int, wide_moves_from: Optional[int] = None) -> PuzzleType:
+    moves = []
 
+    for layers in range(1, size // 2 + 1):
+        # On even cubes, turning the middle from one side is the same as from the other side
+        faces = "RUF" if size % 2 == 0 and layers == size // 2 else "RLUDFB"
+        prefix = str(layers) if layers > 2 else ""
+        wide = "w" if layers > 1 else ""
+
+        for face in faces:
+            moves.append(Move(prefix + face + wide, "RLUDFB".index(face) // 2, face if wide else ""))
+
+    return PuzzleType(f"{size}x{size}x{size}", tuple(moves), ("", "'", "2"), length, cube_size=size,
+                      wide_moves_from=wide_moves_from)
 
-@dataclasses.dataclass
-class _2x2x2Move:
-    basic_move: _2x2x2Letter
-    modifier: _Modifier
 
-    def combined(self) -> str:
-        return self.basic_move.value + self.modifier.value
+def _corner_turning(name: str, faces: str, length: int, tips: str = "") -> PuzzleType:
+    # None of the moves commute, so each is on its own axis
+    moves = tuple(Move(face, i) for i, face in enumerate(faces))
+    return PuzzleType(name, moves, ("", "'"), length, tuple(tips))
 
 
-_ALL_2x2x2_MOVES = [move for move in _2x2x2Letter]
+# In the order in which they appear in the menu
+PUZZLE_TYPES: Dict[str, PuzzleType] = {}
 
 
-def generate_2x2x2_scramble() -> str:
-    moves: List[_2x2x2Move] = []
+def register(puzzle_type: PuzzleType):
+    PUZZLE_TYPES[puzzle_type.name] = puzzle_type
 
-    while len(moves) < 9:
-        while True:
-            move = _2x2x2Move(random.choice(_ALL_2x2x2_MOVES), random.choice(_ALL_MODIFIERS))
 
-            try:
-                if moves[-1].basic_move == move.basic_move:
-                    continue
-            except IndexError:
-                pass
+register(_cube(3, 20))
+register(_cube(4, 45, wide_moves_from=20))
+register(_cube(2, 9))
+register(_cube(5, 60))
+register(_cube(6, 80))
+register(_cube(7, 100))
+register(_corner_turning("Pyraminx", "ULRB", 11, "ulrb"))
+register(_corner_turning("Skewb", "RULB", 11))
 
-            moves.append(move)
-            break
+DEFAULT_SCRAMBLE_TYPE = "3x3x3"
 
-    final = [move.combined() for move in moves]
-    return " ".join(final)
+
+def generate_scramble(scramble_type: str, rng: Optional[random.Random] = None) -> str:
+    """
+    Raises KeyError, if the scramble type is unknown.
+
+    """
+    return PUZZLE_TYPES[scramble_type].generate(_rng if rng is None else rng)
 
 
-def _add_move(moves: List[Union[_3x3x3Move, _4x4x4Move]],
-              move_type: Union[Type[_3x3x3Move], Type[_4x4x4Move]]) -> int:
+def scramble_from_seed(scramble_type: str, seed: int) -> str:
     """
-    Return 0 means break and return 1 means continue.
+    Generate again the scramble of a solve from its seed. Raises KeyError, if the scramble type is unknown.
 
     """
-    move = move_type(random.choice(_ALL_3x3x3_MOVES), random.choice(_ALL_MODIFIERS))
-
-    try:
-        if moves[-1].basic_move == move.basic_move:
-            return 1
-    except IndexError:  # The list is empty now
-        pass
-
-    try:
-        if moves[-1].is_opposite(move):
-            if moves[-2].basic_move == move.basic_move:
-                return 1
-    except IndexError:  # The list is empty or it has only one element
-        pass
-
-    moves.append(move)
-    return 0
+    return generate_scramble(scramble_type, random.Random(seed))
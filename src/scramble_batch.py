@@ -0,0 +1,63 @@
+import random
+import collections
+import concurrent.futures
+from typing import Iterator, List, Optional, Deque
+
+from src.scramble import PUZZLE_TYPES
+from src.seed import SeedSequence, new_seed
+
+# Scrambles are generated in chunks, each with its own random generator, so that the output for a seed
+# is the same no matter how many processes are used
+CHUNK_SIZE = 1000
+
+
+def generate_scrambles(scramble_type: str, count: int, seed: Optional[int] = None,
+                       processes: int = 1) -> Iterator[str]:
+    """
+    Yield count scrambles in order. With processes greater than 1, the chunks are generated in a process pool.
+    Raises KeyError, if the scramble type is unknown.
+
+    """
+    if scramble_type not in PUZZLE_TYPES:
+        raise KeyError(scramble_type)
+
+    if seed is None:
+        seed = new_seed()
+
+    return _generate_scrambles(scramble_type, count, seed, processes)
+
+
+def _generate_scrambles(scramble_type: str, count: int, seed: int, processes: int) -> Iterator[str]:
+    starts = range(0, count, CHUNK_SIZE)
+    chunks = [(scramble_type, sequence.generate_seed(), min(CHUNK_SIZE, count - start))
+              for sequence, start in zip(SeedSequence(seed).spawn(len(starts)), starts)]
+
+    if processes <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _generate_chunk(*chunk)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        # Keep only a few chunks in flight, so that memory doesn't grow with count
+        pending: Deque[concurrent.futures.Future] = collections.deque()
+        chunks_iter = iter(chunks)
+
+        for chunk in chunks_iter:
+            pending.append(executor.submit(_generate_chunk, *chunk))
+            if len(pending) >= processes * 2:
+                break
+
+        while pending:
+            scrambles = pending.popleft().result()
+
+            for chunk in chunks_iter:
+                pending.append(executor.submit(_generate_chunk, *chunk))
+                break
+
+            yield from scrambles
+
+
+def _generate_chunk(scramble_type: str, seed: int, count: int) -> List[str]:
+    puzzle_type = PUZZLE_TYPES[scramble_type]
+    rng = random.Random(seed)
+    return [puzzle_type.generate(rng) for _ in range(count)]
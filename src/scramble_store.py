@@ -0,0 +1,79 @@
+import base64
+import binascii
+from typing import Optional
+
+# The scrambles are kept in the session files packed, as base64 of 6 bits a move, when they are made of the moves of
+# the generators; anything else, like the scrambles of other timers, is kept as text. A session file stands on its
+# own, so it can be copied or shared with other stations.
+
+# The moves of all the puzzles, in the order of their codes; it must never change
+MOVES = tuple(f"{layers}{face}{wide}{modifier}" for layers, wide in (("", ""), ("", "w"), ("3", "w"))
+              for face in "RUFLDB" for modifier in ("", "'", "2")) + \
+    tuple(f"{tip}{modifier}" for tip in "rulb" for modifier in ("", "'"))  # Pyraminx tips
+
+_CODE_BITS = 6
+_END = (1 << _CODE_BITS) - 1  # Fills the last byte, when a whole code would fit in it
+_CODES = {move: code for code, move in enumerate(MOVES)}
+
+
+def pack_scramble(scramble: str) -> Optional[str]:
+    """
+    Return None, if the scramble can't be packed; then it must be kept as text.
+
+    """
+    packed = pack_moves(scramble)
+    if packed is None:
+        return None
+
+    return base64.b64encode(packed).decode("ascii")
+
+
+def unpack_scramble(packed: str) -> str:
+    """
+    Raises ValueError, if it's not a packed scramble.
+
+    """
+    try:
+        return unpack_moves(base64.b64decode(packed, validate=True))
+    except (binascii.Error, IndexError) as err:
+        raise ValueError(f"Invalid packed scramble {packed}: {err}")
+
+
+def pack_moves(scramble: str) -> Optional[bytes]:
+    """
+    Return None, if the scramble is not made of the known moves, one space apart.
+
+    """
+    try:
+        codes = [_CODES[move] for move in scramble.split(" ")] if scramble else []
+    except KeyError:
+        return None
+
+    packed = bytearray()
+    bits = 0
+    bit_count = 0
+    for code in codes:
+        bits |= code << bit_count
+        bit_count += _CODE_BITS
+        while bit_count >= 8:
+            packed.append(bits & 0xFF)
+            bits >>= 8
+            bit_count -= 8
+
+    if bit_count:
+        packed.append((bits | _END << bit_count) & 0xFF)
+
+    return bytes(packed)
+
+
+def unpack_moves(packed: bytes) -> str:
+    moves = []
+    bits = int.from_bytes(packed, "little")
+    for _ in range(len(packed) * 8 // _CODE_BITS):
+        code = bits & _END
+        if code == _END:
+            break
+        moves.append(MOVES[code])
+        bits >>= _CODE_BITS
+
+    return " ".join(moves)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import random
+import secrets
+import hashlib
+from typing import List, Optional, Tuple
+
+
+class SeedSequence:
+    """
+    Derives independent random streams from one seed, like numpy.random.SeedSequence does.
+    A child is identified by the root seed and its path of spawn indices, so spawning is deterministic.
+
+    """
+
+    def __init__(self, entropy: Optional[int] = None, spawn_key: Tuple[int, ...] = ()):
+        self.entropy = new_seed() if entropy is None else entropy
+        self.spawn_key = spawn_key
+        self._children_spawned = 0
+
+    def spawn(self, count: int) -> List[SeedSequence]:
+        children = [SeedSequence(self.entropy, self.spawn_key + (i,))
+                    for i in range(self._children_spawned, self._children_spawned + count)]
+        self._children_spawned += count
+        return children
+
+    def generate_seed(self) -> int:
+        key = ":".join(str(number) for number in (self.entropy,) + self.spawn_key)
+        digest = hashlib.sha256(key.encode()).digest()
+        return int.from_bytes(digest[:8], "little")
+
+    def rng(self) -> random.Random:
+        return random.Random(self.generate_seed())
+
+
+def new_seed() -> int:
+    return secrets.randbits(64)
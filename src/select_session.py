@@ -1,11 +1,26 @@
 import os
+import datetime
 from enum import Enum, auto
 import tkinter as tk
 from os.path import join
-from typing import Callable
-from tkinter import messagebox, filedialog
+from typing import Callable, List
+from tkinter import messagebox, filedialog, ttk
 
 from src.session import session_exists
+from src.catalog import CatalogEntry, get_catalog
+from src.stats import format_statistic
+
+# Column identifiers and headings of the session list
+_COLUMNS = {
+    "name": "Name",
+    "scramble_type": "Type",
+    "solve_count": "Solves",
+    "best_single": "Best",
+    "best_ao5": "Best ao5",
+    "best_ao12": "Best ao12",
+    "mean": "Mean",
+    "modified": "Modified"
+}
 
 
 class Mode(Enum):
@@ -44,10 +59,40 @@ class SelectSession(tk.Frame):
         self.ent_session_name.grid(row=0, column=1)
 
         if self.mode == Mode.OPEN_SESSION:
-            tk.Button(self, text="Open file", command=self.open_file).grid(row=1, column=0, columnspan=2, pady=(0, 16))
+            tk.Button(self, text="Open file", command=self.open_file).grid(row=2, column=0, columnspan=2, pady=(0, 16))
 
-        tk.Button(self, text="Ok", command=self.ok).grid(row=2, column=0)
-        tk.Button(self, text="Cancel", command=self.top_level.destroy).grid(row=2, column=1)
+            # The entry filters the list as it's typed in
+            self.entries: List[CatalogEntry] = get_catalog()
+            self.sort_column = "modified"
+            self.sort_descending = True
+
+            frm_sessions = tk.Frame(self)
+            frm_sessions.grid(row=1, column=0, columnspan=2, pady=(0, 12))
+
+            bar_sessions = tk.Scrollbar(frm_sessions, orient="vertical")
+            bar_sessions.pack(side="right", fill="y")
+
+            self.tre_sessions = ttk.Treeview(frm_sessions, columns=list(_COLUMNS), show="headings", height=12,
+                                             selectmode="browse", yscrollcommand=bar_sessions.set)
+            self.tre_sessions.pack(side="left", fill="both")
+            bar_sessions.configure(command=self.tre_sessions.yview)
+
+            for column, heading in _COLUMNS.items():
+                self.tre_sessions.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+                self.tre_sessions.column(column, width=140 if column in ("name", "modified") else 70,
+                                         anchor="w" if column == "name" else "center")
+
+            self.tre_sessions.bind("<<TreeviewSelect>>", self.on_select)
+            self.tre_sessions.bind("<Double-Button-1>", lambda _event: self.ok())
+
+            self.var_search = tk.StringVar(self.ent_session_name)
+            self.ent_session_name.configure(textvariable=self.var_search)
+            self.var_search.trace_add("write", lambda *_args: self.on_search())
+            self.selecting = False  # Picking a session also fills in the entry, which must not filter the list
+            self.fill_sessions()
+
+        tk.Button(self, text="Ok", command=self.ok).grid(row=3, column=0)
+        tk.Button(self, text="Cancel", command=self.top_level.destroy).grid(row=3, column=1)
 
         self.top_level.bind("<Return>", self.on_enter_press)
         self.ent_session_name.focus()
@@ -70,6 +115,57 @@ class SelectSession(tk.Frame):
     def on_enter_press(self, _event):
         self.ok()
 
+    # For opening mode
+    def fill_sessions(self):
+        search = self.var_search.get().lower()
+
+        def key(entry: CatalogEntry):
+            value = getattr(entry, self.sort_column)
+            if isinstance(value, str):
+                value = value.lower()
+            return value is None, value  # Missing statistics go last
+
+        entries = [entry for entry in self.entries if search in entry.name.lower()]
+        entries.sort(key=key)
+        if self.sort_descending:
+            # Still keep the missing statistics last
+            entries = [entry for entry in reversed(entries) if getattr(entry, self.sort_column) is not None] + \
+                      [entry for entry in entries if getattr(entry, self.sort_column) is None]
+
+        self.tre_sessions.delete(*self.tre_sessions.get_children())
+
+        for entry in entries:
+            self.tre_sessions.insert("", "end", iid=entry.name, values=(
+                entry.name,
+                entry.scramble_type,
+                entry.solve_count,
+                format_statistic(entry.best_single),
+                format_statistic(entry.best_ao5),
+                format_statistic(entry.best_ao12),
+                format_statistic(entry.mean),
+                datetime.datetime.fromtimestamp(entry.modified).strftime("%Y-%m-%d %H:%M")
+            ))
+
+    def sort_by(self, column: str):
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = column == "modified"  # Newest first; everything else from the smallest
+
+        self.fill_sessions()
+
+    def on_search(self):
+        if not self.selecting:
+            self.fill_sessions()
+
+    def on_select(self, _event):
+        selection = self.tre_sessions.selection()
+        if selection:
+            self.selecting = True
+            self.var_search.set(selection[0])
+            self.selecting = False
+
     # For opening mode
     def open_file(self):
         # It doesn't do anything, if it doesn't find the folder, which is annoying
@@ -1,40 +1,246 @@
+import sys
 import json
+import array
+import datetime
 import dataclasses
 import logging
 import copy
-import os
 import shutil
-import datetime
 from os.path import join, isfile
-from typing import List, Optional
-
-from src.data import DATA_PATH, recreate_data_file
+from collections.abc import MutableSequence
+from typing import List, Optional, Iterable
+
+import src.catalog as catalog
+from src.data import settings_store, SESSIONS_PATH
+from src.atomic import read_json, write_json, remove_with_backup
+from src.scramble_store import pack_scramble, unpack_scramble
+from src.json_stream import iterate_object, read_array_tail
 from src.timer import interpret_time_in_seconds
+from src.stats import NO_PENALTY, PENALTIES, apply_penalty
 
-_SESSIONS_PATH = join("data", "sessions")
 _EMPTY_SESSION = {
     "name": "",
     "scramble_type": "3x3x3",
     "solves": []  # All these times are formatted
 }
 
+# The solve indices in the main window go up to this
+MAX_SOLVES = 9997
+
+# Sessions at least this big are shown before they are read whole
+LAZY_LOAD_SIZE = 256 * 1024
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+ODD_DATE = -2 ** 63  # Marks a date that is kept as a string
+
 
-@dataclasses.dataclass
 class Solve:
-    time: str  # Formatted time
-    scramble: str
-    date: str
-    raw_time: float  # In seconds
+    """
+    One solve. Sessions don't keep these; SolveColumns makes them when a solve is accessed.
+
+    """
+
+    __slots__ = ("time", "_scramble", "packed_scramble", "date", "raw_time", "seed", "penalty")
+    _FIELDS = ("time", "scramble", "date", "raw_time", "seed", "penalty")
+
+    def __init__(self, time: str, scramble: Optional[str], date: str, raw_time: float, seed: Optional[int] = None,
+                 penalty: str = NO_PENALTY, packed_scramble: Optional[str] = None):
+        self.time = time  # Formatted time, without the penalty
+        self._scramble = scramble  # None, until it's needed, if it's packed
+        self.packed_scramble = packed_scramble  # As in the session file; older solves don't have it
+        self.date = date
+        self.raw_time = raw_time  # In seconds
+        self.seed = seed  # The scramble can be generated again from this; older solves don't have it
+        self.penalty = penalty  # One of PENALTIES
+
+    @property
+    def result(self) -> float:
+        """
+        The time that counts, in seconds, with the penalty.
+
+        """
+        return apply_penalty(self.raw_time, self.penalty)
+
+    @property
+    def scramble(self) -> str:
+        if self._scramble is None:
+            self._scramble = _unpack_scramble(self.packed_scramble)
+        return self._scramble
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Solve):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in Solve._FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Solve({', '.join(f'{name}={getattr(self, name)!r}' for name in Solve._FIELDS)})"
+
+
+class SolveColumns(MutableSequence):
+    """
+    The solves of a session, stored by column: times in an array of doubles, dates as microseconds since the epoch,
+    seeds as unsigned 64-bit integers, penalties as bytes and the strings interned. The scrambles that are packed in
+    the file are kept packed and unpacked only when a Solve's scramble is accessed. It behaves like a list of Solve
+    objects, but changing a Solve taken out of it doesn't change the session.
+
+    """
+
+    def __init__(self, solves: Iterable[Solve] = ()):
+        self._times: List[str] = []  # Formatted, exactly as in the file
+        self._raw_times = array.array("d")
+        self._scrambles: List[str] = []  # Or packed scrambles
+        self._packed_scrambles = bytearray()
+        self._dates = array.array("q")
+        self._odd_dates: Optional[List[Optional[str]]] = None  # Dates that can't be stored as numbers, if any
+        self._seeds = array.array("Q")
+        self._has_seed = bytearray()
+        self._penalties = bytearray()  # Indices into PENALTIES
+        self._results = array.array("d")  # The times with their penalties
+
+        for solve in solves:
+            self.append(solve)
+
+    @property
+    def raw_times(self) -> array.array:
+        """
+        All the times in seconds; don't change it.
+
+        """
+        return self._raw_times
+
+    @property
+    def results(self) -> array.array:
+        """
+        All the times in seconds with their penalties, a DNF being infinite; don't change it.
+
+        """
+        return self._results
+
+    def add(self, time: str, scramble: Optional[str], date: str, seed: Optional[int], penalty: str = NO_PENALTY,
+            packed_scramble: Optional[str] = None):
+        """
+        Append a solve without making a Solve object first. Give either the scramble or the packed scramble.
+
+        """
+        self._insert(len(self), time, interpret_time_in_seconds(time), scramble, packed_scramble, date, seed, penalty)
+
+    def set_penalty(self, index: int, penalty: str):
+        index = self._check_index(index)
+
+        self._penalties[index] = PENALTIES.index(penalty)
+        self._results[index] = apply_penalty(self._raw_times[index], penalty)
+
+    def __len__(self) -> int:
+        return len(self._raw_times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = self._check_index(index)
+
+        if self._dates[index] == ODD_DATE:
+            date = self._odd_dates[index]
+        else:
+            date = number_to_date(self._dates[index])
+
+        if self._packed_scrambles[index]:
+            scramble, packed_scramble = None, self._scrambles[index]
+        else:
+            scramble, packed_scramble = self._scrambles[index], None
+
+        return Solve(self._times[index], scramble, date, self._raw_times[index],
+                     self._seeds[index] if self._has_seed[index] else None, PENALTIES[self._penalties[index]],
+                     packed_scramble)
+
+    def __setitem__(self, index: int, solve: Solve):
+        index = self._check_index(index)
+        del self[index]
+        self.insert(index, solve)
+
+    def __delitem__(self, index):
+        if not isinstance(index, slice):
+            index = self._check_index(index)
+
+        del self._times[index]
+        del self._raw_times[index]
+        del self._scrambles[index]
+        del self._packed_scrambles[index]
+        del self._dates[index]
+        if self._odd_dates is not None:
+            del self._odd_dates[index]
+        del self._seeds[index]
+        del self._has_seed[index]
+        del self._penalties[index]
+        del self._results[index]
+
+    def insert(self, index: int, solve: Solve):
+        self._insert(index, solve.time, solve.raw_time, solve._scramble, solve.packed_scramble, solve.date,
+                     solve.seed, solve.penalty)
+
+    def _insert(self, index: int, time: str, raw_time: float, scramble: Optional[str],
+                packed_scramble: Optional[str], date: str, seed: Optional[int], penalty: str):
+        penalty_index = PENALTIES.index(penalty)  # Raises ValueError for unknown penalties
+        if scramble is None and packed_scramble is None:
+            raise ValueError("A solve without a scramble")
+
+        number = date_to_number(date)
+        if number == ODD_DATE and self._odd_dates is None:
+            self._odd_dates = [None] * len(self)
+
+        self._times.insert(index, sys.intern(time))
+        self._raw_times.insert(index, raw_time)
+        self._scrambles.insert(index, sys.intern(scramble if packed_scramble is None else packed_scramble))
+        self._packed_scrambles.insert(index, packed_scramble is not None)
+        self._dates.insert(index, number)
+        if self._odd_dates is not None:
+            self._odd_dates.insert(index, date if number == ODD_DATE else None)
+        self._seeds.insert(index, seed if seed is not None else 0)
+        self._has_seed.insert(index, seed is not None)
+        self._penalties.insert(index, penalty_index)
+        self._results.insert(index, apply_penalty(raw_time, penalty))
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("solve index out of range")
+        return index
 
 
 @dataclasses.dataclass
 class SessionData:
     name: str
     scramble_type: str
-    solves: List[Solve]  # Solve times can sometimes contain only one decimal
+    solves: SolveColumns  # Solve times can sometimes contain only one decimal; a list is turned into columns
     all_ao5: List[float]
     all_ao12: List[float]
 
+    def __post_init__(self):
+        if not isinstance(self.solves, SolveColumns):
+            self.solves = SolveColumns(self.solves)
+
+
+def date_to_number(date: str) -> int:
+    """
+    Microseconds since the epoch, or ODD_DATE. The dates are written by str(datetime.datetime.now()); anything else
+    must be kept as it is.
+
+    """
+    try:
+        parsed = datetime.datetime.fromisoformat(date)
+    except ValueError:
+        return ODD_DATE
+
+    if parsed.tzinfo is not None or str(parsed) != date:
+        return ODD_DATE
+
+    return (parsed - _EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def number_to_date(number: int) -> str:
+    return str(_EPOCH + datetime.timedelta(microseconds=number))
+
 
 class FileCorruptedError(json.decoder.JSONDecodeError):
     pass
@@ -46,41 +252,48 @@ class SameFileError(shutil.SameFileError):
 
 def create_new_session(name: str, check_first: bool) -> SessionData:
     if check_first:
-        if isfile(join(_SESSIONS_PATH, name + ".json")):
+        if isfile(join(SESSIONS_PATH, name + ".json")):
             raise FileExistsError
 
-    with open(join(_SESSIONS_PATH, name + ".json"), "w") as file:
-        data = copy.copy(_EMPTY_SESSION)
-        data["name"] = name
-        json.dump(data, file, indent=2)
+    data = copy.copy(_EMPTY_SESSION)
+    data["name"] = name
+    write_json(join(SESSIONS_PATH, name + ".json"), data)
+    catalog.update_session(name, data)
 
     return SessionData(name, "3x3x3", [], [], [])
 
 
 def dump_data(file_name: str, solve: Solve):
-    with open(join(_SESSIONS_PATH, file_name), "r+") as file:
-        try:
-            contents = json.load(file)
-        # Let the caller handle these errors
-        except FileNotFoundError:
-            logging.error("Could not save the solve in session, because the file is missing")
-            raise
-        except json.decoder.JSONDecodeError:
-            logging.error(f'File "{file_name}" is corrupted')
-            raise FileCorruptedError
-
-        file.seek(0)
-
-        dictionary = copy.copy(solve.__dict__)
-        try:
-            del dictionary["raw_time"]  # Don't dump raw_time
-            contents["solves"].append(dictionary)
-        except KeyError as err:
-            logging.error(f"Missing entry: {err}")
-            raise
-
-        json.dump(contents, file, indent=2)
-        file.truncate()
+    try:
+        contents = read_json(join(SESSIONS_PATH, file_name))
+    # Let the caller handle these errors
+    except FileNotFoundError:
+        logging.error("Could not save the solve in session, because the file is missing")
+        raise
+    except json.decoder.JSONDecodeError:
+        logging.error(f'File "{file_name}" is corrupted')
+        raise FileCorruptedError
+
+    dictionary = {"time": solve.time}  # Don't dump raw_time
+    packed_scramble = solve.packed_scramble if solve.packed_scramble is not None else pack_scramble(solve.scramble)
+    if packed_scramble is not None:
+        dictionary["packed_scramble"] = packed_scramble
+    else:
+        dictionary["scramble"] = solve.scramble
+    dictionary["date"] = solve.date
+    if solve.seed is not None:
+        dictionary["seed"] = solve.seed
+    if solve.penalty != NO_PENALTY:
+        dictionary["penalty"] = solve.penalty
+
+    try:
+        contents["solves"].append(dictionary)
+    except KeyError as err:
+        logging.error(f"Missing entry: {err}")
+        raise
+
+    write_json(join(SESSIONS_PATH, file_name), contents)
+    catalog.add_solve(file_name[:-len(".json")], contents)
 
 
 def remove_solve_out_of_session(file_name: str, index: int):
@@ -89,167 +302,220 @@ def remove_solve_out_of_session(file_name: str, index: int):
     -1 is handled separately; don't put negative numbers except for -1.
 
     """
-    with open(join(_SESSIONS_PATH, file_name), "r+") as file:
-        try:
-            contents = json.load(file)
-        # Let the caller handle these errors
-        except FileNotFoundError:
-            logging.error("Could not remove the solve from the session, because the file is missing")
-            raise
-        except json.decoder.JSONDecodeError:
-            logging.error(f'File "{file_name}" is corrupted')
-            raise FileCorruptedError
+    try:
+        contents = read_json(join(SESSIONS_PATH, file_name))
+    # Let the caller handle these errors
+    except FileNotFoundError:
+        logging.error("Could not remove the solve from the session, because the file is missing")
+        raise
+    except json.decoder.JSONDecodeError:
+        logging.error(f'File "{file_name}" is corrupted')
+        raise FileCorruptedError
+
+    try:
+        if index == -1:
+            logging.debug(f"Removing solve {contents['solves'][index]}")
+            del contents["solves"][index]
+        else:
+            logging.debug(f"Removing solve {contents['solves'][index - 1]}")
+            del contents["solves"][index - 1]
+    except KeyError as err:
+        logging.error(f"Missing entry: {err}")
+        raise
+
+    write_json(join(SESSIONS_PATH, file_name), contents)
+    catalog.update_session(file_name[:-len(".json")], contents)
+
+
+def set_penalty(file_name: str, index: int, penalty: str):
+    """
+    index is from 1 to 9997.
+
+    """
+    try:
+        contents = read_json(join(SESSIONS_PATH, file_name))
+    # Let the caller handle these errors
+    except FileNotFoundError:
+        logging.error("Could not change the penalty of the solve, because the file is missing")
+        raise
+    except json.decoder.JSONDecodeError:
+        logging.error(f'File "{file_name}" is corrupted')
+        raise FileCorruptedError
 
-        file.seek(0)
+    try:
+        solve = contents["solves"][index - 1]
+    except KeyError as err:
+        logging.error(f"Missing entry: {err}")
+        raise
 
-        try:
-            if index == -1:
-                logging.debug(f"Removing solve {contents['solves'][index]}")
-                del contents["solves"][index]
-            else:
-                logging.debug(f"Removing solve {contents['solves'][index - 1]}")
-                del contents["solves"][index - 1]
-        except KeyError as err:
-            logging.error(f"Missing entry: {err}")
-            raise
+    if penalty == NO_PENALTY:
+        solve.pop("penalty", None)
+    else:
+        solve["penalty"] = penalty
 
-        json.dump(contents, file, indent=2)
-        file.truncate()  # Don't forget this!
+    write_json(join(SESSIONS_PATH, file_name), contents)
+    catalog.update_session(file_name[:-len(".json")], contents)
 
 
 def rename_session(source_name: str, destination_name: str):
-    source = join(_SESSIONS_PATH, source_name + ".json")
-    destination = join(_SESSIONS_PATH, destination_name + ".json")
+    source = join(SESSIONS_PATH, source_name + ".json")
+    destination = join(SESSIONS_PATH, destination_name + ".json")
 
     try:
-        os.rename(source, destination)
+        contents = read_json(source)
     except FileNotFoundError:
         logging.error(f"Could not rename session; file {source} not found")
         raise
 
-    with open(destination, "r+") as file:
-        contents = json.load(file)
-
-        file.seek(0)
-
-        contents["name"] = destination_name
-        json.dump(contents, file, indent=2)
-        file.truncate()
+    # Write the new file completely first, so that there is always one whole session file
+    contents["name"] = destination_name
+    write_json(destination, contents)
+    remove_with_backup(source)
+    catalog.rename_session(source_name, destination_name, contents)
 
 
 def change_type(file_name: str, scramble_type: str):
-    with open(join(_SESSIONS_PATH, file_name), "r+") as file:
-        try:
-            contents = json.load(file)
-        except json.decoder.JSONDecodeError:
-            logging.error(f'File "{file_name}" is corrupted')
-            raise FileCorruptedError  # Let the caller handle this error
-
-        file.seek(0)
+    try:
+        contents = read_json(join(SESSIONS_PATH, file_name))
+    except json.decoder.JSONDecodeError:
+        logging.error(f'File "{file_name}" is corrupted')
+        raise FileCorruptedError  # Let the caller handle this error
 
-        contents["scramble_type"] = scramble_type
-        json.dump(contents, file, indent=2)
-        file.truncate()
+    contents["scramble_type"] = scramble_type
+    write_json(join(SESSIONS_PATH, file_name), contents)
+    catalog.update_session(file_name[:-len(".json")], contents)
 
 
 def destroy_session(name: str):
     try:
-        os.remove(join(_SESSIONS_PATH, name + ".json"))
+        remove_with_backup(join(SESSIONS_PATH, name + ".json"))
     except FileNotFoundError:
         logging.error(f"Could not remove session; file {name}.json not found")
         raise
+    finally:
+        catalog.remove_session(name)
 
 
 def remember_last_session(name: str):
-    try:
-        with open(DATA_PATH, "r+") as file:
-            contents = json.load(file)
-
-            file.seek(0)
-
-            contents["last_session"] = name
-
-            json.dump(contents, file, indent=2)
-            file.truncate()
-    # Let the caller handle these errors
-    except FileNotFoundError:
-        logging.error("Data file was missing")
-        recreate_data_file()
-        raise
-    except json.decoder.JSONDecodeError:
-        logging.error("Data file was somehow corrupted")
-        recreate_data_file()
-        raise FileCorruptedError
+    settings_store.set_last_session(name)  # Written with the settings, a bit later
 
 
 def get_last_session() -> str:
     try:
-        with open(DATA_PATH, "r") as file:
-            contents = json.load(file)
-            if not contents["last_session"]:
-                raise RuntimeError
-            return contents["last_session"]
+        last_session = settings_store.last_session
     # Let the caller handle these errors
     except FileNotFoundError:
         logging.error("Data file was missing")
-        recreate_data_file()
         raise
     except json.decoder.JSONDecodeError:
         logging.error("Data file was somehow corrupted")
-        recreate_data_file()
         raise FileCorruptedError
-    except RuntimeError:
-        logging.info("There is no last session")
-        raise
     except KeyError as err:
         logging.error(f"Missing entry: {err}")
-        recreate_data_file()
         raise
 
+    if not last_session:
+        logging.info("There is no last session")
+        raise RuntimeError
+    return last_session
+
 
 def load_session_data(file_name: str) -> Optional[SessionData]:
+    """
+    The file is parsed a piece at a time, so only the solves are kept in memory, not the whole file.
+
+    """
+    header = {}
+    solves = SolveColumns()
+
     try:
-        with open(join(_SESSIONS_PATH, file_name), "r") as file:
-            contents = json.load(file)
+        with open(join(SESSIONS_PATH, file_name), "r") as file:
+            for key, value in iterate_object(file, "solves"):
+                if key == "solves":
+                    packed_scramble = value.get("packed_scramble")
+                    solves.add(value["time"], value["scramble"] if packed_scramble is None else None,
+                               value["date"], value.get("seed"), value.get("penalty", NO_PENALTY), packed_scramble)
+                else:
+                    header[key] = value
+
+        name = header["name"]
+        scramble_type = header["scramble_type"]
+        assert name
     except FileNotFoundError:
         logging.error(f"Could not find file {file_name}")
         return None
     except json.decoder.JSONDecodeError:
         logging.error(f"{file_name} is corrupted")
         return None
-
-    try:
-        name = contents["name"]
-        scramble_type = contents["scramble_type"]
-        # Solve times can sometimes contain only one decimal
-        solves: List[Solve] = [Solve(time=solve["time"], scramble=solve["scramble"], date=solve["date"],
-                                     raw_time=interpret_time_in_seconds(solve["time"])) for solve in contents["solves"]]
-        assert name
-    except KeyError as err:  # Missing contents
+    except (KeyError, TypeError, ValueError) as err:  # Missing or wrong contents
         logging.error(f"Missing entry: {err}")
         return None
     else:
         return SessionData(name, scramble_type, solves, [], [])
 
 
-def session_exists(name: str) -> bool:
-    return isfile(join(_SESSIONS_PATH, name + ".json"))
+def read_session_tail(file_name: str, count: int) -> Optional[List[Solve]]:
+    """
+    Return the last count solves of a session, reading only the end of the file. Return None, if they can't be read
+    like that; then the whole file must be read.
 
+    """
+    try:
+        with open(join(SESSIONS_PATH, file_name), "rb") as file:
+            solves = read_array_tail(file, count)
+    except FileNotFoundError:
+        logging.error(f"Could not find file {file_name}")
+        return None
+
+    if solves is None:
+        return None
+
+    try:
+        return [_solve_from_dict(solve) for solve in solves]
+    except (KeyError, TypeError, ValueError) as err:
+        logging.error(f"Missing entry: {err}")
+        return None
 
-def backup_session(file_name: str, folder_path: str):
-    date = datetime.datetime.now().date()
 
-    source = join(_SESSIONS_PATH, file_name)
-    destination = join(folder_path, "backup_" + f"{date.year}-{date.month}" + "_" + file_name)
+def _solve_from_dict(solve: dict) -> Solve:
+    # Solve times can sometimes contain only one decimal
+    penalty = solve.get("penalty", NO_PENALTY)
+    if penalty not in PENALTIES:
+        raise ValueError(f"Unknown penalty {penalty}")
 
+    packed_scramble = solve.get("packed_scramble")
+    return Solve(time=solve["time"], scramble=solve["scramble"] if packed_scramble is None else None,
+                 date=solve["date"], raw_time=interpret_time_in_seconds(solve["time"]), seed=solve.get("seed"),
+                 penalty=penalty, packed_scramble=packed_scramble)
+
+
+def with_scramble(solve: dict) -> dict:
+    """
+    A solve of a session file with its scramble as text, for the files of other formats, which don't know about
+    packed scrambles.
+
+    """
+    if "scramble" in solve:
+        return solve
+
+    converted = {}
+    for key, value in solve.items():
+        if key == "packed_scramble":
+            converted["scramble"] = _unpack_scramble(value)
+        else:
+            converted[key] = value
+
+    return converted
+
+
+def _unpack_scramble(packed_scramble: str) -> str:
     try:
-        shutil.copyfile(source, destination)
-    except FileNotFoundError:
-        logging.error(f"Could not find file {source} or the destination path is invalid")
-        raise
-    except shutil.SameFileError:  # TODO maybe we should prevent this completely instead of catching it
-        logging.error(f"Cannot backup in the sessions folder")
-        raise SameFileError
-    except OSError:
-        logging.error(f'Could not backup file "{source}", because the destination is not writable (permission denied)')
-        raise
+        return unpack_scramble(packed_scramble)
+    except ValueError as err:
+        logging.error(err)
+        return ""
+
+
+def session_exists(name: str) -> bool:
+    return isfile(join(SESSIONS_PATH, name + ".json"))
+
@@ -0,0 +1,75 @@
+import os
+import collections
+from os.path import join
+from typing import Any, Callable, Optional, Tuple
+
+from src.core import TimerSession
+from src.session import SESSIONS_PATH
+
+# The sessions that were used lately, kept with their statistics and with whatever the UI made for showing them, so
+# that switching back to one of them doesn't read its file again. An entry is good only while the file still has the
+# modification time and size that it had when the session was put away; then nobody else changed it meanwhile.
+CAPACITY = 8  # Sessions
+
+
+class SessionCache:
+    """
+    Least recently used first. on_evict is given the view of every entry that is dropped, for destroying it.
+
+    """
+
+    def __init__(self, capacity: int = CAPACITY, on_evict: Callable[[Any], None] = lambda _view: None):
+        self.capacity = capacity
+        self._on_evict = on_evict
+        self._entries: "collections.OrderedDict[str, Tuple[TimerSession, Any, Tuple[int, int]]]" = \
+            collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, session: TimerSession, view: Any):
+        """
+        Keep a session, which must be fully loaded and with all its changes written already.
+
+        """
+        stat = _file_stat(session.name)
+        if stat is None:  # Deleted meanwhile
+            self._on_evict(view)
+            return
+
+        self.discard(session.name)
+        self._entries[session.name] = (session, view, stat)
+
+        while len(self._entries) > self.capacity:
+            _, (_, old_view, _) = self._entries.popitem(last=False)
+            self._on_evict(old_view)
+
+    def take(self, name: str) -> Optional[Tuple[TimerSession, Any]]:
+        """
+        Remove a session and return it with its view, or None, if it's not kept or its file changed.
+
+        """
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return None
+
+        session, view, stat = entry
+        if _file_stat(name) != stat:
+            self._on_evict(view)
+            return None
+
+        return session, view
+
+    def discard(self, name: str):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._on_evict(entry[1])
+
+
+def _file_stat(name: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(join(SESSIONS_PATH, name + ".json"))
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
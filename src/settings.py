@@ -3,21 +3,18 @@ import json
 import logging
 import tkinter as tk
 from tkinter import messagebox, colorchooser, filedialog
-from typing import Callable
-from dataclasses import dataclass
 
 from src.session import FileCorruptedError
-from src.data import DATA_PATH, DEFAULT_BACKGROUND_COLOR, DEFAULT_TIMER_SIZE, DEFAULT_SCRAMBLE_SIZE, recreate_data_file
+from src.data import DEFAULT_BACKGROUND_COLOR, DEFAULT_TIMER_SIZE, DEFAULT_SCRAMBLE_SIZE, DEFAULT_BACKUP_KEEP_LAST, \
+    DEFAULT_BACKUP_KEEP_DAILY, DEFAULT_BACKUP_KEEP_MONTHLY, SettingsConfig, settings_store
 from src.timer import DEFAULT_READY_COLOR, DEFAULT_INSPECTION_COLOR
 
 
 class Settings(tk.Frame):
 
-    def __init__(self, top_level: tk.Toplevel, on_apply: Callable[[SettingsConfig], None],
-                 x: int, y: int):
+    def __init__(self, top_level: tk.Toplevel, x: int, y: int):
         super().__init__(top_level)
         self.top_level = top_level
-        self.on_apply = on_apply
         self.pack(padx=10, pady=10, expand=True)
 
         self.top_level.title("Settings")
@@ -26,29 +23,11 @@ class Settings(tk.Frame):
         tk.Label(self, text="Timer size").grid(row=0, column=0, sticky="s")
         tk.Label(self, text="Scramble size").grid(row=1, column=0, sticky="s")
 
-        error = False
-
-        try:
-            settings_config = get_settings()
-        except FileNotFoundError:
-            messagebox.showerror("Data Error", "The data file was missing.", parent=self.top_level)
-            error = True
-        except FileCorruptedError:
-            messagebox.showerror("Data Error", "The data file was corrupted.", parent=self.top_level)
-            error = True
-        except KeyError:
-            messagebox.showerror("Data Error", "Missing entry in data file.", parent=self.top_level)
-            error = True
-
-        if error:
-            settings_config = SettingsConfig(timer_size=DEFAULT_TIMER_SIZE, scramble_size=DEFAULT_SCRAMBLE_SIZE,
-                                             enable_inspection=True, background_color=DEFAULT_BACKGROUND_COLOR,
-                                             foreground_color="#000000", enable_backup=False, backup_path="",
-                                             ready_color=DEFAULT_READY_COLOR, inspection_color=DEFAULT_INSPECTION_COLOR)
+        # Already in memory; the main window read the data file at startup
+        settings_config = settings_store.settings
 
         self.scl_timer_size = tk.Scale(self, from_=50, to=180, resolution=2, orient="horizontal")
         self.scl_timer_size.grid(row=0, column=1)
-        # noinspection PyUnboundLocalVariable
         self.scl_timer_size.set(settings_config.timer_size)
 
         self.scl_scramble_size = tk.Scale(self, from_=16, to=60, resolution=2, orient="horizontal")
@@ -103,6 +82,25 @@ class Settings(tk.Frame):
                                          font="Times, 7", wraplength=120)
         self.btn_backup_path.grid(row=0, column=1)
 
+        # Retention policy of the backup archives
+        frm_retention = tk.Frame(frm_backup)
+        frm_retention.grid(row=1, column=0, columnspan=2, pady=(8, 0))
+
+        tk.Label(frm_retention, text="Keep last").grid(row=0, column=0)
+        tk.Label(frm_retention, text="Daily").grid(row=0, column=2, padx=(6, 0))
+        tk.Label(frm_retention, text="Monthly").grid(row=0, column=4, padx=(6, 0))
+
+        self.var_backup_keep_last = tk.IntVar(frm_retention, value=settings_config.backup_keep_last)
+        self.var_backup_keep_daily = tk.IntVar(frm_retention, value=settings_config.backup_keep_daily)
+        self.var_backup_keep_monthly = tk.IntVar(frm_retention, value=settings_config.backup_keep_monthly)
+
+        tk.Spinbox(frm_retention, from_=1, to=999, width=4, textvariable=self.var_backup_keep_last) \
+            .grid(row=0, column=1, padx=(4, 0))
+        tk.Spinbox(frm_retention, from_=0, to=999, width=4, textvariable=self.var_backup_keep_daily) \
+            .grid(row=0, column=3, padx=(4, 0))
+        tk.Spinbox(frm_retention, from_=0, to=999, width=4, textvariable=self.var_backup_keep_monthly) \
+            .grid(row=0, column=5, padx=(4, 0))
+
         frm_buttons = tk.Frame(self)
         frm_buttons.grid(row=6, column=0, columnspan=2, pady=(12, 0))
 
@@ -164,13 +162,19 @@ class Settings(tk.Frame):
         hex_ready = self.var_ready_color.get()
         hex_inspection = self.var_inspection_color.get()
 
-        self.on_apply(
-            SettingsConfig(timer_size, scramble_size, enable_inspection, hex_background, hex_foreground,
-                           enable_backup, backup_path, hex_ready, hex_inspection)
-        )
-        self.write_settings(
+        try:
+            keep_last = max(self.var_backup_keep_last.get(), 1)
+            keep_daily = max(self.var_backup_keep_daily.get(), 0)
+            keep_monthly = max(self.var_backup_keep_monthly.get(), 0)
+        except tk.TclError:  # Not numbers
+            messagebox.showerror("Invalid Value", "Please insert whole numbers for the backups to keep.",
+                                 parent=self.top_level)
+            return
+
+        # The subscribers of the store apply the settings; the data file is written a bit later
+        settings_store.update(
             SettingsConfig(timer_size, scramble_size, enable_inspection, hex_background, hex_foreground,
-                           enable_backup, backup_path, hex_ready, hex_inspection)
+                           enable_backup, backup_path, hex_ready, hex_inspection, keep_last, keep_daily, keep_monthly)
         )
 
     def default(self):
@@ -193,67 +197,25 @@ class Settings(tk.Frame):
             self.var_enable_backup.set(False)
             self.var_backup_path.set("")
             self.btn_backup_path.configure(text="<path>")
-
-    def write_settings(self, setings_config: SettingsConfig):
-        try:
-            with open(DATA_PATH, "r+") as file:
-                contents = json.load(file)
-
-                file.seek(0)
-
-                contents["timer_size"] = setings_config.timer_size
-                contents["scramble_size"] = setings_config.scramble_size
-                contents["enable_inspection"] = setings_config.enable_inspection
-                contents["background_color"] = setings_config.background_color
-                contents["foreground_color"] = setings_config.foreground_color
-                contents["enable_backup"] = setings_config.enable_backup
-                contents["backup_path"] = setings_config.backup_path
-                contents["ready_color"] = setings_config.ready_color
-                contents["inspection_color"] = setings_config.inspection_color
-
-                json.dump(contents, file, indent=2)
-                file.truncate()
-        except FileNotFoundError:
-            logging.error("Data file was missing")
-            recreate_data_file()
-            messagebox.showerror("Data Error", "The data file was missing.", parent=self.top_level)
-        except json.decoder.JSONDecodeError:
-            logging.error("Data file was somehow corrupted")
-            recreate_data_file()
-            messagebox.showerror("Data Error", "The data file was corrupted.", parent=self.top_level)
+            self.var_backup_keep_last.set(DEFAULT_BACKUP_KEEP_LAST)
+            self.var_backup_keep_daily.set(DEFAULT_BACKUP_KEEP_DAILY)
+            self.var_backup_keep_monthly.set(DEFAULT_BACKUP_KEEP_MONTHLY)
 
 
 def get_settings() -> SettingsConfig:
+    """
+    The data file is read only the first time; the errors are raised only then, after the file is recreated.
+
+    """
     try:
-        with open(DATA_PATH, "r") as file:
-            contents = json.load(file)
+        return settings_store.settings
     except FileNotFoundError:
         logging.error("Data file was missing")
-        recreate_data_file()
         raise
     except json.decoder.JSONDecodeError:
         logging.error("Data file was somehow corrupted")
-        recreate_data_file()
         raise FileCorruptedError
-
-    try:
-        return SettingsConfig(contents["timer_size"], contents["scramble_size"], contents["enable_inspection"],
-                              contents["background_color"], contents["foreground_color"], contents["enable_backup"],
-                              contents["backup_path"], contents["ready_color"], contents["inspection_color"])
     except KeyError as err:
         logging.error(f"Missing entry: {err}")
-        recreate_data_file()
         raise
 
-
-@dataclass
-class SettingsConfig:
-    timer_size: int
-    scramble_size: int
-    enable_inspection: bool
-    background_color: str
-    foreground_color: str
-    enable_backup: bool
-    backup_path: str
-    ready_color: str
-    inspection_color: str
@@ -0,0 +1,157 @@
+import re
+from typing import List, Tuple, Dict, Optional
+
+from src.scramble import PUZZLE_TYPES
+
+# Faces in the order in which their stickers are stored
+FACES = "URFDLB"
+
+_MOVE_PATTERN = re.compile(r"^(\d*)([URFDLB])(w?)(['2]?)$")
+
+# Axis (0 is x, 1 is y, 2 is z) and direction of the outward normal of each face
+_FACE_AXES = {
+    "U": (1, 1),
+    "R": (0, 1),
+    "F": (2, 1),
+    "D": (1, -1),
+    "L": (0, -1),
+    "B": (2, -1)
+}
+
+Vector = Tuple[int, int, int]
+
+
+class CubeSimulator:
+    """
+    Sticker model of an NxNxN cube. A state is a list with the face index (into FACES) of the color of every sticker.
+    The stickers of a face are stored row by row, as they appear in an unfolded net (U on top of F, L F R B in a row
+    and D below F). Moves are precomputed index permutations, made lazily and cached.
+
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._positions: List[Vector] = []
+
+        # Positions are in doubled coordinates, so that they are all integers; the cube goes from -size to size
+        n = size
+        nets = {
+            "U": ((-(n - 1), n, -(n - 1)), (2, 0, 0), (0, 0, 2)),
+            "R": ((n, n - 1, n - 1), (0, 0, -2), (0, -2, 0)),
+            "F": ((-(n - 1), n - 1, n), (2, 0, 0), (0, -2, 0)),
+            "D": ((-(n - 1), -n, n - 1), (2, 0, 0), (0, 0, -2)),
+            "L": ((-n, n - 1, -(n - 1)), (0, 0, 2), (0, -2, 0)),
+            "B": ((n - 1, n - 1, -n), (-2, 0, 0), (0, -2, 0))
+        }
+
+        for face in FACES:
+            origin, column, row = nets[face]
+            for i in range(n):
+                for j in range(n):
+                    self._positions.append(tuple(origin[k] + row[k] * i + column[k] * j for k in range(3)))
+
+        self._indices: Dict[Vector, int] = {position: i for i, position in enumerate(self._positions)}
+        self._solved = [i // (n * n) for i in range(len(self._positions))]
+        self._moves: Dict[str, List[int]] = {}
+
+    def solved(self) -> List[int]:
+        return list(self._solved)
+
+    def apply(self, scramble: str) -> List[int]:
+        """
+        Return the state after applying scramble to a solved cube. Raises ValueError on a move it doesn't understand.
+
+        """
+        permutation = list(range(len(self._positions)))
+
+        for token in scramble.split():
+            move = self._moves.get(token)
+            if move is None:
+                move = self._make_move(token)
+                self._moves[token] = move
+
+            permutation = [permutation[i] for i in move]
+
+        solved = self._solved
+        return [solved[i] for i in permutation]
+
+    def _make_move(self, token: str) -> List[int]:
+        match = _MOVE_PATTERN.match(token)
+        if match is None:
+            raise ValueError(f"Invalid move {token}")
+
+        prefix, face, wide, modifier = match.groups()
+
+        if wide:
+            layers = int(prefix) if prefix else 2
+        elif prefix:
+            raise ValueError(f"Invalid move {token}")
+        else:
+            layers = 1
+
+        if not 1 <= layers <= self.size:
+            raise ValueError(f"Invalid move {token}")
+
+        quarter = self._quarter_turn(face, layers)
+        turns = {"": 1, "2": 2, "'": 3}[modifier]
+
+        move = quarter
+        for _ in range(turns - 1):
+            move = [move[i] for i in quarter]
+
+        return move
+
+    def _quarter_turn(self, face: str, layers: int) -> List[int]:
+        """
+        The new state is [state[i] for i in move].
+
+        """
+        axis, direction = _FACE_AXES[face]
+        lowest = self.size + 1 - 2 * layers
+
+        move = list(range(len(self._positions)))
+
+        for i, position in enumerate(self._positions):
+            if position[axis] * direction >= lowest:
+                move[self._indices[_rotate(position, axis, direction)]] = i
+
+        return move
+
+
+def _rotate(position: Vector, axis: int, direction: int) -> Vector:
+    """
+    Rotate clockwise, as seen from the side the face with this axis and direction is on.
+
+    """
+    x, y, z = position
+
+    if axis == 0:
+        return (x, z, -y) if direction == 1 else (x, -z, y)
+    elif axis == 1:
+        return (-z, y, x) if direction == 1 else (z, y, -x)
+    else:
+        return (y, -x, z) if direction == 1 else (-y, x, z)
+
+
+_simulators: Dict[int, CubeSimulator] = {}
+
+
+def get_simulator(scramble_type: str) -> Optional[CubeSimulator]:
+    """
+    Return None, if the scramble type can't be simulated.
+
+    """
+    try:
+        size = PUZZLE_TYPES[scramble_type].cube_size
+    except KeyError:
+        return None
+
+    if size is None:
+        return None
+
+    try:
+        return _simulators[size]
+    except KeyError:
+        simulator = CubeSimulator(size)
+        _simulators[size] = simulator
+        return simulator
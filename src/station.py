@@ -0,0 +1,173 @@
+import json
+import time
+import socket
+import logging
+import threading
+import http.client
+from typing import Dict, List, Optional, Set
+
+from src.core import TimerSession, SessionEvent, SOLVE_ADDED, SOLVE_REMOVED, PENALTY_CHANGED, SOLVES_LOADED, RENAMED, \
+    TYPE_CHANGED
+from src.session import Solve
+from src.competition import DEFAULT_PORT
+
+MAX_BATCH_SIZE = 500  # Solves per request
+_SEND_INTERVAL = 1.0  # Seconds the solves are gathered for, before being sent
+_MAX_RETRY_DELAY = 30.0
+_TIMEOUT = 10.0
+
+
+class StationClient:
+    """
+    Pushes the solves of the followed sessions to the competition server, in batches over one persistent connection,
+    from a background thread. The competitor is the name of the session, so a renamed session (or one of a changed
+    scramble type) sends all its solves again; the server replaces the solves of a station by date. Changes that pile
+    up while the server can't be reached are sent when it comes back; a solve changed again before it's sent is sent
+    only once.
+
+    """
+
+    def __init__(self, address: str, station: str = ""):
+        host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+        self.host = host
+        self.port = int(port) if port else DEFAULT_PORT
+        self.station = station or socket.gethostname()
+
+        self._solves: Dict[str, dict] = {}  # By date, in the order they came
+        self._removed: Dict[str, None] = {}  # Dates; a dictionary, for the order
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._changed_while_loading: Set[TimerSession] = set()  # Their older solves are sent once they are read
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def follow(self, session: TimerSession):
+        session.subscribe(lambda event: self._on_session_event(session, event))
+
+    def push(self, competitor: str, puzzle: str, solve: Solve):
+        self.push_all(competitor, puzzle, [solve])
+
+    def push_all(self, competitor: str, puzzle: str, solves: List[Solve]):
+        with self._condition:
+            for solve in solves:
+                self._removed.pop(solve.date, None)
+                self._solves[solve.date] = {"date": solve.date, "competitor": competitor, "puzzle": puzzle,
+                                            "time": solve.time, "scramble": solve.scramble, "penalty": solve.penalty}
+            self._condition.notify()
+
+    def remove(self, solve: Solve):
+        with self._condition:
+            self._solves.pop(solve.date, None)
+            self._removed[solve.date] = None
+            self._condition.notify()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Send what is still pending and stop the thread.
+
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+        self._thread.join(timeout)
+
+    def _on_session_event(self, session: TimerSession, event: SessionEvent):
+        if event.external:  # The station that did it sends it
+            return
+
+        if event.kind in (SOLVE_ADDED, PENALTY_CHANGED):
+            self.push(session.name, session.session_data.scramble_type, event.solve)
+        elif event.kind == SOLVE_REMOVED:
+            self.remove(event.solve)
+        elif event.kind in (RENAMED, TYPE_CHANGED):
+            # Otherwise the solves already sent would stay ranked under the old name or puzzle
+            if session.pending:
+                self._changed_while_loading.add(session)
+            self.push_all(session.name, session.session_data.scramble_type, list(session.solves))
+        elif event.kind == SOLVES_LOADED and session in self._changed_while_loading:
+            self._changed_while_loading.discard(session)
+            self.push_all(session.name, session.session_data.scramble_type, list(session.solves))
+
+    def _run(self):
+        retry_delay = _SEND_INTERVAL
+
+        while True:
+            with self._condition:
+                while not self._solves and not self._removed and not self._stopping:
+                    self._condition.wait()
+
+                if not self._solves and not self._removed:  # Stopping
+                    self._close()
+                    return
+
+                # Gather the ones that come meanwhile
+                deadline = time.monotonic() + _SEND_INTERVAL
+                while not self._stopping and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+
+                stopping = self._stopping
+
+                solves = list(self._solves.values())[:MAX_BATCH_SIZE]
+                removed = list(self._removed)
+                for solve in solves:
+                    del self._solves[solve["date"]]
+                self._removed.clear()
+
+            if self._send(solves, removed):
+                retry_delay = _SEND_INTERVAL
+                continue
+
+            # Put them back, unless they changed meanwhile
+            with self._condition:
+                for solve in solves:
+                    if solve["date"] not in self._removed:
+                        self._solves.setdefault(solve["date"], solve)
+                for date in removed:
+                    if date not in self._solves:
+                        self._removed[date] = None
+
+                if self._stopping and stopping:  # Don't keep on trying when exiting
+                    logging.error(f"Could not send {len(self._solves)} solves to the competition server")
+                    self._close()
+                    return
+
+                if not self._stopping:
+                    self._condition.wait(retry_delay)
+                retry_delay = min(retry_delay * 2.0, _MAX_RETRY_DELAY)
+
+    def _send(self, solves: List[dict], removed: List[str]) -> bool:
+        body = json.dumps({"station": self.station, "solves": solves, "removed": removed})
+
+        for attempt in range(2):  # The server might have closed the idle connection; then try once more on a new one
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=_TIMEOUT)
+
+            try:
+                self._connection.request("POST", "/solves", body, {"Content-Type": "application/json"})
+                response = self._connection.getresponse()
+                contents = response.read()
+            except (OSError, http.client.HTTPException) as err:
+                self._close()
+                if attempt == 0 and isinstance(err, (http.client.RemoteDisconnected, ConnectionResetError,
+                                                     BrokenPipeError)):
+                    continue
+                logging.error(f"Could not reach the competition server at {self.host}:{self.port}: {err}")
+                return False
+
+            if response.status != 200:
+                # It won't get any better by sending it again
+                logging.error(f"The competition server refused {len(solves)} solves: {contents[:200]!r}")
+                return True
+
+            logging.debug(f"Sent {len(solves)} solves and {len(removed)} removals to the competition server")
+            return True
+
+        return False
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
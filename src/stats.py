@@ -0,0 +1,203 @@
+import math
+from typing import List, Iterable, Optional, Sequence
+
+from src.timer import format_time_seconds
+
+# Penalties, as they are written in the session files; a solve without a penalty has none written
+NO_PENALTY = ""
+PLUS_TWO = "+2"
+DNF = "DNF"
+PENALTIES = (NO_PENALTY, PLUS_TWO, DNF)
+
+
+def apply_penalty(time_: float, penalty: str) -> float:
+    """
+    The time that counts, in seconds; a DNF is infinite.
+
+    """
+    if penalty == DNF:
+        return math.inf
+    if penalty == PLUS_TWO:
+        return time_ + 2.0
+    return time_
+
+
+def format_result(time_: float, penalty: str) -> str:
+    """
+    Like format_time_seconds(), but with the penalty: 12.34+ or DNF. time_ is without the penalty.
+
+    """
+    if penalty == DNF:
+        return DNF
+    if penalty == PLUS_TWO:
+        return format_time_seconds(time_ + 2.0) + "+"
+    return format_time_seconds(time_)
+
+
+def format_statistic(time_: Optional[float]) -> str:
+    if time_ is None:
+        return "n/a"
+    if time_ == math.inf:
+        return DNF
+    return format_time_seconds(time_)
+
+
+def calculate_ao5(list_5: Sequence[float]) -> float:
+    return _trimmed_mean(list_5)
+
+
+def calculate_ao12(list_12: Sequence[float]) -> float:
+    return _trimmed_mean(list_12)
+
+
+def _trimmed_mean(times: Sequence[float]) -> float:
+    # The best and the worst don't count. A DNF is the worst, so the average is a DNF (infinite) only if there are
+    # more DNFs than the one that doesn't count, as the WCA says.
+    ordered = sorted(times)
+    return sum(ordered[1:-1]) / (len(ordered) - 2)
+
+
+def all_ao5(times: Sequence[float]) -> List[float]:
+    """
+    The ao5 of every five consecutive times; empty, if there are less than five.
+
+    """
+    return [calculate_ao5(times[i:i + 5]) for i in range(len(times) - 4)]
+
+
+def all_ao12(times: Sequence[float]) -> List[float]:
+    """
+    The ao12 of every twelve consecutive times; empty, if there are less than twelve.
+
+    """
+    return [calculate_ao12(times[i:i + 12]) for i in range(len(times) - 11)]
+
+
+def session_mean(times: Iterable[float]) -> Optional[float]:
+    """
+    The mean of the times that are not DNFs; None, if there are none.
+
+    """
+    finite = [time_ for time_ in times if math.isfinite(time_)]
+    return sum(finite) / len(finite) if finite else None
+
+
+class RollingStatistics:
+    """
+    The statistics of a session, kept up to date one solve at a time. Adding, removing or changing a time only
+    calculates again the averages that include it. The times are with their penalties applied.
+
+    """
+
+    def __init__(self, times: Iterable[float] = ()):
+        self.times: List[float] = list(times)
+        self.all_ao5 = all_ao5(self.times)
+        self.all_ao12 = all_ao12(self.times)
+
+        self._total = sum(time_ for time_ in self.times if math.isfinite(time_))
+        self._finite_count = sum(1 for time_ in self.times if math.isfinite(time_))
+
+        # None, when they must be looked for again
+        self._best_single: Optional[float] = None
+        self._best_ao5: Optional[float] = None
+        self._best_ao12: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._total / self._finite_count if self._finite_count else None
+
+    @property
+    def current_ao5(self) -> Optional[float]:
+        return self.all_ao5[-1] if self.all_ao5 else None
+
+    @property
+    def current_ao12(self) -> Optional[float]:
+        return self.all_ao12[-1] if self.all_ao12 else None
+
+    @property
+    def best_single(self) -> Optional[float]:
+        if self._best_single is None:
+            self._best_single = min(self.times, default=None)
+        return self._best_single
+
+    @property
+    def best_ao5(self) -> Optional[float]:
+        if self._best_ao5 is None:
+            self._best_ao5 = min(self.all_ao5, default=None)
+        return self._best_ao5
+
+    @property
+    def best_ao12(self) -> Optional[float]:
+        if self._best_ao12 is None:
+            self._best_ao12 = min(self.all_ao12, default=None)
+        return self._best_ao12
+
+    def append(self, time_: float):
+        self._add_to_mean(time_)
+        self.times.append(time_)
+        self._best_single = self._new_best(self._best_single, [], [time_])
+
+        index = len(self.times) - 1
+        self._update_averages(index, index, 0)
+
+    def replace(self, index: int, time_: float):
+        index = self._check_index(index)
+
+        self._add_to_mean(self.times[index], -1)
+        self._add_to_mean(time_)
+        self._best_single = self._new_best(self._best_single, [self.times[index]], [time_])
+        self.times[index] = time_
+
+        self._update_averages(index, index + 1, 0)
+
+    def delete(self, index: int):
+        index = self._check_index(index)
+
+        self._add_to_mean(self.times[index], -1)
+        self._best_single = self._new_best(self._best_single, [self.times[index]], [])
+        del self.times[index]
+
+        self._update_averages(index, index, 1)
+
+    def _update_averages(self, index: int, new_end: int, removed: int):
+        # The averages that start from index - size + 1 up to before new_end are calculated again; removed is how many
+        # more averages there were before the change
+        self._best_ao5 = self._update_windows(self.all_ao5, 5, index, new_end, removed, self._best_ao5)
+        self._best_ao12 = self._update_windows(self.all_ao12, 12, index, new_end, removed, self._best_ao12)
+
+    def _update_windows(self, averages: List[float], size: int, index: int, new_end: int, removed: int,
+                        best: Optional[float]) -> Optional[float]:
+        start = max(index - size + 1, 0)
+        new_end = max(min(new_end, len(self.times) - size + 1), start)
+        old_end = max(min(new_end + removed, len(averages)), start)
+
+        old = averages[start:old_end]
+        new = [_trimmed_mean(self.times[i:i + size]) for i in range(start, new_end)]
+        averages[start:old_end] = new
+
+        return self._new_best(best, old, new)
+
+    @staticmethod
+    def _new_best(best: Optional[float], old: List[float], new: List[float]) -> Optional[float]:
+        if best is None:
+            return None  # Not known yet anyway
+        if new and min(new) <= best:
+            return min(new)
+        if old and min(old) <= best:
+            return None  # The best might be gone
+        return best
+
+    def _add_to_mean(self, time_: float, sign: int = 1):
+        if math.isfinite(time_):
+            self._total += sign * time_
+            self._finite_count += sign
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += len(self.times)
+        if not 0 <= index < len(self.times):
+            raise IndexError("solve index out of range")
+        return index
@@ -0,0 +1,399 @@
+import re
+import csv
+import json
+import logging
+import datetime
+import tempfile
+import textwrap
+from os.path import join, isfile, basename, splitext
+from typing import List, Dict, Iterator, Optional, TextIO
+
+from src.atomic import open_atomic
+from src.binary_session import BinarySession, InvalidBinaryFileError, write_binary_session
+from src.data import SESSIONS_PATH
+from src.json_stream import iterate_object, iterate_object_arrays
+from src.scramble import PUZZLE_TYPES, DEFAULT_SCRAMBLE_TYPE
+from src.session import MAX_SOLVES, Solve, with_scramble
+from src.stats import NO_PENALTY, PLUS_TWO, DNF, PENALTIES
+from src.timer import interpret_time_in_seconds, format_time_seconds
+
+# Moving solves between Py-Cube-Timer and other timers: csTimer export files and CSV files with time, scramble and
+# date columns; and to and from binary session files, for archives. Everything is read and written a solve at a time,
+# so the size of the files doesn't matter.
+
+# csTimer scramble types and ours
+CSTIMER_SCRAMBLE_TYPES = {
+    "333": "3x3x3",
+    "222so": "2x2x2",
+    "444wca": "4x4x4",
+    "555wca": "5x5x5",
+    "666wca": "6x6x6",
+    "777wca": "7x7x7",
+    "pyrso": "Pyraminx",
+    "skbso": "Skewb"
+}
+
+# csTimer penalties
+CSTIMER_OK = 0
+CSTIMER_PLUS_TWO = 2000
+CSTIMER_DNF = -1
+
+CSV_COLUMNS = ["time", "scramble", "date", "seed", "penalty"]
+
+_BATCH_SIZE = 1000  # Solves written at once
+_SESSION_SIZE = MAX_SOLVES - 1  # Bigger sessions are split into parts
+_INVALID_NAME_CHARACTERS = re.compile(r'[\\/:*?"<>|]')
+
+
+class InvalidFileError(ValueError):
+    pass
+
+
+class MixedScrambleTypesError(ValueError):
+    pass
+
+
+def import_cstimer(path: str) -> List[str]:
+    """
+    Import every session of a csTimer export file. Return the names of the new sessions.
+    Raises InvalidFileError, json.decoder.JSONDecodeError and OSError.
+
+    """
+    scratch_files: Dict[str, TextIO] = {}  # Solves of each csTimer session, until the names are known
+    counts: Dict[str, int] = {}
+    properties: dict = {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            batch: List[dict] = []
+            batch_key = None
+
+            for key, value in iterate_object_arrays(file, lambda key: re.fullmatch(r"session\d+", key) is not None):
+                if key == "properties":
+                    properties = value
+                    continue
+                if not key.startswith("session"):
+                    continue
+
+                if key != batch_key and batch:
+                    _write_scratch(scratch_files[batch_key], batch)
+                    batch.clear()
+                batch_key = key
+
+                if key not in scratch_files:
+                    scratch_files[key] = tempfile.TemporaryFile("w+", encoding="utf-8")
+                    counts[key] = 0
+
+                batch.append(_solve_from_cstimer(value))
+                counts[key] += 1
+                if len(batch) == _BATCH_SIZE:
+                    _write_scratch(scratch_files[key], batch)
+                    batch.clear()
+
+            if batch:
+                _write_scratch(scratch_files[batch_key], batch)
+
+        session_data = _cstimer_session_data(properties)
+
+        names = []
+        for key, scratch_file in scratch_files.items():
+            number = key[len("session"):]
+            data = session_data.get(number, {})
+            name = str(data.get("name", number))
+            scramble_type = CSTIMER_SCRAMBLE_TYPES.get(data.get("opt", {}).get("scr", "333"), DEFAULT_SCRAMBLE_TYPE)
+
+            scratch_file.seek(0)
+            names.extend(_write_sessions(name, scramble_type, (json.loads(line) for line in scratch_file)))
+    finally:
+        for scratch_file in scratch_files.values():
+            scratch_file.close()
+
+    logging.info(f"Imported {sum(counts.values())} solves from {path}")
+    return names
+
+
+def import_csv(path: str, name: Optional[str] = None, scramble_type: str = DEFAULT_SCRAMBLE_TYPE) -> List[str]:
+    """
+    Import a CSV file with a header and the columns time, scramble and date, and optionally seed and penalty, as a
+    session named after the file. Return the names of the new sessions. Raises InvalidFileError and OSError.
+
+    """
+    if name is None:
+        name = splitext(basename(path))[0]
+
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        missing = {"time", "scramble", "date"} - set(reader.fieldnames or [])
+        if missing:
+            raise InvalidFileError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        return _write_sessions(name, scramble_type, (_solve_from_csv(row, reader.line_num) for row in reader))
+
+
+def import_binary(path: str) -> List[str]:
+    """
+    Import a binary session file, split into sessions of at most MAX_SOLVES - 1 solves. Return their names.
+    Raises InvalidFileError and OSError.
+
+    """
+    try:
+        with BinarySession(path) as session:
+            return _write_sessions(session.name, session.scramble_type, (_solve_to_dict(solve) for solve in session))
+    except InvalidBinaryFileError as err:
+        raise InvalidFileError(str(err))
+
+
+def export_binary(session_names: List[str], path: str):
+    """
+    Write the solves of the sessions, one after the other, into one binary session file, which is named after the
+    first session. The file has one scramble type, so the sessions must all be of the same one.
+    Raises MixedScrambleTypesError, json.decoder.JSONDecodeError and OSError.
+
+    """
+    headers = [_read_header(session_name) for session_name in session_names]
+    scramble_types = [header.get("scramble_type", DEFAULT_SCRAMBLE_TYPE) for header in headers]
+    if len(set(scramble_types)) > 1:
+        raise MixedScrambleTypesError(f"Sessions of different scramble types: {', '.join(sorted(set(scramble_types)))}")
+
+    solves = (solve for session_name in session_names for solve in _iterate_session_solves(session_name))
+    count = write_binary_session(path, headers[0].get("name", session_names[0]), scramble_types[0], solves)
+
+    logging.info(f"Exported {count} solves into {path}")
+
+
+def export_csv(session_name: str, path: str):
+    """
+    Raises json.decoder.JSONDecodeError and OSError.
+
+    """
+    with open(path, "w", newline="", encoding="utf-8", buffering=1024 * 1024) as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+
+        batch = []
+        for solve in _iterate_session_solves(session_name):
+            batch.append([solve["time"], solve["scramble"], solve["date"], solve.get("seed", ""),
+                          solve.get("penalty", NO_PENALTY)])
+            if len(batch) == _BATCH_SIZE:
+                writer.writerows(batch)
+                batch.clear()
+        writer.writerows(batch)
+
+
+def export_cstimer(session_names: List[str], path: str):
+    """
+    Write the sessions in the format of csTimer's export files, for importing them in csTimer.
+    Raises json.decoder.JSONDecodeError and OSError.
+
+    """
+    scramble_types = {value: key for key, value in CSTIMER_SCRAMBLE_TYPES.items()}
+    session_data = {}
+
+    with open(path, "w", encoding="utf-8", buffering=1024 * 1024) as file:
+        file.write("{")
+
+        for number, session_name in enumerate(session_names, start=1):
+            file.write(f'"session{number}":[' if number == 1 else f',"session{number}":[')
+
+            header = {}
+            batch = []
+            first = True
+            with open(join(SESSIONS_PATH, session_name + ".json"), "r") as session_file:
+                for key, value in iterate_object(session_file, "solves"):
+                    if key != "solves":
+                        header[key] = value
+                        continue
+
+                    batch.append(json.dumps(_solve_to_cstimer(with_scramble(value)), separators=(",", ":")))
+                    if len(batch) == _BATCH_SIZE:
+                        file.write(("" if first else ",") + ",".join(batch))
+                        first = False
+                        batch.clear()
+            if batch:
+                file.write(("" if first else ",") + ",".join(batch))
+
+            file.write("]")
+
+            session_data[str(number)] = {
+                "name": header.get("name", session_name),
+                "opt": {"scr": scramble_types.get(header.get("scramble_type"), "333")},
+                "rank": number
+            }
+
+        # csTimer keeps this as a string of JSON
+        file.write(',"properties":' + json.dumps({"sessionData": json.dumps(session_data)}) + "}")
+
+
+def _cstimer_session_data(properties: dict) -> dict:
+    try:
+        session_data = properties.get("sessionData", "{}")
+        return json.loads(session_data) if isinstance(session_data, str) else session_data
+    except json.decoder.JSONDecodeError:
+        logging.error("The session names of the csTimer file are corrupted")
+        return {}
+
+
+def _solve_from_cstimer(solve) -> dict:
+    # [[penalty, milliseconds, ...], scramble, comment, seconds since the epoch]; the times of the phases of a
+    # multi-phase solve come after the milliseconds, and they are dropped
+    try:
+        result, scramble, _comment, timestamp = solve[:4]
+        penalty, milliseconds = result[0], result[1]
+        time_ = _centiseconds_to_time(int(milliseconds) // 10)
+        date = str(datetime.datetime.fromtimestamp(timestamp))
+    except (ValueError, TypeError, IndexError, KeyError, OverflowError, OSError):
+        raise InvalidFileError(f"Invalid csTimer solve: {solve}")
+
+    dictionary = {"time": time_, "scramble": str(scramble), "date": date}
+    if penalty == CSTIMER_DNF:
+        dictionary["penalty"] = DNF
+    elif penalty == CSTIMER_PLUS_TWO:
+        dictionary["penalty"] = PLUS_TWO
+
+    return dictionary
+
+
+def _solve_to_cstimer(solve: dict) -> list:
+    raw_time = interpret_time_in_seconds(solve["time"])
+    penalty = {DNF: CSTIMER_DNF, PLUS_TWO: CSTIMER_PLUS_TWO}.get(solve.get("penalty"), CSTIMER_OK)
+
+    if raw_time == float("inf"):  # Older files could have DNFs like this
+        penalty, milliseconds = CSTIMER_DNF, 0
+    else:
+        milliseconds = round(raw_time * 1000)
+
+    try:
+        timestamp = round(datetime.datetime.fromisoformat(solve["date"]).timestamp())
+    except ValueError:
+        timestamp = 0
+
+    return [[penalty, milliseconds], solve["scramble"], "", timestamp]
+
+
+def _solve_to_dict(solve: Solve) -> dict:
+    # As in the session files
+    dictionary = {"time": solve.time, "scramble": solve.scramble, "date": solve.date}
+    if solve.seed is not None:
+        dictionary["seed"] = solve.seed
+    if solve.penalty != NO_PENALTY:
+        dictionary["penalty"] = solve.penalty
+
+    return dictionary
+
+
+def _solve_from_csv(row: Dict[str, str], line: int) -> dict:
+    try:
+        solve = {
+            "time": format_time_seconds(interpret_time_in_seconds(row["time"].strip())),
+            "scramble": row["scramble"].strip(),
+            "date": row["date"].strip()
+        }
+        if row.get("seed"):
+            solve["seed"] = int(row["seed"])
+        if row.get("penalty"):
+            if row["penalty"] not in PENALTIES:
+                raise ValueError(row["penalty"])
+            solve["penalty"] = row["penalty"]
+    except (ValueError, AttributeError):
+        raise InvalidFileError(f"Invalid solve on line {line}")
+
+    return solve
+
+
+def _centiseconds_to_time(centiseconds: int) -> str:
+    # Whole centiseconds, so that formatting doesn't round up into the next second
+    return format_time_seconds(centiseconds / 100)
+
+
+def _write_sessions(name: str, scramble_type: str, solves: Iterator[dict]) -> List[str]:
+    """
+    Write the solves as new sessions, splitting them into parts, if there are too many for one session.
+
+    """
+    if scramble_type not in PUZZLE_TYPES:
+        scramble_type = DEFAULT_SCRAMBLE_TYPE
+
+    names = []
+    name = _INVALID_NAME_CHARACTERS.sub("_", name).strip() or "Imported"
+
+    while True:
+        part_name = _free_name(name if not names else f"{name} {len(names) + 1}")
+
+        with open_atomic(join(SESSIONS_PATH, part_name + ".json")) as file:
+            file.write("{\n")
+            file.write(f'  "name": {json.dumps(part_name)},\n')
+            file.write(f'  "scramble_type": {json.dumps(scramble_type)},\n')
+            file.write('  "solves": [')
+
+            count = 0
+            batch = []
+            for solve in solves:
+                batch.append(solve)
+                if len(batch) == _BATCH_SIZE or count + len(batch) == _SESSION_SIZE:
+                    count += _write_solves(file, batch, count)
+                    batch.clear()
+                if count == _SESSION_SIZE:
+                    break
+            count += _write_solves(file, batch, count)
+
+            file.write("]\n}" if count == 0 else "\n  ]\n}")
+
+        names.append(part_name)
+        logging.info(f'Imported {count} solves into session "{part_name}"')
+
+        if count < _SESSION_SIZE:
+            return names
+
+        # Don't leave an empty last part
+        try:
+            first = next(solves)
+        except StopIteration:
+            return names
+        solves = _prepend(first, solves)
+
+
+def _write_solves(file: TextIO, solves: List[dict], written_before: int) -> int:
+    # The same layout as json.dump(contents, file, indent=2)
+    if solves:
+        file.write(("\n" if written_before == 0 else ",\n") +
+                   ",\n".join(textwrap.indent(json.dumps(solve, indent=2), "    ") for solve in solves))
+    return len(solves)
+
+
+def _write_scratch(file: TextIO, solves: List[dict]):
+    # One solve per line
+    file.write("".join(json.dumps(solve) + "\n" for solve in solves))
+
+
+def _prepend(first: dict, rest: Iterator[dict]) -> Iterator[dict]:
+    yield first
+    yield from rest
+
+
+def _read_header(session_name: str) -> dict:
+    # Everything before the solves
+    header = {}
+    with open(join(SESSIONS_PATH, session_name + ".json"), "r") as file:
+        for key, value in iterate_object(file, "solves"):
+            if key == "solves":
+                break
+            header[key] = value
+
+    return header
+
+
+def _iterate_session_solves(session_name: str) -> Iterator[dict]:
+    with open(join(SESSIONS_PATH, session_name + ".json"), "r") as file:
+        for key, value in iterate_object(file, "solves"):
+            if key == "solves":
+                yield with_scramble(value)
+
+
+def _free_name(name: str) -> str:
+    if not isfile(join(SESSIONS_PATH, name + ".json")):
+        return name
+
+    number = 2
+    while isfile(join(SESSIONS_PATH, f"{name} ({number}).json")):
+        number += 1
+    return f"{name} ({number})"
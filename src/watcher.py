@@ -0,0 +1,177 @@
+import os
+import sys
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+from os.path import join
+from typing import Optional, Tuple
+
+from src.data import SESSIONS_PATH
+
+# Tells when the file of the session in use changes, for other programs and other stations (through a shared folder)
+# write to the sessions too. On Linux, inotify tells it right away; the file is checked every POLL_INTERVAL anyway,
+# as inotify doesn't see the changes made by other computers to shared folders, and as other systems don't have it.
+POLL_INTERVAL = 1.0  # Seconds
+
+# From <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")  # Watch descriptor, mask, cookie, name length
+
+
+class SessionWatcher:
+    """
+    Watches one session file at a time, from a background thread. The changes made by this program are told too.
+
+    """
+
+    def __init__(self, folder_path: str = SESSIONS_PATH):
+        self.folder_path = folder_path
+
+        self._file_name: Optional[str] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._changed = False
+        self._condition = threading.Condition()
+        self._stopping = False
+
+        self._inotify = _open_inotify(folder_path)
+        self._wake_pipe = os.pipe() if self._inotify is not None else None  # For stopping while waiting for events
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def watch(self, file_name: Optional[str]):
+        """
+        Watch this file from now on, or nothing.
+
+        """
+        stat = _file_stat(join(self.folder_path, file_name)) if file_name is not None else None
+
+        with self._condition:
+            self._file_name = file_name
+            self._stat = stat
+            self._changed = False
+
+    def changed(self) -> bool:
+        """
+        Whether the file changed since the last time; it's reset.
+
+        """
+        with self._condition:
+            changed = self._changed
+            self._changed = False
+
+        return changed
+
+    def stop(self, timeout: float = 10.0):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._wake_pipe is not None:
+            os.write(self._wake_pipe[1], b"\0")
+
+        self._thread.join(timeout)
+
+        if self._inotify is not None:
+            os.close(self._inotify)
+            os.close(self._wake_pipe[0])
+            os.close(self._wake_pipe[1])
+            self._inotify = None
+
+    def _run(self):
+        while True:
+            if self._inotify is not None:
+                names = _read_inotify(self._inotify, self._wake_pipe[0], POLL_INTERVAL)
+            else:
+                names = set()
+                with self._condition:
+                    self._condition.wait(POLL_INTERVAL)
+
+            with self._condition:
+                if self._stopping:
+                    return
+
+                file_name = self._file_name
+                if file_name is None:
+                    continue
+
+                if file_name in names:
+                    self._changed = True
+
+            # The file is checked anyway
+            stat = _file_stat(join(self.folder_path, file_name))
+
+            with self._condition:
+                if file_name == self._file_name and stat != self._stat:
+                    self._stat = stat
+                    self._changed = True
+
+
+def _file_stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _open_inotify(folder_path: str) -> Optional[int]:
+    # The whole folder is watched, as the session files are replaced when they are written
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        logging.info("There is no inotify; the session file is polled")
+        return None
+
+    inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+    descriptor = inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if descriptor < 0:
+        logging.error(f"Could not start inotify: {os.strerror(ctypes.get_errno())}")
+        return None
+
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+    if inotify_add_watch(descriptor, os.fsencode(folder_path), mask) < 0:
+        logging.error(f"Could not watch {folder_path}: {os.strerror(ctypes.get_errno())}")
+        os.close(descriptor)
+        return None
+
+    return descriptor
+
+
+def _read_inotify(descriptor: int, wake_descriptor: int, timeout: float) -> set:
+    """
+    Wait for events up to timeout seconds, or until woken, and return the names of the files they are about.
+
+    """
+    readable, _, _ = select.select([descriptor, wake_descriptor], [], [], timeout)
+    if descriptor not in readable:
+        return set()
+
+    try:
+        data = os.read(descriptor, 64 * 1024)
+    except BlockingIOError:
+        return set()
+
+    names = set()
+    offset = 0
+    while offset + _EVENT.size <= len(data):
+        _, _, _, length = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+        offset += length
+
+    return names
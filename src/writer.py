@@ -0,0 +1,138 @@
+import queue
+import logging
+import threading
+import collections
+import dataclasses
+from typing import Deque, Tuple, Callable, Iterator, Optional
+
+from src.atomic import group_commit
+from src.instrument import span
+
+
+@dataclasses.dataclass
+class WriteCommand:
+    operation: str  # Told back with the failure
+    function: Callable  # One of the session functions that change a file
+    arguments: Tuple
+    alone: bool = False  # Not grouped with the other writes, like a rename, which removes a file right away
+
+    def run(self):
+        self.function(*self.arguments)
+
+
+@dataclasses.dataclass
+class WriteFailure:
+    operation: str
+    error: Exception
+
+
+class SessionWriter:
+    """
+    Changes the session files on a background thread, in the order they are submitted, so that a slow disk doesn't
+    block the UI. The commands that pile up while a write is in progress are done in one group commit, so a burst of
+    them rewrites each file once. The failures are collected with failures(), from the UI thread.
+
+    """
+
+    def __init__(self):
+        self._pending: Deque[WriteCommand] = collections.deque()
+        self._condition = threading.Condition()
+        self._failures: queue.Queue = queue.Queue()
+        self._submitted = 0
+        self._done = 0
+        self._stopping = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, command: WriteCommand):
+        with self._condition:
+            self._pending.append(command)
+            self._submitted += 1
+            self._condition.notify_all()
+
+    def call_after(self, function: Callable[[], object]):
+        """
+        Call function on the writer thread, after the commands submitted until now are written.
+
+        """
+        self.submit(WriteCommand("", function, (), alone=True))
+
+    def failures(self) -> Iterator[WriteFailure]:
+        while True:
+            try:
+                yield self._failures.get_nowait()
+            except queue.Empty:
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the commands submitted until now are written. Return False, if the time ran out first.
+
+        """
+        with self._condition:
+            target = self._submitted
+            return self._condition.wait_for(lambda: self._done >= target or not self._thread.is_alive(), timeout)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Write the pending commands and stop the thread.
+
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+
+                if not self._pending:  # Stopping
+                    return
+
+                batch = self._take_batch()
+
+            with span("save"):
+                self._write(batch)
+
+            with self._condition:
+                self._done += len(batch)
+                self._condition.notify_all()
+
+    def _take_batch(self) -> Deque[WriteCommand]:
+        # Either one command that goes alone, or all the ones up to the next such command
+        batch: Deque[WriteCommand] = collections.deque([self._pending.popleft()])
+
+        if not batch[0].alone:
+            while self._pending and not self._pending[0].alone:
+                batch.append(self._pending.popleft())
+
+        return batch
+
+    def _write(self, batch: Deque[WriteCommand]):
+        if batch[0].alone:
+            self._run_command(batch[0])
+            return
+
+        try:
+            with group_commit():
+                for command in batch:
+                    self._run_command(command)
+        except Exception as err:  # The files of the whole group are not written
+            logging.error(f"Could not write {len(batch)} changes: {err}")
+            self._failures.put(WriteFailure(batch[0].operation, err))
+        else:
+            logging.debug(f"Wrote {len(batch)} changes")
+
+    def _run_command(self, command: WriteCommand):
+        try:
+            command.run()
+        except Exception as err:  # Everything is reported to the UI
+            if command.operation:
+                self._failures.put(WriteFailure(command.operation, err))
+            else:
+                logging.error(f"Unexpected error after writing: {err}")
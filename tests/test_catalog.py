@@ -0,0 +1,77 @@
+import os
+import logging
+import tempfile
+import unittest
+
+from src import catalog
+from src.core import TimerSession
+from src.writer import SessionWriter
+
+
+class TestCatalogWithWriter(unittest.TestCase):
+    """
+    The writer writes the session files in group commits; the catalog must match the files once they are written.
+
+    """
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+        # The sessions and the catalog are in data, in the current folder
+        self.initial_folder = os.getcwd()
+        self.folder = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.folder.name, "data", "sessions"))
+        os.chdir(self.folder.name)
+        catalog._entries = None
+
+        self.writer = SessionWriter()
+
+    def tearDown(self):
+        self.writer.stop()
+        catalog._entries = None
+        os.chdir(self.initial_folder)
+        self.folder.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def add_solves(self, session: TimerSession, count: int):
+        for i in range(count):
+            session.add_solve(f"{10 + i}.00", "R U R' U'", None)
+        self.assertTrue(self.writer.flush(timeout=10.0))
+
+    def test_entry_after_flush(self):
+        session = TimerSession.create("a", False, writer=self.writer)
+
+        self.add_solves(session, 3)
+        entry = catalog.get_entry("a")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.solve_count, 3)
+        self.assertEqual(entry.best_single, 10.0)
+
+        self.add_solves(session, 1)
+        entry = catalog.get_entry("a")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.solve_count, 4)
+
+    def test_entry_after_type_change(self):
+        session = TimerSession.create("a", False, writer=self.writer)
+        self.add_solves(session, 2)
+
+        session.change_type("2x2x2")
+        self.assertTrue(self.writer.flush(timeout=10.0))
+        entry = catalog.get_entry("a")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.scramble_type, "2x2x2")
+
+    def test_catalog_saved_with_the_stats(self):
+        session = TimerSession.create("a", False, writer=self.writer)
+        self.add_solves(session, 3)
+
+        # Read again from the file, like at the next start
+        catalog._entries = None
+        entry = catalog.get_entry("a")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.solve_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
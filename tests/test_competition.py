@@ -0,0 +1,195 @@
+import os
+import json
+import math
+import random
+import asyncio
+import logging
+import tempfile
+import unittest
+import threading
+import http.client
+from os.path import join
+from typing import Dict, List, Tuple
+
+from src import catalog
+from src.core import TimerSession
+from src.competition import CompetitionStore, CompetitionServer
+from src.session import Solve
+from src.station import StationClient
+from src.stats import NO_PENALTY, PLUS_TWO, DNF, apply_penalty, calculate_ao5
+from src.timer import format_time_seconds
+
+# The server runs on an event loop of its own, on an ephemeral port, and the stations are real StationClients in the
+# same process, each with its own competitors, pushing solves and changing and removing some of them. The rankings
+# must be what the statistics of all the solves that are left give.
+STATION_COUNT = 40
+SOLVES_PER_STATION = 120
+PUZZLES = ("3x3x3", "2x2x2")
+
+
+class _CountingServer(CompetitionServer):
+    def __init__(self, store: CompetitionStore):
+        super().__init__(store)
+        self.connection_count = 0
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connection_count += 1
+        await super()._serve_connection(reader, writer)
+
+
+class TestCompetition(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.store = CompetitionStore(join(self.folder.name, "competition.db"))
+        self.server = _CountingServer(self.store)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.port = self.run_on_loop(self.server.start("127.0.0.1", 0))
+
+    def tearDown(self):
+        self.run_on_loop(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10.0)
+        self.loop.close()
+        self.store.close()
+        self.folder.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def run_on_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10.0)
+
+    def get_rankings(self) -> dict:
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10.0)
+        try:
+            connection.request("GET", "/rankings")
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            return json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_stations(self):
+        rng = random.Random(46)
+        expected: Dict[Tuple[str, str], Dict[Tuple[str, str], float]] = {}  # Results by puzzle and competitor
+        stations = [StationClient(f"127.0.0.1:{self.port}", f"station {i}") for i in range(STATION_COUNT)]
+
+        try:
+            for i, station in enumerate(stations):
+                pushed: List[Tuple[str, str, Solve]] = []
+
+                for j in range(SOLVES_PER_STATION):
+                    competitor = f"competitor {i}.{j % 3}"
+                    puzzle = PUZZLES[j % len(PUZZLES)]
+                    raw_time = rng.randint(500, 3000) / 100
+                    penalty = rng.choice((NO_PENALTY,) * 8 + (PLUS_TWO, DNF))
+                    solve = Solve(format_time_seconds(raw_time), "R U R' U'", f"2026-10-19 12:00:00.{j:06d}",
+                                  raw_time, penalty=penalty)
+
+                    station.push(competitor, puzzle, solve)
+                    pushed.append((competitor, puzzle, solve))
+
+                # Some are changed and some are removed, maybe before they are sent
+                for competitor, puzzle, solve in rng.sample(pushed, 10):
+                    solve.penalty = rng.choice((NO_PENALTY, PLUS_TWO, DNF))
+                    station.push(competitor, puzzle, solve)
+                removed = rng.sample(pushed, 5)
+                for _, _, solve in removed:
+                    station.remove(solve)
+
+                for competitor, puzzle, solve in pushed:
+                    if any(solve is other for _, _, other in removed):
+                        continue
+                    expected.setdefault((puzzle, competitor), {})[(station.station, solve.date)] = solve.result
+        finally:
+            for station in stations:
+                station.stop()
+
+        self.assertEqual(self.server.connection_count, STATION_COUNT)
+
+        rankings = self.get_rankings()
+        self.assertEqual(set(rankings), set(PUZZLES))
+
+        for puzzle, standings in rankings.items():
+            competitors = [competitor for standing_puzzle, competitor in expected if standing_puzzle == puzzle]
+            self.assertEqual(sorted(standing["competitor"] for standing in standings), sorted(competitors))
+            self.assertEqual([standing["rank"] for standing in standings], list(range(1, len(standings) + 1)))
+
+            for standing in standings:
+                results = expected[(puzzle, standing["competitor"])]
+                times = [results[key] for key in sorted(results, key=lambda key: key[1])]
+
+                self.assertEqual(standing["solve_count"], len(times))
+                self.assert_same_result(standing["best_single"], min(times))
+                self.assert_same_result(standing["best_ao5"],
+                                        min(calculate_ao5(times[k:k + 5]) for k in range(len(times) - 4)))
+
+            # By best average, then by best single
+            keys = [(_from_json(standing["best_ao5"]), _from_json(standing["best_single"])) for standing in standings]
+            self.assertEqual(keys, sorted(keys))
+
+    def test_penalty_sent_again(self):
+        station = StationClient(f"127.0.0.1:{self.port}", "station")
+        solve = Solve("10.00", "R", "2026-10-19 12:00:00.000001", 10.0)
+
+        station.push("competitor", "3x3x3", solve)
+        self.assertTrue(_wait_until(lambda: "3x3x3" in self.get_rankings()))
+
+        solve.penalty = PLUS_TWO
+        station.push("competitor", "3x3x3", solve)
+        station.stop()
+
+        standing, = self.get_rankings()["3x3x3"]
+        self.assertEqual(standing["solve_count"], 1)
+        self.assert_same_result(standing["best_single"], apply_penalty(10.0, PLUS_TWO))
+
+    def test_renamed_session_sent_again(self):
+        initial_folder = os.getcwd()
+        os.makedirs(join(self.folder.name, "data", "sessions"))
+        os.chdir(self.folder.name)
+        catalog._entries = None
+
+        try:
+            station = StationClient(f"127.0.0.1:{self.port}", "station")
+            session = TimerSession.create("old name", False)
+            station.follow(session)
+
+            for time in ("10.00", "11.00", "12.00"):
+                session.add_solve(time, "R U", None)
+            self.assertTrue(_wait_until(lambda: "3x3x3" in self.get_rankings()))
+
+            session.rename("new name")
+            station.stop()
+        finally:
+            catalog._entries = None
+            os.chdir(initial_folder)
+
+        standing, = self.get_rankings()["3x3x3"]
+        self.assertEqual(standing["competitor"], "new name")
+        self.assertEqual(standing["solve_count"], 3)
+
+    def assert_same_result(self, value, result: float):
+        if math.isinf(result):
+            self.assertEqual(value, "DNF")
+        else:
+            self.assertAlmostEqual(value, result, places=6)
+
+
+def _from_json(value) -> float:
+    return math.inf if value == "DNF" else value
+
+
+def _wait_until(condition, timeout: float = 10.0) -> bool:
+    event = threading.Event()
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return True
+        event.wait(0.05)
+    return False
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import math
+import random
+import unittest
+import collections
+from typing import List, Tuple, Set, Callable, Counter
+
+from src.scramble import generate_scramble
+
+# The scrambles of the table-driven generators must come with the same probabilities as the ones of the first
+# generators, which picked random moves and threw away the ones breaking the rules. Those are kept here, as they were,
+# as the reference. The frequencies of the moves at every position and of the pairs of consecutive moves are
+# compared with a two-sample chi-square test; the seeds are fixed, so the result is always the same.
+SCRAMBLE_COUNT = 4000
+SEEDS = (1, 2, 3)
+NGRAM_LENGTH = 4
+SIGNIFICANCE_QUANTILE = 3.09  # Of the standard normal distribution, for a significance level of 0.001
+
+_FACES = "RLUDFB"
+_MODIFIERS = ("", "'", "2")
+_WIDE = ("Rw", "Uw", "Fw")
+
+
+def _is_opposite(move: str, other: str) -> bool:
+    # Of the first 4x4x4 generator: Rw is opposite to L, but L is not opposite to Lw, which it didn't have
+    face, other_face = move[0], other[0]
+    if len(other) > 1:  # Wide
+        return len(move) == 1 and _FACES.index(face) == _FACES.index(other_face) + 1
+    return face != other_face and _FACES.index(face) // 2 == _FACES.index(other_face) // 2
+
+
+def _is_allowed(moves: List[str], move: str) -> bool:
+    own = (move, move[0])  # A wide move can't follow the outer move of its face either
+
+    if moves and moves[-1] in own:
+        return False
+    if len(moves) > 1 and _is_opposite(moves[-1], move) and moves[-2] in own:
+        return False
+    return True
+
+
+def _add_outer_move(moves: List[str], rng: random.Random) -> bool:
+    move = rng.choice(_FACES)
+    rng.choice(_MODIFIERS)  # Consumed anyway, like a move object was made
+
+    if not _is_allowed(moves, move):
+        return False
+
+    moves.append(move)
+    return True
+
+
+def _add_wide_move(moves: List[str], rng: random.Random) -> bool:
+    move = rng.choice(_WIDE)
+    rng.choice(_MODIFIERS)
+
+    if not _is_allowed(moves, move):
+        return False
+
+    moves.append(move)
+    return True
+
+
+def _reference_3x3x3(rng: random.Random) -> List[str]:
+    moves: List[str] = []
+    while len(moves) < 20:
+        _add_outer_move(moves, rng)
+    return moves
+
+
+def _reference_4x4x4(rng: random.Random) -> List[str]:
+    moves: List[str] = []
+    while len(moves) < 45:
+        if len(moves) < 20:
+            _add_outer_move(moves, rng)
+        elif rng.choice((False, True)):
+            while not _add_wide_move(moves, rng):
+                pass
+        else:
+            while not _add_outer_move(moves, rng):
+                pass
+    return moves
+
+
+def _reference_2x2x2(rng: random.Random) -> List[str]:
+    moves: List[str] = []
+    while len(moves) < 9:
+        move = rng.choice("RUF")
+        rng.choice(_MODIFIERS)
+        if not moves or moves[-1] != move:
+            moves.append(move)
+    return moves
+
+
+def _moves_of(scramble_type: str) -> Callable[[random.Random], List[str]]:
+    # The modifiers are always chosen uniformly and independently, so only the moves are compared
+    return lambda rng: [token.rstrip("'2") for token in generate_scramble(scramble_type, rng).split(" ")]
+
+
+def _frequencies(generate: Callable[[random.Random], List[str]], seed: int):
+    rng = random.Random(seed)
+    positions: Counter = collections.Counter()
+    pairs: Counter = collections.Counter()
+
+    for _ in range(SCRAMBLE_COUNT):
+        moves = generate(rng)
+        positions.update(enumerate(moves))
+        pairs.update(zip(moves, moves[1:]))
+
+    return positions, pairs
+
+
+def _reference_4x4x4_ngrams(length: int) -> Set[Tuple[str, ...]]:
+    """
+    Return every sequence of moves the first 4x4x4 generator could make after move 20, from its rules.
+
+    """
+    def following(last_moves: Tuple[str, str]) -> List[str]:
+        return [move for move in tuple(_FACES) + _WIDE if _is_allowed(list(last_moves), move)]
+
+    # Any two different outer moves can end the first part; the moves only depend on the last two
+    states = {(first, second) for first in _FACES for second in _FACES if first != second}
+    pending = list(states)
+    while pending:
+        last_moves = pending.pop()
+        for move in following(last_moves):
+            state = (last_moves[1], move)
+            if state not in states:
+                states.add(state)
+                pending.append(state)
+
+    ngrams: Set[Tuple[str, ...]] = set()
+
+    def extend(moves: Tuple[str, ...]):
+        if len(moves) == length + 2:
+            ngrams.add(moves[2:])
+            return
+        for move in following((moves[-2], moves[-1])):
+            extend(moves + (move,))
+
+    for state in states:
+        extend(state)
+
+    return ngrams
+
+
+def _chi_square(first: Counter, second: Counter) -> float:
+    """
+    Return how many standard deviations the statistic is above its mean, for two samples of the same size.
+
+    """
+    cells = set(first) | set(second)
+    statistic = sum((first[cell] - second[cell]) ** 2 / (first[cell] + second[cell]) for cell in cells)
+    degrees = len(cells) - 1
+
+    # Wilson-Hilferty: the cube root of chi-square / degrees is about normal
+    variance = 2 / (9 * degrees)
+    return ((statistic / degrees) ** (1 / 3) - (1 - variance)) / math.sqrt(variance)
+
+
+class TestScrambleDistribution(unittest.TestCase):
+    def assert_equivalent(self, scramble_type: str, reference: Callable[[random.Random], List[str]]):
+        for seed in SEEDS:
+            positions, pairs = _frequencies(_moves_of(scramble_type), seed)
+            reference_positions, reference_pairs = _frequencies(reference, seed + 1000)
+
+            self.assertEqual(set(pairs), set(reference_pairs), f"{scramble_type}, seed {seed}")
+            self.assertLess(_chi_square(positions, reference_positions), SIGNIFICANCE_QUANTILE,
+                            f"{scramble_type} moves, seed {seed}")
+            self.assertLess(_chi_square(pairs, reference_pairs), SIGNIFICANCE_QUANTILE,
+                            f"{scramble_type} pairs, seed {seed}")
+
+    def test_3x3x3(self):
+        self.assert_equivalent("3x3x3", _reference_3x3x3)
+
+    def test_4x4x4(self):
+        self.assert_equivalent("4x4x4", _reference_4x4x4)
+
+    def test_2x2x2(self):
+        self.assert_equivalent("2x2x2", _reference_2x2x2)
+
+    def test_4x4x4_sequences(self):
+        # The pairs can't tell if a rule looks back further than the last move, so the longer sequences are compared
+        expected = _reference_4x4x4_ngrams(NGRAM_LENGTH)
+        rng = random.Random(SEEDS[0])
+        generate = _moves_of("4x4x4")
+        ngrams: Set[Tuple[str, ...]] = set()
+
+        for _ in range(SCRAMBLE_COUNT):
+            moves = generate(rng)[20:]
+            ngrams.update(zip(*(moves[i:] for i in range(NGRAM_LENGTH))))
+
+        self.assertEqual(ngrams, expected)
+
+    def test_no_wide_moves_at_the_start_of_4x4x4(self):
+        rng = random.Random(7)
+        for _ in range(1000):
+            self.assertFalse(any("w" in move for move in generate_scramble("4x4x4", rng).split(" ")[:20]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+import unittest
+from os.path import join
+
+from src import catalog
+from src.core import TimerSession
+from src.scramble import generate_scramble
+from src.session import SESSIONS_PATH, load_session_data, with_scramble
+
+
+class TestScramblesInSessionFiles(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+        self.initial_folder = os.getcwd()
+        self.folder = tempfile.TemporaryDirectory()
+        os.makedirs(join(self.folder.name, "data", "sessions"))
+        os.chdir(self.folder.name)
+        catalog._entries = None
+
+    def tearDown(self):
+        catalog._entries = None
+        os.chdir(self.initial_folder)
+        self.folder.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def read_file(self, name: str) -> dict:
+        with open(join(SESSIONS_PATH, name + ".json"), "r") as file:
+            return json.load(file)
+
+    def test_session_file_stands_on_its_own(self):
+        session = TimerSession.create("a", False)
+        scrambles = [generate_scramble("4x4x4"), "not a scramble of ours"]
+        for scramble in scrambles:
+            session.add_solve("12.34", scramble, None)
+
+        solves = self.read_file("a")["solves"]
+        self.assertIn("packed_scramble", solves[0])
+        self.assertLess(len(solves[0]["packed_scramble"]), len(scrambles[0]) // 2)
+        self.assertEqual(solves[1]["scramble"], scrambles[1])
+
+        # Copied alone into another sessions folder
+        with tempfile.TemporaryDirectory() as other_folder:
+            os.makedirs(join(other_folder, "data", "sessions"))
+            shutil.copy(join(SESSIONS_PATH, "a.json"), join(other_folder, SESSIONS_PATH))
+            os.chdir(other_folder)
+            try:
+                session_data = load_session_data("a.json")
+            finally:
+                os.chdir(self.folder.name)
+
+        self.assertEqual([solve.scramble for solve in session_data.solves], scrambles)
+        self.assertEqual([with_scramble(solve)["scramble"] for solve in solves], scrambles)
+
+
+if __name__ == "__main__":
+    unittest.main()